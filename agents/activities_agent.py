@@ -9,12 +9,14 @@ Features:
 - Filters by interests, budget, and group size
 - Returns structured activity recommendations
 - Provides indoor/outdoor alternatives
+- Coalesces identical concurrent requests into one model call
+- Serves the last good answer (marked stale) while the model is failing
 """
 
 import uvicorn
 import os
 import json
-from typing import List, Literal
+from typing import TYPE_CHECKING, List, Literal, Optional, Tuple
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
@@ -23,7 +25,6 @@ load_dotenv()
 # A2A Protocol imports
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
@@ -31,15 +32,26 @@ from a2a.types import (
 )
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
 
-# Google ADK imports
-from google.adk.agents.llm_agent import LlmAgent
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
-from google.adk.artifacts import InMemoryArtifactService
-from google.genai import types
+if TYPE_CHECKING:
+    from google.adk.agents.llm_agent import LlmAgent
+
+from json_stream import IncrementalItemParser
+from prompt_compaction import format_forecast
+from serialization import Payload, as_mapping
+from agent_startup import LazyAgent, warmup_route
+from admission import AdmissionController, Overloaded
+from cancellation import RunningExecutions
+from circuit_breaker import CircuitOpen, StaleFallback, collect_stale
+from deadlines import DeadlineExceeded, deadline_scope, request_timeout_seconds
+from metrics import metrics_route, stage_timer, track_execution, track_stores
+from retry import ModelError
+from single_flight import SingleFlight
+from structured_agent import ChunkCallback, StructuredAgent
+from task_stream import TaskStreamPublisher
+from task_store import build_task_store, shutdown_handlers
+from token_usage import collect_usage
+from tracing import execute_span, setup_tracing
 
 
 class Activity(BaseModel):
@@ -65,13 +77,24 @@ class ActivitiesRequest(BaseModel):
     """Input format for activities agent requests"""
     destination: str = Field(description="Destination city/location")
     dates: List[str] = Field(description="List of dates (e.g., ['2025-10-20', '2025-10-21'])")
-    weather_forecast: dict = Field(description="Weather forecast data from weather agent")
+    weather_forecast: Payload = Field(description="Weather forecast data from weather agent")
     interests: List[str] = Field(description="User interests (e.g., ['outdoor', 'culture', 'food', 'adventure'])")
     budget: str = Field(description="Budget level: 'low', 'medium', 'high'")
     group_size: int = Field(description="Number of people in the group")
 
+    def cache_key(self) -> Tuple:
+        """Canonical key: text fields trimmed and case-folded, lists sorted, forecast as sorted-key JSON."""
+        return (
+            " ".join(self.destination.split()).casefold(),
+            tuple(sorted(date.strip() for date in self.dates)),
+            tuple(sorted(interest.strip().casefold() for interest in self.interests)),
+            self.budget.strip().casefold(),
+            self.group_size,
+            json.dumps(self.weather_forecast, sort_keys=True, default=as_mapping),
+        )
+
 
-class ActivitiesAgent:
+class ActivitiesAgent(StructuredAgent):
     """
     Activity recommendation agent powered by Google ADK and Gemini.
 
@@ -86,20 +109,51 @@ class ActivitiesAgent:
         _agent: The underlying LlmAgent instance
         _user_id: User ID for session management
         _runner: ADK Runner for executing the agent
+        _flights: Coalesces concurrent recommendations for the same request
     """
 
-    def __init__(self):
-        self._agent = self._build_agent()
-        self._user_id = 'remote_agent'
-        self._runner = Runner(
-            app_name=self._agent.name,
-            agent=self._agent,
-            artifact_service=InMemoryArtifactService(),
-            session_service=InMemorySessionService(),
-            memory_service=InMemoryMemoryService(),
+    output_model = StructuredActivities
+    result_label = "activities recommendations"
+
+    def __init__(self, response_schema: Optional[bool] = None):
+        super().__init__(response_schema)
+        self._flights = SingleFlight(self._agent.name)
+        self._fallback = StaleFallback(self._agent.name)
+
+    def single_flight_stats(self) -> dict:
+        """Return how many requests shared an in-flight generation."""
+        return self._flights.stats()
+
+    async def recommend(
+        self,
+        request: ActivitiesRequest,
+        session_id: str,
+        on_chunk: Optional[ChunkCallback] = None,
+    ) -> Tuple[Optional[StructuredActivities], str]:
+        """
+        Answer an ActivitiesRequest; concurrent identical requests (same
+        cache_key) share one generation, and while the model is failing the
+        last good answer for the key is served instead.
+
+        Returns:
+            Tuple of the validated recommendations (None if generation
+            failed) and the JSON string to send back
+        """
+        with stage_timer(self._agent.name, 'build_prompt'):
+            query = build_activities_query(request)
+        cache_key = request.cache_key()
+        return await self._fallback.serve(
+            cache_key,
+            lambda: self._flights.do(
+                cache_key, lambda stream: self.generate(query, session_id, stream), on_chunk
+            ),
+            is_good=lambda result: result[0] is not None,
         )
 
-    def _build_agent(self) -> LlmAgent:
+    def _build_agent(self) -> "LlmAgent":
+        # Google ADK imports (deferred until the agent is built)
+        from google.adk.agents.llm_agent import LlmAgent
+
         model_name = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
 
         return LlmAgent(
@@ -149,69 +203,29 @@ Guidelines:
 Return ONLY valid JSON, no markdown code blocks, no other text.
             """,
             tools=[],
+            output_schema=self.output_schema(),
+            disallow_transfer_to_parent=True,
+            disallow_transfer_to_peers=True,
         )
 
-    async def invoke(self, query: str, session_id: str) -> str:
-        session = await self._runner.session_service.get_session(
-            app_name=self._agent.name,
-            user_id=self._user_id,
-            session_id=session_id,
-        )
 
-        content = types.Content(
-            role='user', parts=[types.Part.from_text(text=query)]
-        )
+def build_activities_query(request: ActivitiesRequest) -> str:
+    """Format an activities request into a prompt for the ADK agent."""
+    dates_str = ", ".join(request.dates)
+    interests_str = ", ".join(request.interests)
+    weather_str = format_forecast(request.weather_forecast)
 
-        if session is None:
-            session = await self._runner.session_service.create_session(
-                app_name=self._agent.name,
-                user_id=self._user_id,
-                state={},
-                session_id=session_id,
-            )
-
-        response_text = ''
-        async for event in self._runner.run_async(
-            user_id=self._user_id,
-            session_id=session.id,
-            new_message=content
-        ):
-            if event.is_final_response():
-                if (
-                    event.content
-                    and event.content.parts
-                    and event.content.parts[0].text
-                ):
-                    response_text = '\n'.join(
-                        [p.text for p in event.content.parts if p.text]
-                    )
-                break
-
-        content_str = response_text.strip()
-
-        if "```json" in content_str:
-            content_str = content_str.split("```json")[1].split("```")[0].strip()
-        elif "```" in content_str:
-            content_str = content_str.split("```")[1].split("```")[0].strip()
+    return f"""Suggest activities for {request.destination} for the following dates: {dates_str}
 
-        try:
-            structured_data = json.loads(content_str)
-            validated_activities = StructuredActivities(**structured_data)
-            final_response = json.dumps(validated_activities.model_dump(), indent=2)
-            print("✅ Successfully created structured activities recommendations")
-            return final_response
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing error: {e}")
-            print(f"Content: {content_str}")
-            return json.dumps({
-                "error": "Failed to generate structured activities",
-                "raw_content": content_str[:200]
-            })
-        except Exception as e:
-            print(f"❌ Validation error: {e}")
-            return json.dumps({
-                "error": f"Validation failed: {str(e)}"
-            })
+Weather Forecast:
+{weather_str}
+
+User Preferences:
+- Interests: {interests_str}
+- Budget: {request.budget}
+- Group Size: {request.group_size} people
+
+Please provide activity recommendations that match the weather and preferences."""
 
 
 # Build the A2A Starlette app
@@ -243,39 +257,59 @@ public_agent_card = AgentCard(
 
 class ActivitiesAgentExecutor(AgentExecutor):
     def __init__(self):
-        self.agent = ActivitiesAgent()
+        # Built on first use (see agent_startup) to keep imports light
+        self.lazy_agent = LazyAgent('activities_agent', ActivitiesAgent)
+        self.running = RunningExecutions('activities_agent')
+        self.admission = AdmissionController('activities_agent')
+
+    @property
+    def agent(self) -> ActivitiesAgent:
+        return self.lazy_agent.get()
 
     async def execute(
         self,
         context: RequestContext,
         event_queue: EventQueue,
     ) -> None:
+        with execute_span('activities_agent', context):
+            with deadline_scope(request_timeout_seconds('activities_agent', context)):
+                try:
+                    async with self.running.track(context, event_queue):
+                        async with self.admission.admit():
+                            with track_execution('activities_agent'):
+                                await self._execute(context, event_queue)
+                except Overloaded as e:
+                    await self.admission.reject(e, context, event_queue)
+
+    async def _execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        publisher = TaskStreamPublisher(
+            context,
+            event_queue,
+            artifact_name='activities',
+            item_parser=IncrementalItemParser('activities', Activity),
+        )
         try:
             # Parse and validate JSON input
-            raw_input = context.get_user_input()
-            input_data = json.loads(raw_input)
-            activities_request = ActivitiesRequest(**input_data)
-
-            # Format structured request into prompt for ADK agent
-            dates_str = ", ".join(activities_request.dates)
-            interests_str = ", ".join(activities_request.interests)
-            weather_str = json.dumps(activities_request.weather_forecast, indent=2)
-
-            query = f"""Suggest activities for {activities_request.destination} for the following dates: {dates_str}
-
-Weather Forecast:
-{weather_str}
-
-User Preferences:
-- Interests: {interests_str}
-- Budget: {activities_request.budget}
-- Group Size: {activities_request.group_size} people
-
-Please provide activity recommendations that match the weather and preferences."""
+            with stage_timer('activities_agent', 'parse_input'):
+                raw_input = context.get_user_input()
+                input_data = json.loads(raw_input)
+                activities_request = ActivitiesRequest(**input_data)
 
             session_id = getattr(context, 'context_id', 'default_session')
-            final_content = await self.agent.invoke(query, session_id)
-            await event_queue.enqueue_event(new_agent_text_message(final_content))
+            await publisher.start()
+            with collect_usage() as usage, collect_stale() as stale:
+                _, final_content = await self.agent.recommend(
+                    activities_request, session_id, on_chunk=publisher.on_chunk
+                )
+            with stage_timer('activities_agent', 'enqueue'):
+                await publisher.publish(
+                    final_content,
+                    metadata={'token_usage': usage.as_dict(), **stale.metadata()},
+                )
 
         except json.JSONDecodeError as e:
             error_msg = json.dumps({
@@ -290,7 +324,10 @@ Please provide activity recommendations that match the weather and preferences."
                     "group_size": "number"
                 }
             })
-            await event_queue.enqueue_event(new_agent_text_message(error_msg))
+            await publisher.publish(error_msg)
+
+        except (CircuitOpen, DeadlineExceeded, ModelError) as e:
+            await publisher.publish(json.dumps(e.payload()))
 
         except Exception as e:
             error_msg = json.dumps({
@@ -305,16 +342,20 @@ Please provide activity recommendations that match the weather and preferences."
                     "group_size": "number"
                 }
             })
-            await event_queue.enqueue_event(new_agent_text_message(error_msg))
+            await publisher.publish(error_msg)
 
     async def cancel(
         self, context: RequestContext, event_queue: EventQueue
     ) -> None:
-        raise Exception('cancel not supported')
+        await self.running.cancel(context, event_queue)
+
+setup_tracing('activities_agent')
+
+task_store = build_task_store('activities')
 
 request_handler = DefaultRequestHandler(
     agent_executor=ActivitiesAgentExecutor(),
-    task_store=InMemoryTaskStore(),
+    task_store=task_store,
 )
 
 server = A2AStarletteApplication(
@@ -323,8 +364,13 @@ server = A2AStarletteApplication(
     extended_agent_card=public_agent_card,
 )
 
+track_stores('activities_agent', request_handler.agent_executor.lazy_agent, task_store)
+
 # This is the ASGI app entry that Vercel invokes
-app = server.build()
+app = server.build(
+    routes=[warmup_route(request_handler.agent_executor.lazy_agent), metrics_route()],
+    on_shutdown=shutdown_handlers(task_store),
+)
 
 
 if __name__ == "__main__":
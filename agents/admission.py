@@ -0,0 +1,211 @@
+"""
+Admission control
+
+Bounds how many A2A executions an agent runs at once, so a burst of
+requests queues briefly or is turned away instead of becoming a burst of
+Gemini calls that all slow down (or hit quota) together.
+
+- At most <AGENT>_MAX_CONCURRENCY (else AGENT_MAX_CONCURRENCY, default 16)
+  executions run at once; 0 disables the limit
+- Further requests wait in a FIFO queue of at most <AGENT>_MAX_QUEUE (else
+  AGENT_MAX_QUEUE, default 64) entries, for at most
+  <AGENT>_MAX_QUEUE_WAIT_SECONDS (else AGENT_MAX_QUEUE_WAIT_SECONDS,
+  default 10) or the request's remaining deadline
+- A full queue, or a wait that runs out, is answered at once with
+  `{"error": "Busy", ..., "retry_after_seconds": n, "retryable": true}`
+- Queue depth, queue wait and rejections are exported per agent
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Part, TextPart
+from a2a.utils import new_agent_text_message
+
+from deadlines import remaining_seconds
+from metrics import Counter, Gauge, Histogram
+
+QUEUE_DEPTH = Gauge(
+    "a2a_agent_queue_depth", "Requests waiting for an execution slot.", ["agent"]
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "a2a_agent_queue_wait_seconds", "Time admitted requests waited for a slot.", ["agent"]
+)
+REJECTIONS = Counter(
+    "a2a_agent_rejections_total",
+    "Requests turned away as busy (reason: queue_full or queue_timeout).",
+    ["agent", "reason"],
+)
+
+
+def _setting(agent: str, name: str, default: float) -> float:
+    return float(os.getenv(f"{agent.upper()}_{name}", os.getenv(f"AGENT_{name}", default)))
+
+
+class Overloaded(Exception):
+    """The agent had no execution slot for the request."""
+
+    def __init__(self, agent: str, reason: str, retry_after_seconds: int):
+        self.agent = agent
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+        super().__init__(f"{agent} is busy, retry after {retry_after_seconds}s")
+
+    def payload(self) -> dict:
+        """Error payload returned to the A2A client."""
+        return {
+            "error": "Busy",
+            "message": str(self),
+            "reason": self.reason,
+            "retry_after_seconds": self.retry_after_seconds,
+            "retryable": True,
+        }
+
+
+class AdmissionController:
+    """
+    Concurrency limit and bounded wait queue for one agent's executions.
+
+    Attributes:
+        agent: Agent name used in logs, metrics and the limit settings
+        max_concurrency: Executions run at once (0 for no limit)
+        max_queue: Requests allowed to wait for a slot
+        max_queue_wait: Seconds a request may wait for a slot
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        max_queue_wait: Optional[float] = None,
+    ):
+        self.agent = agent
+        self.max_concurrency = (
+            int(_setting(agent, "MAX_CONCURRENCY", 16)) if max_concurrency is None else max_concurrency
+        )
+        self.max_queue = int(_setting(agent, "MAX_QUEUE", 64)) if max_queue is None else max_queue
+        self.max_queue_wait = (
+            _setting(agent, "MAX_QUEUE_WAIT_SECONDS", 10) if max_queue_wait is None else max_queue_wait
+        )
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of execution time, for the retry-after hint
+        self._service_seconds = 1.0
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """
+        Hold an execution slot for the block, waiting for one if needed.
+
+        Raises:
+            Overloaded: The queue is full, or no slot freed up in time
+        """
+        await self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_seconds += 0.2 * (time.monotonic() - started - self._service_seconds)
+            self._release()
+
+    async def _acquire(self) -> None:
+        if self.max_concurrency <= 0 or (self.active < self.max_concurrency and not self._waiters):
+            self.active += 1
+            self._admitted(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        QUEUE_DEPTH.set(self.agent, value=len(self._waiters))
+        started = time.monotonic()
+        remaining = remaining_seconds()
+        timeout = self.max_queue_wait if remaining is None else max(0.0, min(self.max_queue_wait, remaining))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            # Unless a slot was handed over just as the wait ran out
+            if not waiter.done():
+                self._leave_queue(waiter)
+                self._reject("queue_timeout")
+        except asyncio.CancelledError:
+            if waiter.done():
+                # Pass on the slot this request was just given
+                self._release()
+            else:
+                self._leave_queue(waiter)
+            raise
+        QUEUE_DEPTH.set(self.agent, value=len(self._waiters))
+        self._admitted(time.monotonic() - started)
+
+    def _release(self) -> None:
+        # Hand the slot straight to the oldest waiter, so newcomers cannot jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _leave_queue(self, waiter: asyncio.Future) -> None:
+        waiter.cancel()
+        self._waiters.remove(waiter)
+        QUEUE_DEPTH.set(self.agent, value=len(self._waiters))
+
+    def _admitted(self, waited: float) -> None:
+        self.admitted += 1
+        QUEUE_WAIT_SECONDS.observe(self.agent, value=waited)
+
+    def _reject(self, reason: str) -> None:
+        self.rejected += 1
+        REJECTIONS.inc(self.agent, reason)
+        slots = max(self.max_concurrency, 1)
+        retry_after = max(1, math.ceil(self._service_seconds * (len(self._waiters) + 1) / slots))
+        print(f"🚦 {self.agent} busy ({self.active} running, {len(self._waiters)} queued): {reason}")
+        raise Overloaded(self.agent, reason, retry_after)
+
+    async def reject(
+        self, error: Overloaded, context: RequestContext, event_queue: EventQueue
+    ) -> None:
+        """
+        Answer a request that was not admitted with the busy error.
+
+        A task already created for the request (streaming mode) is marked
+        as failed with the error as its message.
+        """
+        text = json.dumps(error.payload())
+        metadata = {"retry_after_seconds": error.retry_after_seconds}
+        task = context.current_task
+        if task is None:
+            message = new_agent_text_message(text)
+            message.metadata = metadata
+            await event_queue.enqueue_event(message)
+            return
+
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+        await updater.failed(
+            message=updater.new_agent_message([Part(root=TextPart(text=text))], metadata=metadata)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
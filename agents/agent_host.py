@@ -0,0 +1,101 @@
+"""
+Multi-Agent Host (A2A Protocol)
+
+Serves the weather, activities and weekend planner A2A agents from a single
+process instead of three separate uvicorn servers. Each agent keeps its own
+A2AStarletteApplication and agent card, mounted under a path prefix:
+
+- /weather/          Weather Agent
+- /activities/       Activities Agent
+- /weekend-planner/  Weekend Planner Agent
+- /trip/             Trip Agent (all three stages in process)
+
+All agents share one interpreter, one event loop and one Gemini model
+client, so google-adk/genai are imported and initialized only once. Agents
+are built as AGENT_STARTUP says (see agent_startup): lazily on first use or
+GET /<prefix>/warmup by default, at import with AGENT_STARTUP=eager.
+"""
+
+import os
+from typing import TYPE_CHECKING, Optional
+
+import uvicorn
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+load_dotenv()
+
+if TYPE_CHECKING:
+    from google.adk.models.google_llm import Gemini
+
+from tracing import setup_tracing
+
+# Before importing the agents, so spans carry the host's service name
+setup_tracing('agent_host')
+
+import activities_agent
+import trip_agent
+import weather_agent
+import weekend_planner_agent
+from task_store import shutdown_handlers
+
+
+HOSTED_AGENTS = {
+    "weather": weather_agent,
+    "activities": activities_agent,
+    "weekend-planner": weekend_planner_agent,
+    "trip": trip_agent,
+}
+
+LLM_AGENT_MODULES = (weather_agent, activities_agent, weekend_planner_agent)
+
+
+def share_model_client(model_name: str) -> None:
+    """
+    Point every hosted LlmAgent at one Gemini instance (and its genai
+    client), as each agent is built.
+    """
+    shared: Optional["Gemini"] = None
+
+    def use_shared_model(agent) -> None:
+        nonlocal shared
+        if shared is None:
+            # Google ADK imports (deferred until an agent is built)
+            from google.adk.models.google_llm import Gemini
+            shared = Gemini(model=model_name)
+        for llm_agent in agent.llm_agents():
+            llm_agent.model = shared
+
+    for module in LLM_AGENT_MODULES:
+        module.request_handler.agent_executor.lazy_agent.on_build(use_shared_model)
+
+
+def build_host_app(public_url: str) -> Starlette:
+    """
+    Mount every agent app under its prefix and rewrite card URLs to match.
+
+    Args:
+        public_url: Public base URL of the host (e.g. http://localhost:9010)
+    """
+    routes = []
+    on_shutdown = []
+    for prefix, module in HOSTED_AGENTS.items():
+        module.public_agent_card.url = f"{public_url.rstrip('/')}/{prefix}/"
+        routes.append(Mount(f"/{prefix}", app=module.app))
+        # Mounted apps do not receive lifespan events, so close their
+        # task stores from the host instead.
+        on_shutdown.extend(shutdown_handlers(module.task_store))
+    return Starlette(routes=routes, on_shutdown=on_shutdown)
+
+
+port = int(os.getenv("AGENT_HOST_PORT", 9010))
+share_model_client(os.getenv('GEMINI_MODEL', 'gemini-2.5-flash'))
+app = build_host_app(os.getenv("AGENT_HOST_PUBLIC_URL", f"http://localhost:{port}"))
+
+
+if __name__ == "__main__":
+    print(f"🧩 Starting Agent Host on http://localhost:{port}")
+    for prefix in HOSTED_AGENTS:
+        print(f"   /{prefix}/ → http://localhost:{port}/{prefix}/")
+    uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,83 @@
+"""
+Agent startup modes
+
+The agent modules expose `app` for Vercel, so everything they do at import
+time is paid on every serverless cold start. Building an ADK agent loads
+google.adk/google.genai and constructs the Runner and its services, which
+takes seconds. Agent cards do not need any of it.
+
+AGENT_STARTUP selects when agents are built:
+- lazy (default): on the first A2A request, or on GET /warmup
+- eager: at import time, as before
+"""
+
+import os
+import time
+from typing import Callable, Dict, Generic, List, Optional, TypeVar
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+AgentT = TypeVar("AgentT")
+
+
+def lazy_startup_enabled() -> bool:
+    return os.getenv("AGENT_STARTUP", "lazy").lower() != "eager"
+
+
+class LazyAgent(Generic[AgentT]):
+    """
+    Builds an agent on first use.
+
+    Construction is synchronous, so concurrent requests on the event loop
+    cannot build the agent twice.
+
+    Attributes:
+        name: Name used in logs and the warmup response
+        build_ms: How long construction took (None until built)
+    """
+
+    def __init__(self, name: str, factory: Callable[[], AgentT]):
+        self.name = name
+        self._factory = factory
+        self._agent: Optional[AgentT] = None
+        self._on_build: List[Callable[[AgentT], None]] = []
+        self.build_ms: Optional[float] = None
+        if not lazy_startup_enabled():
+            self.get()
+
+    @property
+    def built(self) -> bool:
+        return self._agent is not None
+
+    def get(self) -> AgentT:
+        if self._agent is None:
+            started = time.perf_counter()
+            agent = self._factory()
+            for callback in self._on_build:
+                callback(agent)
+            self._agent = agent
+            self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+            print(f"🔥 Built {self.name} in {self.build_ms} ms")
+        return self._agent
+
+    def on_build(self, callback: Callable[[AgentT], None]) -> None:
+        """Call `callback` with the agent once it is built (at once if it already is)."""
+        if self._agent is not None:
+            callback(self._agent)
+        else:
+            self._on_build.append(callback)
+
+
+def warmup_route(*agents: LazyAgent) -> Route:
+    """GET /warmup: build the given agents now and report their build times."""
+
+    async def warmup(request: Request) -> JSONResponse:
+        report: Dict[str, Optional[float]] = {}
+        for agent in agents:
+            agent.get()
+            report[agent.name] = agent.build_ms
+        return JSONResponse({"built_ms": report})
+
+    return Route("/warmup", warmup, methods=["GET"])
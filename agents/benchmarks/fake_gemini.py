@@ -0,0 +1,284 @@
+"""
+Deterministic fake Gemini backend for offline benchmarks
+
+FakeGemini is an ADK BaseLlm that answers with canned JSON for each of the
+agents (weather, activities, weekend planner and its notes writer) after a
+simulated latency, so executors can be load-tested without API quota.
+
+- Latency follows a configurable distribution (see LatencyModel.parse)
+- A configurable share of responses is invalid: clipped JSON that stops
+  just before its closing brackets (which the local repair fixes), JSON cut
+  off mid-reply (whose lost fields need a targeted re-ask) or prose (which
+  needs a full re-ask)
+- A configurable share of calls fails with a 503, as an overloaded backend would
+- Streaming requests are answered in chunks spread over the latency
+- Final responses report usage metadata (about 4 characters per token)
+- Every call is recorded in the current `call_log` context, so a driver can
+  attribute model time to the request that caused it
+"""
+
+import asyncio
+import contextvars
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import errors, types
+from pydantic import PrivateAttr
+
+# Set by the driver per request; FakeGemini appends (agent, seconds) to it
+call_log: contextvars.ContextVar[Optional[List[tuple]]] = contextvars.ContextVar(
+    "fake_gemini_call_log", default=None
+)
+
+DATE_LIST = re.compile(r"following dates: (.+)$", re.M)
+CONDITIONS = ["Sunny", "Partly Cloudy", "Light Rain", "Cloudy"]
+CHUNK_SIZE = 64
+
+
+@dataclass
+class LatencyModel:
+    """
+    Simulated model latency in milliseconds.
+
+    Spec strings:
+        fixed:800            always 800 ms
+        uniform:400,1200     uniform between 400 and 1200 ms
+        lognormal:800,0.4    median 800 ms, sigma 0.4 (long right tail)
+    """
+    kind: str
+    a: float
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, args = spec.partition(":")
+        values = [float(v) for v in args.split(",") if v]
+        if kind == "fixed" and len(values) == 1:
+            return cls(kind, values[0])
+        if kind in ("uniform", "lognormal") and len(values) == 2:
+            return cls(kind, values[0], values[1])
+        raise ValueError(f"Invalid latency spec '{spec}'")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        return self.a * rng.lognormvariate(0.0, self.b)
+
+
+def weather_response(prompt: str) -> dict:
+    match = DATE_LIST.search(prompt)
+    dates = [d.strip() for d in match.group(1).split(",")] if match else ["2025-10-20"]
+    return {
+        "destination": "Test City",
+        "forecast": [
+            {
+                "day": i + 1,
+                "date": date,
+                "condition": CONDITIONS[i % len(CONDITIONS)],
+                "highTemp": 70 + i,
+                "lowTemp": 55 + i,
+                "precipitation": (i * 30) % 90,
+                "humidity": 60,
+                "windSpeed": 8,
+                "description": "Mild with a light breeze",
+            }
+            for i, date in enumerate(dates)
+        ],
+        "travelAdvice": "Pack layers and an umbrella.",
+        "bestDays": [1],
+    }
+
+
+def activities_response(prompt: str) -> dict:
+    settings = ["outdoor", "indoor", "both"]
+    times = ["Morning", "Afternoon", "Evening"]
+    return {
+        "destination": "Test City",
+        "activities": [
+            {
+                "name": f"Activity {i + 1}",
+                "category": "Cultural",
+                "description": "A guided visit with local food stops",
+                "duration_minutes": 60 + 30 * (i % 3),
+                "estimated_cost": 10 * i,
+                "weather_appropriate": True,
+                "indoor_outdoor": settings[i % 3],
+                "best_time": times[i % 3],
+                "location": f"District {i % 3 + 1}",
+            }
+            for i in range(6)
+        ],
+        "weather_summary": "Mostly mild",
+        "planning_tips": ["Start early", "Keep indoor options for the rain"],
+    }
+
+
+def planner_response(prompt: str) -> dict:
+    return {
+        "destination": "Test City",
+        "dates": ["Saturday, Oct 20", "Sunday, Oct 21"],
+        "day_by_day": [
+            {
+                "date": date,
+                "weather_summary": "Mild",
+                "schedule": [
+                    {
+                        "time": "9:00 AM - 10:30 AM",
+                        "activity_name": "Activity 1",
+                        "location": "District 1",
+                        "duration_minutes": 90,
+                        "notes": "Arrive early",
+                    }
+                ],
+                "meal_suggestions": ["Lunch nearby"],
+                "backup_plan": "Museum if it rains",
+            }
+            for date in ("Saturday, Oct 20", "Sunday, Oct 21")
+        ],
+        "total_estimated_cost": 50,
+        "packing_essentials": ["Umbrella"],
+        "general_tips": ["Get a transit card"],
+        "emergency_contacts": "Emergency: 112",
+    }
+
+
+def plan_notes_response(prompt: str) -> dict:
+    return {
+        "days": [
+            {"date": "Day 1", "activity_notes": ["Arrive early"] * 3, "backup_plan": "Museum if it rains"},
+            {"date": "Day 2", "activity_notes": ["Book ahead"] * 3, "backup_plan": "Covered market"},
+        ],
+        "packing_essentials": ["Umbrella"],
+        "general_tips": ["Get a transit card"],
+        "emergency_contacts": "Emergency: 112",
+    }
+
+
+# Canned valid responses per LlmAgent name
+RESPONDERS: Dict[str, Callable[[str], dict]] = {
+    "weather_agent": weather_response,
+    "activities_agent": activities_response,
+    "weekend_planner_agent": planner_response,
+    "weekend_plan_writer": plan_notes_response,
+}
+
+
+class FakeGemini(BaseLlm):
+    """
+    BaseLlm returning canned JSON after a simulated latency.
+
+    Attributes:
+        model: Reported model name
+        agent_name: Which canned responder to use (an LlmAgent name)
+    """
+
+    model: str = "fake-gemini"
+    agent_name: str = ""
+
+    _latency: LatencyModel = PrivateAttr()
+    _rng: random.Random = PrivateAttr()
+    _truncated_rate: float = PrivateAttr(0.0)
+    _prose_rate: float = PrivateAttr(0.0)
+    _error_rate: float = PrivateAttr(0.0)
+    _clipped_rate: float = PrivateAttr(0.0)
+
+    def configure(
+        self,
+        latency: LatencyModel,
+        seed: int = 0,
+        truncated_rate: float = 0.0,
+        prose_rate: float = 0.0,
+        error_rate: float = 0.0,
+        clipped_rate: float = 0.0,
+    ) -> "FakeGemini":
+        self._latency = latency
+        self._rng = random.Random(seed)
+        self._truncated_rate = truncated_rate
+        self._prose_rate = prose_rate
+        self._error_rate = error_rate
+        self._clipped_rate = clipped_rate
+        return self
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        started = time.perf_counter()
+        # The whole conversation, so follow-up re-asks see the original request
+        prompt = "\n".join(
+            part.text
+            for content in llm_request.contents
+            if content.role == "user" and content.parts
+            for part in content.parts
+            if part.text
+        )
+        delay = self._latency.sample(self._rng) / 1000
+        if self._error_rate and self._rng.random() < self._error_rate:
+            # Overloaded backends tend to fail fast
+            await asyncio.sleep(delay / 10)
+            raise errors.ServerError(
+                503, {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}}
+            )
+        text = self._response_text(prompt)
+
+        if stream:
+            chunks = [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)] or [""]
+            for chunk in chunks:
+                await asyncio.sleep(delay / len(chunks))
+                yield _response(chunk, partial=True)
+        else:
+            await asyncio.sleep(delay)
+
+        log = call_log.get()
+        if log is not None:
+            log.append((self.agent_name, time.perf_counter() - started))
+        final = _response(text, partial=False)
+        final.usage_metadata = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=len(prompt) // 4,
+            candidates_token_count=len(text) // 4,
+            total_token_count=len(prompt) // 4 + len(text) // 4,
+        )
+        yield final
+
+    def _response_text(self, prompt: str) -> str:
+        text = json.dumps(RESPONDERS[self.agent_name](prompt))
+        roll = self._rng.random()
+        if roll < self._prose_rate:
+            return "I'm sorry, I could not produce the requested JSON right now."
+        if roll < self._prose_rate + self._truncated_rate:
+            return text[: int(len(text) * 0.7)]
+        if roll < self._prose_rate + self._truncated_rate + self._clipped_rate:
+            return text.rstrip("]}")
+        return text
+
+
+def install_fake_gemini(
+    llm_agents: List,
+    latency: LatencyModel,
+    seed: int = 0,
+    truncated_rate: float = 0.0,
+    prose_rate: float = 0.0,
+    error_rate: float = 0.0,
+    clipped_rate: float = 0.0,
+) -> None:
+    """Point each LlmAgent at its own seeded FakeGemini."""
+    for index, llm_agent in enumerate(llm_agents):
+        llm_agent.model = FakeGemini(agent_name=llm_agent.name).configure(
+            latency, seed + index, truncated_rate, prose_rate, error_rate, clipped_rate
+        )
+
+
+def _response(text: str, partial: bool) -> LlmResponse:
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=text)]),
+        partial=partial,
+        turn_complete=not partial,
+    )
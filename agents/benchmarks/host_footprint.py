@@ -0,0 +1,134 @@
+"""
+Benchmark: single-process agent host vs three agent processes
+
+Starts the weather, activities and weekend planner agents as three
+separate processes, then as one agent_host.py process, and reports for
+each setup:
+- cards_s: time until every agent card is served
+- startup_s: time until every agent is built (GET /warmup on each agent,
+  so lazy and eager startup are compared like for like)
+- resident memory (RSS) summed over the processes once they are built
+
+No model calls are made, so no API quota is used (a placeholder
+GOOGLE_API_KEY is set if none is configured).
+
+Usage (from the repo root, Linux):
+    .venv/bin/python agents/benchmarks/host_footprint.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CARD_PATH = "/.well-known/agent-card.json"
+BASE_PORT = 9105
+
+
+def rss_kb(pid: int) -> int:
+    """Resident set size of a process in kB, read from /proc."""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def wait_ready(urls: List[str], timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    pending = list(urls)
+    while pending:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Agents not ready: {pending}")
+        try:
+            if httpx.get(pending[0], timeout=1.0).status_code == 200:
+                pending.pop(0)
+                continue
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+
+
+def start(script: str, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, os.path.join(AGENTS_DIR, script)],
+        cwd=AGENTS_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def warm_up(base_urls: List[str]) -> None:
+    """Build every agent (a no-op for agents already built at import)."""
+    for base_url in base_urls:
+        httpx.get(f"{base_url}/warmup", timeout=120.0).raise_for_status()
+
+
+def measure(setup: List[Tuple[str, Dict[str, str]]], base_urls: List[str]) -> Dict[str, float]:
+    started = time.monotonic()
+    processes = [start(script, env) for script, env in setup]
+    try:
+        wait_ready([f"{base_url}{CARD_PATH}" for base_url in base_urls])
+        cards = time.monotonic() - started
+        warm_up(base_urls)
+        startup = time.monotonic() - started
+        total_rss = sum(rss_kb(p.pid) for p in processes)
+    finally:
+        for p in processes:
+            p.terminate()
+        for p in processes:
+            p.wait()
+    return {"cards_s": cards, "startup_s": startup, "rss_mb": total_rss / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+
+    separate = [
+        ("weather_agent.py", {**env, "WEATHER_PORT": str(BASE_PORT)}),
+        ("activities_agent.py", {**env, "ACTIVITIES_PORT": str(BASE_PORT + 1)}),
+        ("weekend_planner_agent.py", {**env, "WEEKEND_PLANNER_PORT": str(BASE_PORT + 2)}),
+    ]
+    separate_urls = [f"http://localhost:{BASE_PORT + i}" for i in range(3)]
+
+    host_port = BASE_PORT + 3
+    hosted = [("agent_host.py", {**env, "AGENT_HOST_PORT": str(host_port)})]
+    hosted_urls = [
+        f"http://localhost:{host_port}/{prefix}"
+        for prefix in ("weather", "activities", "weekend-planner")
+    ]
+
+    results = {}
+    for name, setup, urls in (
+        ("three_processes", separate, separate_urls),
+        ("single_host", hosted, hosted_urls),
+    ):
+        runs = [measure(setup, urls) for _ in range(args.runs)]
+        results[name] = {
+            "cards_s_median": round(statistics.median(r["cards_s"] for r in runs), 3),
+            "startup_s_median": round(statistics.median(r["startup_s"] for r in runs), 3),
+            "rss_mb_median": round(statistics.median(r["rss_mb"] for r in runs), 1),
+            "runs": args.runs,
+        }
+
+    results["rss_saved_mb"] = round(
+        results["three_processes"]["rss_mb_median"] - results["single_host"]["rss_mb_median"], 1
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
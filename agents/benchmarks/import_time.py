@@ -0,0 +1,112 @@
+"""
+Benchmark: cold-start import cost of the agent entry points
+
+Imports each agent module (the ASGI entry points Vercel loads) in a fresh
+interpreter with `python -X importtime`, once with AGENT_STARTUP=lazy and
+once with AGENT_STARTUP=eager, and reports:
+- total import time and the heaviest top-level packages
+- whether google.adk was loaded by the import
+- whether it was loaded by serving the agent card afterwards
+
+No model calls are made, so no API quota is used (a placeholder
+GOOGLE_API_KEY is set if none is configured).
+
+Usage (from the repo root):
+    .venv/bin/python agents/benchmarks/import_time.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["weather_agent", "activities_agent", "weekend_planner_agent", "trip_agent"]
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Runs in the child: import, then fetch the agent card in process
+PROBE = """
+import asyncio, json, sys
+import httpx
+import {module} as agent_module
+loaded_on_import = "google.adk" in sys.modules
+
+async def card():
+    transport = httpx.ASGITransport(app=agent_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://agent") as client:
+        return (await client.get("/.well-known/agent-card.json")).status_code
+
+status = asyncio.run(card())
+print(json.dumps({{
+    "adk_on_import": loaded_on_import,
+    "card_status": status,
+    "adk_after_card": "google.adk" in sys.modules,
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> Tuple[int, Dict[str, int]]:
+    """Total microseconds, and self microseconds summed per top-level package."""
+    total = 0
+    packages: Dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        packages[_package(match.group(4))] += int(match.group(1))
+        if len(match.group(3)) == 1:
+            # Imported directly by the probe: cumulative covers its subtree
+            total += int(match.group(2))
+    return total, packages
+
+
+def _package(module: str) -> str:
+    """Top-level package, keeping google.* namespaces apart (google.adk, google.genai...)."""
+    parts = module.split(".")
+    return ".".join(parts[:2]) if parts[0] == "google" and len(parts) > 1 else parts[0]
+
+
+def measure(module: str, startup: str) -> dict:
+    env = dict(os.environ, AGENT_STARTUP=startup, PYTHONPATH=AGENTS_DIR)
+    env.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=AGENTS_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    total_us, packages = parse_importtime(proc.stderr)
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {"total_us": total_us, "packages": packages, **probe}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per module and mode")
+    parser.add_argument("--top", type=int, default=5, help="heaviest packages to list")
+    args = parser.parse_args()
+
+    results: List[dict] = []
+    for module in MODULES:
+        for startup in ("lazy", "eager"):
+            runs = [measure(module, startup) for _ in range(args.runs)]
+            median = sorted(runs, key=lambda r: r["total_us"])[len(runs) // 2]
+            heaviest = sorted(median["packages"].items(), key=lambda kv: -kv[1])[: args.top]
+            results.append({
+                "module": module,
+                "startup": startup,
+                "import_ms": round(statistics.median(r["total_us"] for r in runs) / 1000, 1),
+                "heaviest_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+                "adk_on_import": median["adk_on_import"],
+                "card_status": median["card_status"],
+                "adk_after_card": median["adk_after_card"],
+            })
+
+    print(json.dumps({"python": sys.version.split()[0], "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Benchmark: offline load test of the A2A agents
+
+Drives the weather, activities and weekend planner agents (and optionally
+the trip agent) through their real A2AStarletteApplication via an
+in-process ASGI client, with every LlmAgent backed by FakeGemini
+(benchmarks/fake_gemini.py), so no API quota is used.
+
+For each agent it reports, as JSON that can be diffed between releases:
+- requests, errors, wall time and requests per second
+- end-to-end latency p50/p95/p99/max (and time to first event when
+  streaming)
+- per-stage breakdown: time inside the (fake) model per LlmAgent and the
+  remaining non-model time spent in A2A, validation and scheduling
+- model calls and tokens per request, and the output-repair counters
+
+Usage (from the repo root):
+    .venv/bin/python agents/benchmarks/load_test.py \\
+        [--requests 200] [--concurrency 16] [--latency lognormal:800,0.4] \\
+        [--clipped-rate 0.05] [--truncated-rate 0.05] [--prose-rate 0.02] [--error-rate 0.05] [--stream] \\
+        [--agents weather activities weekend_planner] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+os.environ.setdefault("TASK_STORE", "memory")
+
+import httpx
+
+import activities_agent
+import trip_agent
+import weather_agent
+import weekend_planner_agent
+from fake_gemini import (
+    LatencyModel,
+    activities_response,
+    call_log,
+    install_fake_gemini,
+    weather_response,
+)
+from json_repair import RepairStats
+from token_usage import UsageLedger
+
+CITIES = ["Tokyo", "Paris", "Lisbon", "Seattle", "Cape Town", "Oslo", "Lima", "Hanoi"]
+
+
+def request_dates(index: int) -> List[str]:
+    day = 1 + index % 27
+    return [f"2025-11-{day:02d}", f"2025-11-{day + 1:02d}"]
+
+
+def weather_payload(index: int) -> dict:
+    return {"city": f"{CITIES[index % len(CITIES)]} {index}", "dates": request_dates(index)}
+
+
+def activities_payload(index: int) -> dict:
+    dates = request_dates(index)
+    return {
+        "destination": CITIES[index % len(CITIES)],
+        "dates": dates,
+        "weather_forecast": weather_response(f"following dates: {', '.join(dates)}"),
+        "interests": ["culture", "food"],
+        "budget": "medium",
+        "group_size": 2,
+    }
+
+
+def planner_payload(index: int) -> dict:
+    dates = request_dates(index)
+    return {
+        "destination": CITIES[index % len(CITIES)],
+        "dates": dates,
+        "weather_forecast": weather_response(f"following dates: {', '.join(dates)}"),
+        "activities_list": activities_response(""),
+    }
+
+
+def trip_payload(index: int) -> dict:
+    return {
+        "destination": f"{CITIES[index % len(CITIES)]} {index}",
+        "dates": request_dates(index),
+        "interests": ["outdoor", "food"],
+    }
+
+
+# name -> (module, payload builder)
+TARGETS: Dict[str, Tuple[Any, Callable[[int], dict]]] = {
+    "weather": (weather_agent, weather_payload),
+    "activities": (activities_agent, activities_payload),
+    "weekend_planner": (weekend_planner_agent, planner_payload),
+    "trip": (trip_agent, trip_payload),
+}
+
+
+def structured_agents(name: str) -> List[Any]:
+    """The StructuredAgents behind a target (the trip agent reuses the others)."""
+    if name == "trip":
+        return [structured_agents(stage)[0] for stage in ("weather", "activities", "weekend_planner")] + [
+            weekend_planner_agent.request_handler.agent_executor.agent._writer
+        ]
+    agent = TARGETS[name][0].request_handler.agent_executor.agent
+    return [agent] + ([agent._writer] if name == "weekend_planner" else [])
+
+
+def reset_state(agents: List[Any]) -> None:
+    """Clear caches, repair counters and token usage so every run starts cold."""
+    for agent in agents:
+        agent.repair = RepairStats()
+        agent.usage = UsageLedger(agent.usage.agent)
+        for cache in ("_cache", "_day_cache"):
+            if hasattr(agent, cache):
+                getattr(agent, cache).clear()
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(p * len(ordered) + 0.5)) - 1))]
+
+    return {
+        "p50": round(rank(0.50), 1),
+        "p95": round(rank(0.95), 1),
+        "p99": round(rank(0.99), 1),
+        "max": round(ordered[-1], 1),
+        "mean": round(statistics.fmean(ordered), 1),
+    }
+
+
+def rpc_body(payload: dict, stream: bool) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": str(uuid.uuid4()),
+        "method": "message/stream" if stream else "message/send",
+        "params": {
+            "message": {
+                "role": "user",
+                "messageId": str(uuid.uuid4()),
+                "parts": [{"kind": "text", "text": json.dumps(payload)}],
+            }
+        },
+    }
+
+
+def final_text(result: dict) -> Optional[str]:
+    """Final response text of a message/send result or the last stream event."""
+    if result.get("kind") == "message":
+        parts = result.get("parts") or []
+    else:
+        message = (result.get("status") or {}).get("message") or {}
+        parts = message.get("parts") or []
+    texts = [part.get("text") for part in parts if part.get("kind") == "text"]
+    return texts[-1] if texts else None
+
+
+def is_error(rpc: dict) -> bool:
+    if "error" in rpc:
+        return True
+    text = final_text(rpc.get("result") or {})
+    if text is None:
+        return True
+    try:
+        return "error" in json.loads(text)
+    except json.JSONDecodeError:
+        return True
+
+
+async def send(client: httpx.AsyncClient, payload: dict, stream: bool) -> Tuple[bool, Optional[float]]:
+    """Send one request; returns (ok, seconds to first stream event)."""
+    if not stream:
+        response = await client.post("/", json=rpc_body(payload, stream=False))
+        return not is_error(response.json()), None
+
+    started = time.perf_counter()
+    first_event = None
+    last: dict = {"error": "no events"}
+    async with client.stream("POST", "/", json=rpc_body(payload, stream=True)) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            if first_event is None:
+                first_event = time.perf_counter() - started
+            last = json.loads(line[5:])
+    return not is_error(last), first_event
+
+
+async def run_target(name: str, args: argparse.Namespace, latency: LatencyModel) -> dict:
+    module, build_payload = TARGETS[name]
+    agents = structured_agents(name)
+    # The planner reports its writer's LlmAgent too, so dedupe
+    llm_agents = list({id(llm): llm for agent in agents for llm in agent.llm_agents()}.values())
+    install_fake_gemini(
+        llm_agents, latency, args.seed, args.truncated_rate, args.prose_rate, args.error_rate,
+        args.clipped_rate,
+    )
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    samples: List[dict] = []
+
+    async def one(index: int, client: httpx.AsyncClient, record: bool = True) -> None:
+        async with semaphore:
+            calls: List[tuple] = []
+            token = call_log.set(calls)
+            started = time.perf_counter()
+            try:
+                ok, first_event = await send(client, build_payload(index), args.stream)
+            except Exception as e:
+                print(f"request {index} failed: {e!r}", file=sys.stderr)
+                ok, first_event = False, None
+            finally:
+                call_log.reset(token)
+            total_ms = (time.perf_counter() - started) * 1000
+            model_ms = sum(seconds for _, seconds in calls) * 1000
+            if not record:
+                return
+            samples.append({
+                "ok": ok,
+                "total_ms": total_ms,
+                "first_event_ms": first_event * 1000 if first_event is not None else None,
+                "model_ms": model_ms,
+                "calls": calls,
+            })
+
+    transport = httpx.ASGITransport(app=module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://agent", timeout=None) as client:
+        # Unrecorded warmup: the first runs pay one-off import and setup costs
+        for index in range(args.warmup):
+            await one(args.requests + index, client, record=False)
+        reset_state(agents)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i, client) for i in range(args.requests)))
+        wall = time.perf_counter() - started
+
+    by_agent: Dict[str, List[float]] = defaultdict(list)
+    for sample in samples:
+        for agent_name, seconds in sample["calls"]:
+            by_agent[agent_name].append(seconds * 1000)
+
+    errors = sum(1 for s in samples if not s["ok"])
+    report = {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4),
+        "wall_s": round(wall, 2),
+        "rps": round(len(samples) / wall, 1),
+        "latency_ms": percentiles([s["total_ms"] for s in samples]),
+        "stages_ms": {
+            "model": percentiles([s["model_ms"] for s in samples]),
+            # Everything else: A2A/JSON-RPC, task events, validation, repair, scheduling
+            "non_model": percentiles([s["total_ms"] - s["model_ms"] for s in samples]),
+            "model_by_agent": {
+                agent_name: {"calls": len(values), **percentiles(values)}
+                for agent_name, values in sorted(by_agent.items())
+            },
+        },
+        "model_calls_per_request": round(
+            sum(len(s["calls"]) for s in samples) / len(samples), 2
+        ),
+        "tokens_per_request": {
+            agent.result_label: round(agent.usage.totals.total_tokens / len(samples), 1)
+            for agent in agents
+        },
+        "repair": {agent.result_label: agent.repair_stats() for agent in agents},
+    }
+    if args.stream:
+        report["first_event_ms"] = percentiles(
+            [s["first_event_ms"] for s in samples if s["first_event_ms"] is not None]
+        )
+    return report
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200, help="requests per agent")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--latency", default="lognormal:800,0.4", help="fake model latency (see LatencyModel)")
+    parser.add_argument("--clipped-rate", type=float, default=0.0, help="share of responses missing their closing brackets")
+    parser.add_argument("--truncated-rate", type=float, default=0.0, help="share of responses cut off mid-reply")
+    parser.add_argument("--prose-rate", type=float, default=0.0, help="share of non-JSON responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of model calls failing with a 503")
+    parser.add_argument("--stream", action="store_true", help="use message/stream with A2A_STREAMING=true")
+    parser.add_argument("--warmup", type=int, default=3, help="unrecorded requests per agent first")
+    parser.add_argument("--seed", type=int, default=0, help="seed for latency and invalid responses")
+    parser.add_argument(
+        "--agents", nargs="+", choices=list(TARGETS),
+        default=["weather", "activities", "weekend_planner"], help="agents to load-test",
+    )
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="keep the agents' log output")
+    args = parser.parse_args()
+
+    os.environ["A2A_STREAMING"] = "true" if args.stream else "false"
+    latency = LatencyModel.parse(args.latency)
+
+    results = {}
+    for name in args.agents:
+        logs = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with logs:
+            results[name] = await run_target(name, args, latency)
+
+    report = {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+            "clipped_rate": args.clipped_rate,
+            "truncated_rate": args.truncated_rate,
+            "prose_rate": args.prose_rate,
+            "error_rate": args.error_rate,
+            "stream": args.stream,
+            "seed": args.seed,
+            "warmup": args.warmup,
+        },
+        "agents": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Benchmark: input-token savings from prompt compaction
+
+Builds activities and weekend planner prompts for sample requests of
+increasing size, once with the original indented JSON payloads and once
+with the compact tables from prompt_compaction.py, and reports the input
+size of each.
+
+Token counts are estimated offline (~4 characters per token) by default.
+With --exact and GOOGLE_API_KEY set, they are counted with the Gemini
+count_tokens API instead (uses no generation quota).
+
+Usage (from the repo root):
+    .venv/bin/python agents/benchmarks/prompt_tokens.py [--exact]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+
+from activities_agent import ActivitiesRequest, build_activities_query
+from weekend_planner_agent import WeekendPlannerRequest, build_planner_query
+
+CONDITIONS = ["Sunny", "Partly Cloudy", "Light Rain", "Cloudy", "Thunderstorms"]
+SETTINGS = ["outdoor", "indoor", "both"]
+TIMES = ["Morning", "Afternoon", "Evening"]
+
+
+def sample_forecast(days: int) -> dict:
+    return {
+        "destination": "Tokyo, Japan",
+        "forecast": [
+            {
+                "day": i + 1,
+                "date": f"Oct {20 + i}",
+                "condition": CONDITIONS[i % len(CONDITIONS)],
+                "highTemp": 68 + i,
+                "lowTemp": 54 + i,
+                "precipitation": (i * 23) % 90,
+                "humidity": 60 + i,
+                "windSpeed": 6 + i,
+                "description": "Mild temperatures with a light breeze, comfortable for walking around the city",
+            }
+            for i in range(days)
+        ],
+        "travelAdvice": "Pack light layers, an umbrella and comfortable walking shoes. Evenings can be cool.",
+        "bestDays": [1, 2],
+    }
+
+
+def sample_activities(count: int) -> dict:
+    return {
+        "destination": "Tokyo, Japan",
+        "activities": [
+            {
+                "name": f"Activity {i + 1}",
+                "category": "Cultural",
+                "description": "A guided visit through one of the city's best known neighbourhoods with local food stops",
+                "duration_minutes": 60 + 30 * (i % 4),
+                "estimated_cost": 15 * (i % 5),
+                "weather_appropriate": i % 3 != 0,
+                "indoor_outdoor": SETTINGS[i % len(SETTINGS)],
+                "best_time": TIMES[i % len(TIMES)],
+                "location": f"District {i % 4 + 1}",
+            }
+            for i in range(count)
+        ],
+        "weather_summary": "Mostly mild with rain expected mid-week",
+        "planning_tips": ["Start early on sunny days", "Keep indoor options for rainy afternoons"],
+    }
+
+
+def make_counter(exact: bool):
+    if not exact:
+        return lambda text: len(text) // 4
+
+    from google import genai
+
+    client = genai.Client()
+    model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    return lambda text: client.models.count_tokens(model=model, contents=text).total_tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--exact", action="store_true", help="count tokens with the Gemini API")
+    args = parser.parse_args()
+    count_tokens = make_counter(args.exact)
+
+    results = []
+    for days, activity_count in ((2, 5), (3, 8), (5, 12)):
+        forecast = sample_forecast(days)
+        activities = sample_activities(activity_count)
+        dates = [f"2025-10-{20 + i}" for i in range(days)]
+
+        builders = {
+            "activities": lambda: build_activities_query(ActivitiesRequest(
+                destination="Tokyo", dates=dates, weather_forecast=forecast,
+                interests=["culture", "food"], budget="medium", group_size=2,
+            )),
+            "weekend_planner": lambda: build_planner_query(WeekendPlannerRequest(
+                destination="Tokyo", dates=dates, weather_forecast=forecast,
+                activities_list=activities,
+            )),
+        }
+
+        for agent, build in builders.items():
+            os.environ["PROMPT_COMPACTION"] = "false"
+            original = count_tokens(build())
+            os.environ["PROMPT_COMPACTION"] = "true"
+            compacted = count_tokens(build())
+            results.append({
+                "agent": agent,
+                "days": days,
+                "activities": activity_count,
+                "tokens_original": original,
+                "tokens_compacted": compacted,
+                "saved_pct": round(100 * (original - compacted) / original, 1),
+            })
+
+    print(json.dumps({"exact": args.exact, "requests": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
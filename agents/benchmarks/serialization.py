@@ -0,0 +1,111 @@
+"""
+Benchmark: response decode/encode paths
+
+Compares, for StructuredWeekendPlan payloads of increasing size:
+- legacy: json.loads -> Model(**data) -> model_dump() -> json.dumps(indent=2)
+- current: model_validate_json -> model_dump_json() (serialization.py)
+
+and reports the time per decode, per encode and for the round trip, plus
+the size of the encoded response. Runs offline; no model calls are made.
+
+Usage (from the repo root):
+    .venv/bin/python agents/benchmarks/serialization.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+os.environ["PRETTY_JSON"] = "false"
+
+from serialization import decode_model, encode_model
+from weekend_planner_agent import StructuredWeekendPlan
+
+
+def sample_plan(days: int, activities_per_day: int) -> str:
+    plan = {
+        "destination": "Tokyo, Japan",
+        "dates": [f"Day {d + 1}, Oct {20 + d}" for d in range(days)],
+        "day_by_day": [
+            {
+                "date": f"Day {d + 1}, Oct {20 + d}",
+                "weather_summary": "Partly cloudy, 72°F high, 58°F low, 20% chance of rain",
+                "schedule": [
+                    {
+                        "time": f"{9 + a}:00 AM - {10 + a}:30 AM",
+                        "activity_name": f"Activity {d}-{a}",
+                        "location": f"District {a % 5 + 1}, Tokyo",
+                        "duration_minutes": 90,
+                        "notes": "Arrive early to avoid the queues; bring cash for the small food stalls nearby",
+                    }
+                    for a in range(activities_per_day)
+                ],
+                "meal_suggestions": ["Breakfast near the hotel", "Ramen for lunch", "Izakaya dinner"],
+                "backup_plan": "If it rains, switch to the covered markets and the national museum",
+            }
+            for d in range(days)
+        ],
+        "total_estimated_cost": 420,
+        "packing_essentials": ["Umbrella", "Comfortable shoes", "Portable charger", "Cash"],
+        "general_tips": ["Get a transit card", "Most museums close on Mondays"],
+        "emergency_contacts": "Police: 110, Ambulance/Fire: 119",
+    }
+    return json.dumps(plan)
+
+
+def legacy_decode(text: str) -> StructuredWeekendPlan:
+    return StructuredWeekendPlan(**json.loads(text))
+
+
+def legacy_encode(plan: StructuredWeekendPlan) -> str:
+    return json.dumps(plan.model_dump(), indent=2)
+
+
+def per_call_us(func, arg, repeat: int) -> float:
+    timer = timeit.Timer(lambda: func(arg))
+    number, _ = timer.autorange()
+    return round(min(timer.repeat(repeat=repeat, number=number)) / number * 1e6, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions (best is kept)")
+    args = parser.parse_args()
+
+    results = []
+    for days, per_day in ((2, 5), (7, 10), (14, 25)):
+        text = sample_plan(days, per_day)
+        plan = decode_model(text, StructuredWeekendPlan)
+        assert legacy_decode(text) == plan
+
+        legacy = {
+            "decode_us": per_call_us(legacy_decode, text, args.repeat),
+            "encode_us": per_call_us(legacy_encode, plan, args.repeat),
+            "response_bytes": len(legacy_encode(plan).encode()),
+        }
+        current = {
+            "decode_us": per_call_us(lambda t: decode_model(t, StructuredWeekendPlan), text, args.repeat),
+            "encode_us": per_call_us(encode_model, plan, args.repeat),
+            "response_bytes": len(encode_model(plan).encode()),
+        }
+        for mode in (legacy, current):
+            mode["round_trip_us"] = round(mode["decode_us"] + mode["encode_us"], 1)
+
+        results.append({
+            "days": days,
+            "activities_per_day": per_day,
+            "input_bytes": len(text.encode()),
+            "legacy": legacy,
+            "current": current,
+            "speedup": round(legacy["round_trip_us"] / current["round_trip_us"], 1),
+        })
+
+    print(json.dumps({"payloads": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
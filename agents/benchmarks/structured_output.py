@@ -0,0 +1,133 @@
+"""
+Benchmark: prose-prompted JSON vs Gemini native structured output
+
+Runs the weather, activities and weekend planner agents on sample requests
+in both output modes:
+- prompt: the instruction asks for JSON, fences are stripped and the text
+  is validated afterwards (the default)
+- schema: the Pydantic output model is sent as response_schema with
+  application/json (GEMINI_RESPONSE_SCHEMA=true)
+
+and reports, per agent and mode, the wall time per call and two failure
+rates:
+- raw_failure_rate: responses that failed parsing or validation as
+  generated, before any repair
+- failure_rate: calls that still failed after local repair and the
+  follow-up re-ask (STRUCTURED_REASK)
+
+This makes real model calls: it needs GOOGLE_API_KEY and uses quota
+(runs x 2 modes x agents generations).
+
+Usage (from the repo root):
+    .venv/bin/python agents/benchmarks/structured_output.py [--runs 10] [--concurrency 2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Checked before importing prompt_tokens, which sets a placeholder key
+HAS_API_KEY = bool(os.getenv("GOOGLE_API_KEY"))
+
+from activities_agent import ActivitiesAgent, ActivitiesRequest, build_activities_query
+from prompt_tokens import sample_activities, sample_forecast
+from structured_agent import StructuredAgent
+from weather_agent import WeatherAgent, build_forecast_query
+from weekend_planner_agent import WeekendPlannerAgent, WeekendPlannerRequest, build_planner_query
+
+DATES = ["2025-10-20", "2025-10-21"]
+
+AGENTS: Dict[str, Callable[[bool], StructuredAgent]] = {
+    "weather": WeatherAgent,
+    "activities": ActivitiesAgent,
+    "weekend_planner": WeekendPlannerAgent,
+}
+
+
+def sample_query(agent: str) -> str:
+    if agent == "weather":
+        return build_forecast_query("Tokyo", DATES)
+    forecast = sample_forecast(len(DATES))
+    if agent == "activities":
+        return build_activities_query(ActivitiesRequest(
+            destination="Tokyo", dates=DATES, weather_forecast=forecast,
+            interests=["culture", "food"], budget="medium", group_size=2,
+        ))
+    return build_planner_query(WeekendPlannerRequest(
+        destination="Tokyo", dates=DATES, weather_forecast=forecast,
+        activities_list=sample_activities(6),
+    ))
+
+
+async def run_mode(agent_name: str, response_schema: bool, runs: int, concurrency: int) -> dict:
+    agent = AGENTS[agent_name](response_schema)
+    query = sample_query(agent_name)
+    semaphore = asyncio.Semaphore(concurrency)
+    durations: List[float] = []
+    failures = 0
+
+    async def one() -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            # A fresh session per call so earlier turns do not influence the output
+            validated, _ = await agent.generate(query, f"bench-{uuid.uuid4().hex}")
+            durations.append(time.perf_counter() - started)
+            if validated is None:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(runs)))
+    elapsed = time.perf_counter() - started
+
+    durations.sort()
+    stats = agent.repair
+    raw_failures = stats.responses - stats.valid
+    return {
+        "agent": agent_name,
+        "mode": "schema" if response_schema else "prompt",
+        "runs": runs,
+        "raw_failures": raw_failures,
+        "raw_failure_rate": round(raw_failures / stats.responses, 3) if stats.responses else None,
+        "repaired_locally": stats.repaired_locally,
+        "repaired_by_reask": stats.repaired_by_reask,
+        "failures": failures,
+        "failure_rate": round(failures / runs, 3),
+        "median_s": round(statistics.median(durations), 2),
+        "p95_s": round(durations[max(0, int(len(durations) * 0.95) - 1)], 2),
+        "wall_s": round(elapsed, 2),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10, help="calls per agent and mode")
+    parser.add_argument("--concurrency", type=int, default=2, help="concurrent calls")
+    parser.add_argument(
+        "--agents", nargs="+", choices=sorted(AGENTS), default=list(AGENTS),
+        help="agents to benchmark",
+    )
+    args = parser.parse_args()
+    if not HAS_API_KEY:
+        sys.exit("GOOGLE_API_KEY is required (this benchmark calls Gemini)")
+
+    results = []
+    for agent_name in args.agents:
+        for response_schema in (False, True):
+            results.append(await run_mode(agent_name, response_schema, args.runs, args.concurrency))
+
+    print(json.dumps({
+        "model": os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
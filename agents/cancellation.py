@@ -0,0 +1,93 @@
+"""
+A2A task cancellation
+
+Makes `tasks/cancel` abort the work behind a task instead of failing with
+"cancel not supported". Each executor tracks the asyncio task running its
+`execute` per A2A task id, from before it waits for admission; cancelling
+it raises CancelledError in the admission queue or inside the model call,
+which closes the ADK run (see StructuredAgent._run), frees the executor's
+queue entry or in-flight slot and publishes a `canceled` status that
+reaches both the original `message/stream` client and the `tasks/cancel`
+caller.
+
+Only streaming executions can be cancelled: without A2A_STREAMING the
+reply is a plain message and no task is stored for `tasks/cancel` to find.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.utils import new_task
+
+from metrics import Counter
+from task_stream import streaming_enabled
+
+CANCELLATIONS = Counter(
+    "a2a_agent_cancellations_total", "Executions aborted by tasks/cancel.", ["agent"]
+)
+
+# Seconds `cancel()` waits for the aborted execution to unwind
+CANCEL_WAIT_SECONDS = 5.0
+
+
+class RunningExecutions:
+    """
+    The asyncio tasks running an executor's `execute`, by A2A task id.
+
+    Attributes:
+        agent: Agent name used in logs and metrics
+    """
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    @asynccontextmanager
+    async def track(self, context: RequestContext, event_queue: EventQueue) -> AsyncIterator[None]:
+        """
+        Register the current asyncio task for `context.task_id`.
+
+        In streaming mode the A2A task is created here, in the `submitted`
+        state, so a request still waiting for admission already has a task
+        that `tasks/cancel` can address. If the block is cancelled after the
+        A2A task was created, a final `canceled` status is published before
+        the cancellation propagates.
+        """
+        task_id = context.task_id
+        self._tasks[task_id] = asyncio.current_task()
+        if streaming_enabled() and context.current_task is None:
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+            context.current_task = task
+        try:
+            yield
+        except asyncio.CancelledError:
+            if context.current_task is not None:
+                await TaskUpdater(event_queue, task_id, context.context_id).cancel()
+            print(f"🛑 Cancelled {self.agent} task {task_id}")
+            raise
+        finally:
+            self._tasks.pop(task_id, None)
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        """
+        Abort the execution of `context.task_id` and wait for it to unwind.
+
+        A task with no execution running in this process (e.g. left over
+        from a restart) is marked as canceled directly.
+        """
+        running = self._tasks.get(context.task_id)
+        if running is None or running.done():
+            await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
+            return
+
+        CANCELLATIONS.inc(self.agent)
+        running.cancel()
+        await asyncio.wait({running}, timeout=CANCEL_WAIT_SECONDS)
@@ -0,0 +1,304 @@
+"""
+Circuit breaker and stale fallback
+
+When Gemini degrades, every request would otherwise wait out its full
+deadline (and retries) before failing. A `CircuitBreaker` per agent and
+model watches the outcome of recent model runs and, once too many fail,
+fails new runs at once instead:
+
+- closed: runs go through; once at least CIRCUIT_MIN_CALLS (default 10) of
+  the last CIRCUIT_WINDOW (default 20) runs are recorded and
+  CIRCUIT_FAILURE_RATE (default 0.5) of them failed, the circuit opens.
+  Failures are model errors that were worth retrying and model calls that
+  ran out of time with a budget of at least CIRCUIT_MIN_TIMEOUT_SECONDS
+  (default 5, or the agent's timeout if shorter); deadlines spent before
+  the call (a short client deadline, the admission queue, the rate
+  limiter) are not counted
+- open: runs fail with CircuitOpen for CIRCUIT_OPEN_SECONDS (default 30)
+- half-open: one probe run goes through; success closes the circuit,
+  failure opens it again
+
+`StaleFallback` keeps the last good result per canonical request (up to
+STALE_RESULT_MAX_AGE_SECONDS, default 6 hours) and serves it when the
+model cannot answer; executors report such results in the task metadata
+as `stale` (see collect_stale). Disable the breaker with
+CIRCUIT_BREAKER=false.
+"""
+
+import contextvars
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from deadlines import DeadlineExceeded, agent_timeout_seconds
+from metrics import Counter, Gauge
+from response_cache import ResponseCache
+from retry import ModelError
+
+CIRCUIT_STATE = Gauge(
+    "a2a_circuit_state", "Circuit state (0 closed, 1 half-open, 2 open).", ["agent", "model"]
+)
+CIRCUIT_REJECTIONS = Counter(
+    "a2a_circuit_rejections_total", "Model runs failed fast by an open circuit.", ["agent", "model"]
+)
+STALE_RESULTS = Counter(
+    "a2a_agent_stale_results_total", "Requests answered with a stale result.", ["agent"]
+)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def circuit_breaker_enabled() -> bool:
+    return os.getenv("CIRCUIT_BREAKER", "true").lower() not in ("0", "false", "no")
+
+
+class CircuitOpen(Exception):
+    """The model backend is failing; the run was not attempted."""
+
+    def __init__(self, agent: str, retry_after_seconds: float):
+        self.agent = agent
+        self.retry_after_seconds = max(1, round(retry_after_seconds))
+        super().__init__(f"{agent} model backend is unavailable (circuit open)")
+
+    def payload(self) -> dict:
+        """Error payload returned to the A2A client."""
+        return {
+            "error": "CircuitOpen",
+            "message": str(self),
+            "retry_after_seconds": self.retry_after_seconds,
+            "retryable": True,
+        }
+
+
+def is_model_timeout(agent: str, budget_seconds: float) -> bool:
+    """
+    Whether a model run that timed out with `budget_seconds` says the model
+    is slow, rather than that the client's deadline was too short.
+    """
+    floor = float(os.getenv("CIRCUIT_MIN_TIMEOUT_SECONDS", 5))
+    return budget_seconds >= min(floor, agent_timeout_seconds(agent))
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Whether an error says the model backend is unhealthy (not that the request was bad)."""
+    if isinstance(error, ModelError):
+        return error.retryable
+    return isinstance(error, DeadlineExceeded) and error.model_timeout
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for one agent's calls to one model.
+
+    Attributes:
+        agent: Agent name used in logs, metrics and CircuitOpen
+        model: Model name used in logs and metrics
+        window: Recent runs the failure rate is computed over
+        min_calls: Runs recorded before the circuit may open
+        failure_rate: Share of failed runs that opens the circuit
+        open_seconds: Time the circuit stays open before probing
+        state: closed, half_open or open
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        model: str,
+        window: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        failure_rate: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.agent = agent
+        self.model = model
+        self.window = int(os.getenv("CIRCUIT_WINDOW", 20)) if window is None else window
+        self.min_calls = int(os.getenv("CIRCUIT_MIN_CALLS", 10)) if min_calls is None else min_calls
+        self.failure_rate = (
+            float(os.getenv("CIRCUIT_FAILURE_RATE", 0.5)) if failure_rate is None else failure_rate
+        )
+        self.open_seconds = (
+            float(os.getenv("CIRCUIT_OPEN_SECONDS", 30)) if open_seconds is None else open_seconds
+        )
+        self._clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=self.window)
+        self._opened_at = 0.0
+        self._probing = False
+        self.state = CLOSED
+        CIRCUIT_STATE.set(agent, model, value=STATE_VALUES[CLOSED])
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Run the block as one model run, recording whether the backend failed it.
+
+        Raises:
+            CircuitOpen: The circuit is open (or already probing)
+        """
+        if not circuit_breaker_enabled():
+            yield
+            return
+
+        probe = self._admit()
+        try:
+            yield
+        except Exception as e:
+            if is_backend_failure(e):
+                self._record(failed=True, probe=probe)
+            elif isinstance(e, ModelError):
+                # The backend answered; the request itself was rejected
+                self._record(failed=False, probe=probe)
+            elif probe:
+                self._probing = False
+            raise
+        except BaseException:
+            if probe:
+                self._probing = False
+            raise
+        self._record(failed=False, probe=probe)
+
+    def _admit(self) -> bool:
+        """Let a run through (True if it is the half-open probe) or raise CircuitOpen."""
+        if self.state == OPEN:
+            waited = self._clock() - self._opened_at
+            if waited < self.open_seconds:
+                self._reject(self.open_seconds - waited)
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probing:
+                self._reject(1)
+            self._probing = True
+            return True
+        return False
+
+    def _reject(self, retry_after: float) -> None:
+        CIRCUIT_REJECTIONS.inc(self.agent, self.model)
+        raise CircuitOpen(self.agent, retry_after)
+
+    def _record(self, failed: bool, probe: bool) -> None:
+        if probe:
+            self._probing = False
+            self._outcomes.clear()
+            if failed:
+                self._open()
+            else:
+                print(f"🟢 Circuit for {self.agent}/{self.model} closed after a successful probe")
+                self._set_state(CLOSED)
+            return
+
+        if self.state != CLOSED:
+            # A run admitted before the circuit opened
+            return
+        self._outcomes.append(failed)
+        failures = sum(self._outcomes)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.failure_rate
+        ):
+            self._outcomes.clear()
+            self._open()
+
+    def _open(self) -> None:
+        self._opened_at = self._clock()
+        print(f"🔴 Circuit for {self.agent}/{self.model} opened for {self.open_seconds:g}s")
+        self._set_state(OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_STATE.set(self.agent, self.model, value=STATE_VALUES[state])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "recent_runs": len(self._outcomes),
+            "recent_failures": sum(self._outcomes),
+        }
+
+
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+
+def circuit_breaker(agent: str, model: str) -> CircuitBreaker:
+    """The process-wide breaker for `agent` calling `model`."""
+    breaker = _breakers.get((agent, model))
+    if breaker is None:
+        breaker = _breakers[(agent, model)] = CircuitBreaker(agent, model)
+    return breaker
+
+
+# Stale results served for the A2A request being executed (see collect_stale)
+_stale: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "stale_results", default=None
+)
+
+
+class StaleResults(list):
+    """Stale results served while handling one request."""
+
+    def metadata(self) -> Dict[str, Any]:
+        """Task metadata marking the result as stale (empty if it is fresh)."""
+        return {"stale": True, "stale_results": list(self)} if self else {}
+
+
+@contextmanager
+def collect_stale() -> Iterator[StaleResults]:
+    """Record the stale results served inside the block."""
+    stale = StaleResults()
+    token = _stale.set(stale)
+    try:
+        yield stale
+    finally:
+        _stale.reset(token)
+
+
+class StaleFallback:
+    """
+    The last good result per canonical request, for when the model cannot answer.
+
+    Attributes:
+        agent: Agent name used in logs, metrics and stale markers
+    """
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self._results = ResponseCache(
+            max_entries=int(os.getenv("STALE_RESULT_MAX_ENTRIES", 1024)),
+            ttl_seconds=float(os.getenv("STALE_RESULT_MAX_AGE_SECONDS", 21600)),
+        )
+
+    async def serve(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        is_good: Callable[[Any], bool] = lambda result: True,
+    ) -> Any:
+        """
+        Return `await fn()` and remember it if good; if the model backend
+        fails instead, return the last good result for `key` (if any).
+        """
+        try:
+            result = await fn()
+        except (CircuitOpen, ModelError, DeadlineExceeded) as e:
+            if not (isinstance(e, CircuitOpen) or is_backend_failure(e)):
+                raise
+            entry = self._results.get(key)
+            if entry is None:
+                raise
+            stored_at, result = entry
+            age = time.time() - stored_at
+            STALE_RESULTS.inc(self.agent)
+            print(f"🥖 Serving {self.agent} result from {age / 60:.0f} min ago ({type(e).__name__})")
+            stale = _stale.get()
+            if stale is not None:
+                stale.append({"agent": self.agent, "age_seconds": round(age), "reason": type(e).__name__})
+            return result
+
+        if is_good(result):
+            self._results.set(key, (time.time(), result))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return self._results.stats()
@@ -0,0 +1,127 @@
+"""
+Deadlines and per-agent timeouts
+
+Bounds how long an A2A request may spend in model calls, so a stuck Gemini
+call returns a structured timeout error instead of pinning the executor
+(and the orchestrator waiting on it).
+
+- Every execution gets a deadline: the agent's timeout
+  (<AGENT>_TIMEOUT_SECONDS, e.g. WEATHER_AGENT_TIMEOUT_SECONDS, else
+  AGENT_TIMEOUT_SECONDS, default 60), shortened by a client deadline from
+  the A2A message metadata: `deadline` (Unix seconds or ISO 8601) or
+  `timeout_ms`
+- The deadline is held in a context variable, so nested calls (re-asks,
+  the trip agent's three stages) share one budget
+- StructuredAgent bounds each Runner.run_async with the remaining budget
+  and passes it to Gemini as the request's HTTP timeout
+"""
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Iterator, Optional, Tuple
+
+from metrics import Counter
+
+TIMEOUTS = Counter(
+    "a2a_agent_timeouts_total", "Requests that ran out of their deadline.", ["agent"]
+)
+
+# (time.monotonic() by which the current request must finish, its budget in seconds)
+_deadline: contextvars.ContextVar[Optional[Tuple[float, float]]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    """
+    The request's time budget ran out before the model answered.
+
+    Attributes:
+        model_timeout: The model call itself ran out of time (as opposed to
+            a budget used up before it started, e.g. by a client deadline)
+    """
+
+    def __init__(self, agent: str, model_timeout: bool = False):
+        current = _deadline.get()
+        self.agent = agent
+        self.model_timeout = model_timeout
+        self.budget_seconds = current[1] if current else None
+        super().__init__(f"{agent} did not answer within the request deadline")
+
+    def payload(self) -> dict:
+        """Error payload returned to the A2A client."""
+        return {
+            "error": "Timeout",
+            "message": str(self),
+            "timeout_seconds": round(self.budget_seconds, 3) if self.budget_seconds else None,
+            "retryable": True,
+        }
+
+
+def agent_timeout_seconds(agent: str) -> float:
+    return float(os.getenv(f"{agent.upper()}_TIMEOUT_SECONDS", os.getenv("AGENT_TIMEOUT_SECONDS", 60)))
+
+
+def client_timeout_seconds(metadata: Optional[dict]) -> Optional[float]:
+    """Seconds left until the deadline a client put in the message metadata."""
+    if not metadata:
+        return None
+    try:
+        if metadata.get("timeout_ms") is not None:
+            return float(metadata["timeout_ms"]) / 1000
+        deadline = metadata.get("deadline")
+        if deadline is None:
+            return None
+        if isinstance(deadline, str) and not deadline.replace(".", "", 1).isdigit():
+            deadline = datetime.fromisoformat(deadline.replace("Z", "+00:00")).timestamp()
+        return float(deadline) - time.time()
+    except (TypeError, ValueError):
+        print(f"⚠️ Ignoring invalid client deadline in metadata: {metadata.get('deadline', metadata.get('timeout_ms'))}")
+        return None
+
+
+def request_timeout_seconds(agent: str, context: Any) -> float:
+    """The execution budget: the agent timeout, or the client's if sooner."""
+    message = getattr(context, "message", None)
+    client = client_timeout_seconds(getattr(message, "metadata", None))
+    timeout = agent_timeout_seconds(agent)
+    return timeout if client is None else max(0.0, min(timeout, client))
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[float]:
+    """Run the block with a deadline `seconds` from now (or the outer one, if sooner)."""
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None and outer[0] < deadline:
+        deadline, seconds = outer
+    token = _deadline.set((deadline, seconds))
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_seconds() -> Optional[float]:
+    """Seconds left in the current deadline (None without one)."""
+    current = _deadline.get()
+    return None if current is None else current[0] - time.monotonic()
+
+
+def apply_deadline(callback_context: Any, llm_request: Any) -> None:
+    """
+    ADK before_model_callback passing the remaining budget to Gemini as
+    the request's HTTP timeout.
+    """
+    from google.genai import types
+
+    remaining = remaining_seconds()
+    if remaining is None:
+        return None
+    if llm_request.config.http_options is None:
+        llm_request.config.http_options = types.HttpOptions()
+    llm_request.config.http_options.timeout = max(1, int(remaining * 1000))
+    return None
@@ -0,0 +1,380 @@
+"""
+Structured output repair
+
+Salvages model output that fails `json.loads` or Pydantic validation
+instead of discarding the whole generation.
+
+Local fixes, tried first:
+- Text before the first `{` or after the top-level object is dropped
+- Single-quoted strings are rewritten with double quotes
+- Trailing commas before `}` / `]` are removed
+- Truncated output is cut back to the last complete value and closed;
+  a list element left incomplete by the cut is dropped and reported in
+  `invalid_paths` (the response is not valid until it is regenerated)
+- Numeric strings in int/float fields ("72°F", "$25", "1,200", "72.5")
+  are coerced to numbers
+
+Whatever is still invalid is described by `RepairResult.invalid_paths`
+(e.g. `forecast[2]`, `travelAdvice`) so the caller can ask the model for
+just those parts and merge them back with `apply_patch`.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from serialization import decode_model
+
+
+NUMBER_ERRORS = {"int_parsing", "int_from_float", "float_parsing", "int_type", "float_type"}
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+PATH_PART = re.compile(r"([^.\[\]]+)|\[(\d+)\]")
+
+
+@dataclass
+class RepairResult:
+    """
+    Outcome of decoding and validating one model response.
+
+    Attributes:
+        model: The validated model, or None if still invalid
+        data: Best-effort decoded JSON (None if the text could not be decoded)
+        repairs: Names of the local fixes that were applied
+        error: Decode or validation error message when `model` is None
+        invalid_paths: Paths still failing validation, at list-item or
+            top-level-field granularity
+    """
+    model: Optional[BaseModel] = None
+    data: Any = None
+    repairs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    invalid_paths: List[str] = field(default_factory=list)
+
+
+@dataclass
+class RepairStats:
+    """Counters of how often responses needed repair and how it went."""
+    responses: int = 0
+    valid: int = 0
+    repaired_locally: int = 0
+    reasks: int = 0
+    repaired_by_reask: int = 0
+    failed: int = 0
+    reask_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        needed = self.repaired_locally + self.repaired_by_reask + self.failed
+        return {
+            "responses": self.responses,
+            "valid": self.valid,
+            "repaired_locally": self.repaired_locally,
+            "reasks": self.reasks,
+            "repaired_by_reask": self.repaired_by_reask,
+            "failed": self.failed,
+            "repair_success_rate": (
+                round((self.repaired_locally + self.repaired_by_reask) / needed, 3)
+                if needed else None
+            ),
+            "avg_reask_ms": (
+                round(1000 * self.reask_seconds / self.reasks, 1) if self.reasks else None
+            ),
+        }
+
+
+def repair_and_validate(text: str, model: Type[BaseModel]) -> RepairResult:
+    """Decode `text` (repairing it if needed) and validate it against `model`."""
+    result = RepairResult()
+    try:
+        # Fast path: valid output is decoded and validated in one pass
+        result.model = decode_model(text, model)
+        return result
+    except ValidationError:
+        pass
+
+    truncated = False
+    try:
+        result.data = json.loads(text)
+    except json.JSONDecodeError as e:
+        repaired, result.repairs, truncated = repair_json_text(text)
+        try:
+            result.data = json.loads(repaired)
+        except json.JSONDecodeError:
+            result.error = str(e)
+            return result
+
+    validate_data(result, model, truncated)
+    return result
+
+
+def decode_json(text: str) -> Any:
+    """`json.loads`, falling back to the syntax repairs; None if undecodable."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        repaired, _, _ = repair_json_text(text)
+        try:
+            return json.loads(repaired)
+        except json.JSONDecodeError:
+            return None
+
+
+def validate_data(result: RepairResult, model: Type[BaseModel], truncated: bool = False) -> None:
+    """Validate `result.data`, applying value-level fixes; updates `result`."""
+    try:
+        result.model = model.model_validate(result.data)
+        return
+    except ValidationError as e:
+        errors = e.errors()
+
+    if _coerce_numbers(result.data, errors):
+        result.repairs.append("numbers")
+    dropped = _drop_incomplete_items(result.data, errors) if truncated else []
+    if dropped:
+        result.repairs.append("incomplete_items")
+
+    try:
+        result.model = model.model_validate(result.data)
+        result.error = None
+        result.invalid_paths = []
+    except ValidationError as e:
+        result.error = str(e)
+        result.invalid_paths = _invalid_paths(e.errors())
+
+    if dropped:
+        # The cut-off items are missing, not repaired: ask for them again
+        result.model = None
+        cut_off = f"List items cut off by truncation: {', '.join(dropped)}"
+        result.error = f"{cut_off}\n{result.error}" if result.error else cut_off
+        result.invalid_paths = dropped + [p for p in result.invalid_paths if p not in dropped]
+
+
+def repair_json_text(text: str) -> Tuple[str, List[str], bool]:
+    """
+    Apply syntax-level fixes to almost-JSON text.
+
+    Returns:
+        Tuple of the repaired text, the names of the fixes applied and
+        whether the text was truncated
+    """
+    repairs: List[str] = []
+    start = text.find("{")
+    if start == -1:
+        return text, repairs, False
+    if text[:start].strip():
+        repairs.append("leading_text")
+
+    out: List[str] = []
+    stack: List[str] = []
+    # (output length, open brackets) after each complete value in a container
+    safe_point: Tuple[int, List[str]] = (0, [])
+    quote: Optional[str] = None
+    escape = False
+    after_colon = False
+    end = len(text)
+
+    for index in range(start, len(text)):
+        ch = text[index]
+
+        if quote is not None:
+            if escape:
+                escape = False
+                if quote == "'" and ch == "'":
+                    out[-1] = "'"  # \' is not a JSON escape
+                    continue
+                out.append(ch)
+            elif ch == "\\":
+                escape = True
+                out.append(ch)
+            elif ch == quote:
+                quote = None
+                out.append('"')
+                if stack and (stack[-1] == "]" or after_colon):
+                    safe_point = (len(out), list(stack))
+            elif ch == '"' and quote == "'":
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+            continue
+
+        if ch in "\"'":
+            if ch == "'" and "single_quotes" not in repairs:
+                repairs.append("single_quotes")
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            after_colon = False
+            out.append(ch)
+            safe_point = (len(out), list(stack))
+        elif ch in "}]":
+            if _strip_trailing_comma(out) and "trailing_commas" not in repairs:
+                repairs.append("trailing_commas")
+            if stack:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                end = index + 1
+                break
+            safe_point = (len(out), list(stack))
+        elif ch == ",":
+            safe_point = (len(out), list(stack))
+            after_colon = False
+            out.append(ch)
+        elif ch == ":":
+            after_colon = True
+            out.append(ch)
+        else:
+            out.append(ch)
+
+    if not stack:
+        if text[end:].strip():
+            repairs.append("trailing_text")
+        return "".join(out), repairs, False
+
+    # Truncated: cut back to the last complete value and close what is open
+    repairs.append("truncated")
+    length, open_brackets = safe_point
+    del out[length:]
+    _strip_trailing_comma(out)
+    out.extend(reversed(open_brackets))
+    return "".join(out), repairs, True
+
+
+def apply_patch(data: Any, patch: Dict[str, Any]) -> int:
+    """
+    Set each `path: value` of `patch` (paths as in `invalid_paths`) in `data`.
+
+    Returns:
+        Number of paths applied
+    """
+    applied = 0
+    for path, value in patch.items():
+        parts = _parse_path(path)
+        if not parts:
+            continue
+        try:
+            _set_path(data, parts, value)
+            applied += 1
+        except (KeyError, IndexError, TypeError):
+            continue
+    return applied
+
+
+def format_error_list(error: str, limit: int = 10) -> str:
+    """First lines of a Pydantic error message, for a follow-up prompt."""
+    lines = [
+        line for line in error.splitlines()
+        if line.strip() and "errors.pydantic.dev" not in line
+    ]
+    return "\n".join(lines[:limit])
+
+
+def _strip_trailing_comma(out: List[str]) -> bool:
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index:]
+        return True
+    return False
+
+
+def _coerce_numbers(data: Any, errors: List[Dict[str, Any]]) -> bool:
+    changed = False
+    for error in errors:
+        if error["type"] not in NUMBER_ERRORS or not isinstance(error.get("input"), (str, float)):
+            continue
+        value = error["input"]
+        if isinstance(value, str):
+            match = NUMBER_PATTERN.search(value.replace(",", ""))
+            if not match:
+                continue
+            value = float(match.group())
+        number = round(value) if error["type"].startswith("int") else value
+        try:
+            _set_path(data, list(error["loc"]), number)
+            changed = True
+        except (KeyError, IndexError, TypeError):
+            continue
+    return changed
+
+
+def _drop_incomplete_items(data: Any, errors: List[Dict[str, Any]]) -> List[str]:
+    """
+    Remove the last element of lists whose last element fails validation.
+
+    Returns:
+        The paths of the removed elements, at `invalid_paths` granularity
+    """
+    targets = set()
+    for error in errors:
+        loc = error["loc"]
+        for depth, part in enumerate(loc):
+            if not isinstance(part, int):
+                continue
+            container = _get_path(data, loc[:depth])
+            if isinstance(container, list) and part == len(container) - 1:
+                targets.add(tuple(loc[:depth]))
+            break
+
+    dropped: List[str] = []
+    # Deepest lists first so earlier removals do not shift later paths
+    for path in sorted(targets, key=len, reverse=True):
+        container = _get_path(data, path)
+        item_path = _invalid_paths([{"loc": path + (len(container) - 1,)}])[0]
+        container.pop()
+        if item_path not in dropped:
+            dropped.append(item_path)
+    return dropped
+
+
+def _invalid_paths(errors: List[Dict[str, Any]]) -> List[str]:
+    paths: List[str] = []
+    for error in errors:
+        loc = error["loc"]
+        if not loc:
+            continue
+        parts = [loc[0]]
+        if len(loc) > 1 and isinstance(loc[1], int):
+            parts.append(loc[1])
+        path = _format_path(parts)
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+def _format_path(parts: List[Any]) -> str:
+    path = ""
+    for part in parts:
+        if isinstance(part, int):
+            path += f"[{part}]"
+        else:
+            path += f".{part}" if path else str(part)
+    return path
+
+
+def _parse_path(path: str) -> List[Any]:
+    return [
+        int(index) if index else key
+        for key, index in PATH_PART.findall(path)
+    ]
+
+
+def _get_path(data: Any, parts) -> Any:
+    for part in parts:
+        data = data[part]
+    return data
+
+
+def _set_path(data: Any, parts: List[Any], value: Any) -> None:
+    container = _get_path(data, parts[:-1])
+    last = parts[-1]
+    if isinstance(container, list) and isinstance(last, int) and last == len(container):
+        container.append(value)
+    else:
+        container[last] = value
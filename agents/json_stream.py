@@ -0,0 +1,130 @@
+"""
+Incremental JSON item parser
+
+Watches streamed model output and validates each element of one top-level
+list (e.g. `forecast`, `activities` or `day_by_day`) as soon as its closing
+brace arrives, so consumers can use day 1 while day 3 is still generating.
+
+The parser is bracket-aware: it tracks string literals and escapes, so
+braces inside strings do not confuse it, and it ignores anything outside the
+top-level object (such as markdown code fences).
+"""
+
+from typing import Generic, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from serialization import decode_model
+
+ItemT = TypeVar("ItemT", bound=BaseModel)
+
+
+class IncrementalItemParser(Generic[ItemT]):
+    """
+    Emits validated items of `list_key` from a stream of text chunks.
+
+    Example:
+        parser = IncrementalItemParser("forecast", DailyWeather)
+        for chunk in chunks:
+            for day in parser.feed(chunk):
+                ...
+
+    Attributes:
+        list_key: Key of the top-level list whose items are emitted
+        item_model: Pydantic model each item is validated against
+        items: All items validated so far
+        invalid_items: Number of items that failed to parse or validate
+    """
+
+    def __init__(self, list_key: str, item_model: Type[ItemT]):
+        self.list_key = list_key
+        self.item_model = item_model
+        self.items: List[ItemT] = []
+        self.invalid_items = 0
+
+        self._buffer: List[str] = []
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._done = False
+
+    def feed(self, chunk: str) -> List[ItemT]:
+        """Consume a chunk of text and return the items it completed."""
+        completed: List[ItemT] = []
+        if self._done:
+            return completed
+
+        self._buffer.append(chunk)
+        for ch in chunk:
+            pos = self._pos
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = self._text(self._string_start + 1, pos)
+                continue
+
+            if not self._stack and ch != "{":
+                # Outside the top-level object: code fences, prose, whitespace
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch == ":" and len(self._stack) == 1:
+                self._current_key = self._last_string
+            elif ch == "," and len(self._stack) == 1:
+                self._current_key = None
+            elif ch in "{[":
+                if (
+                    ch == "["
+                    and len(self._stack) == 1
+                    and self._current_key == self.list_key
+                ):
+                    self._array_depth = 2
+                elif ch == "{" and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_start = pos
+                self._stack.append(ch)
+            elif ch in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                depth = len(self._stack)
+                if ch == "}" and self._item_start is not None and depth == self._array_depth:
+                    item = self._validate(self._text(self._item_start, pos + 1))
+                    self._item_start = None
+                    if item is not None:
+                        completed.append(item)
+                elif ch == "]" and self._array_depth is not None and depth == self._array_depth - 1:
+                    self._array_depth = None
+                elif depth == 0:
+                    self._done = True
+                    break
+
+        self.items.extend(completed)
+        return completed
+
+    def _text(self, start: int, end: int) -> str:
+        if len(self._buffer) > 1:
+            self._buffer = ["".join(self._buffer)]
+        return self._buffer[0][start:end]
+
+    def _validate(self, raw: str) -> Optional[ItemT]:
+        try:
+            return decode_model(raw, self.item_model)
+        except ValidationError as e:
+            self.invalid_items += 1
+            print(f"⚠️ Skipping invalid streamed {self.item_model.__name__}: {e}")
+            return None
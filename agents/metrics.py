@@ -0,0 +1,306 @@
+"""
+Prometheus metrics
+
+A small in-process metrics registry exposed in the Prometheus text format
+at /metrics on every agent app. It is self-contained (no prometheus_client
+dependency) and covers what the agents need: labelled counters, gauges and
+histograms, plus collectors that refresh gauges at scrape time.
+
+Exported metrics:
+- a2a_agent_stage_seconds{agent,stage}: histogram of per-stage latency
+  (parse_input, build_prompt, llm_first_token, llm_total, extract_json,
+  validate, reask, enqueue, execute)
+- a2a_agent_output_errors_total{agent,kind}: responses that failed as
+  invalid JSON (kind="json") or failed validation (kind="validation")
+- a2a_agent_output_repairs_total{agent,method}: responses saved by local
+  repair or a follow-up re-ask
+- a2a_agent_outputs_total{agent,result}: every validated response, by
+  outcome (valid as generated, repaired, or failed after repair)
+- a2a_agent_inflight_executions{agent}: A2A executions in progress
+- a2a_agent_sessions{agent}, a2a_agent_session_events{agent}: session store size
+- a2a_agent_task_store_tasks{agent,state}: stored and pending tasks
+- a2a_agent_cache_lookups_total{agent,cache,result}: response cache hits
+  and misses; a2a_agent_cache_removals_total{agent,cache,reason}: evictions
+  and expirations; a2a_agent_cache_entries{agent,cache}: cache sizes
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; spans fast local stages (sub-millisecond) to slow model calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    def _label_text(self, key: LabelValues, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, *labels: str, value: float) -> None:
+        """Mirror a running total kept elsewhere (for collectors)."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._label_text(key)} {_number(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._label_text(key)} {_number(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(c), s, n)) for key, (c, s, n) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = self._label_text(key, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            inf = self._label_text(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {count}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+COLLECTORS: List[Callable[[], None]] = []
+
+STAGE_SECONDS = Histogram(
+    "a2a_agent_stage_seconds", "Latency of each request stage.", ["agent", "stage"]
+)
+OUTPUT_ERRORS = Counter(
+    "a2a_agent_output_errors_total",
+    "Model responses that could not be used (kind: json or validation).",
+    ["agent", "kind"],
+)
+OUTPUT_REPAIRS = Counter(
+    "a2a_agent_output_repairs_total",
+    "Invalid model responses repaired (method: local or reask).",
+    ["agent", "method"],
+)
+OUTPUT_RESULTS = Counter(
+    "a2a_agent_outputs_total",
+    "Model responses by outcome (result: valid, repaired or failed).",
+    ["agent", "result"],
+)
+INFLIGHT = Gauge(
+    "a2a_agent_inflight_executions", "A2A executions in progress.", ["agent"]
+)
+SESSIONS = Gauge("a2a_agent_sessions", "Sessions held by the agent.", ["agent"])
+SESSION_EVENTS = Gauge(
+    "a2a_agent_session_events", "Events held across the agent's sessions.", ["agent"]
+)
+TASK_STORE_TASKS = Gauge(
+    "a2a_agent_task_store_tasks", "Tasks in the A2A task store.", ["agent", "state"]
+)
+CACHE_LOOKUPS = Counter(
+    "a2a_agent_cache_lookups_total",
+    "Response cache lookups (result: hit or miss).",
+    ["agent", "cache", "result"],
+)
+CACHE_REMOVALS = Counter(
+    "a2a_agent_cache_removals_total",
+    "Response cache entries dropped (reason: eviction or expiration).",
+    ["agent", "cache", "reason"],
+)
+CACHE_ENTRIES = Gauge(
+    "a2a_agent_cache_entries", "Entries held by the agent's response caches.", ["agent", "cache"]
+)
+
+
+def observe_stage(agent: str, stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(agent, stage, value=seconds)
+
+
+@contextmanager
+def stage_timer(agent: str, stage: str) -> Iterator[None]:
+    """Record the duration of the block in a2a_agent_stage_seconds."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(agent, stage, time.perf_counter() - started)
+
+
+@contextmanager
+def track_execution(agent: str) -> Iterator[None]:
+    """Count the block as an in-flight execution and time it as 'execute'."""
+    INFLIGHT.inc(agent)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        INFLIGHT.inc(agent, amount=-1)
+        observe_stage(agent, "execute", time.perf_counter() - started)
+
+
+def track_stores(agent: str, lazy_agent, task_store) -> None:
+    """
+    Report session, task store and response cache sizes for an agent at
+    scrape time.
+
+    Args:
+        agent: Label value
+        lazy_agent: The executor's LazyAgent (sessions and caches are only
+            reported once it is built)
+        task_store: The app's A2A task store
+    """
+
+    def collect() -> None:
+        if lazy_agent.built and hasattr(lazy_agent.get(), "session_counts"):
+            stats = lazy_agent.get().session_counts()
+            SESSIONS.set(agent, value=stats["sessions"])
+            SESSION_EVENTS.set(agent, value=stats["events"])
+        if lazy_agent.built and hasattr(lazy_agent.get(), "cache_stats"):
+            for cache, stats in lazy_agent.get().cache_stats().items():
+                if "hits" not in stats:
+                    continue
+                CACHE_LOOKUPS.set_total(agent, cache, "hit", value=stats["hits"])
+                CACHE_LOOKUPS.set_total(agent, cache, "miss", value=stats["misses"])
+                CACHE_REMOVALS.set_total(agent, cache, "eviction", value=stats["evictions"])
+                CACHE_REMOVALS.set_total(agent, cache, "expiration", value=stats["expirations"])
+                CACHE_ENTRIES.set(agent, cache, value=stats["size"])
+        if hasattr(task_store, "stats"):
+            stats = task_store.stats()
+            TASK_STORE_TASKS.set(agent, "stored", value=stats["stored"])
+            TASK_STORE_TASKS.set(agent, "pending", value=stats["pending"])
+        else:
+            TASK_STORE_TASKS.set(agent, "stored", value=len(getattr(task_store, "tasks", {})))
+
+    COLLECTORS.append(collect)
+
+
+def render_metrics() -> str:
+    for collect in COLLECTORS:
+        collect()
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_route() -> Route:
+    """GET /metrics in the Prometheus text exposition format."""
+
+    async def metrics(request: Request) -> Response:
+        return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+    return Route("/metrics", metrics, methods=["GET"])
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
@@ -9,6 +9,9 @@ This agent serves as the primary interface for the A2A demo, managing:
 - Conversation state
 - File uploads and artifacts
 - Multi-turn conversations
+
+Each AG-UI run is traced as an `ag_ui.run` span (see tracing.py), with
+the ADK invocation and model call spans nested under it.
 """
 
 from __future__ import annotations
@@ -23,6 +26,11 @@ from ag_ui_adk import ADKAgent, add_adk_fastapi_endpoint
 from google.adk.agents import LlmAgent
 from datetime import date
 
+from rate_limit import throttle_model_call
+from tracing import setup_tracing, tracer
+
+setup_tracing("orchestrator")
+
 today = date.today()
 formatted_date = today.strftime("%Y-%m-%d")
 # Create the main orchestrator agent
@@ -43,10 +51,26 @@ orchestrator_agent = LlmAgent(
     When calling specialized agents, if you lack some information from the user - use any information, or try your best to guess it from the context. Don't ask the user clarifying questions.
     Today is {formatted_date}
     """,
+    before_model_callback=throttle_model_call,
 )
 
+class TracedADKAgent(ADKAgent):
+    """ADKAgent whose runs are wrapped in an `ag_ui.run` span."""
+
+    async def run(self, input):
+        with tracer.start_as_current_span(
+            "ag_ui.run",
+            attributes={
+                "ag_ui.thread_id": getattr(input, "thread_id", "") or "",
+                "ag_ui.run_id": getattr(input, "run_id", "") or "",
+            },
+        ):
+            async for event in super().run(input):
+                yield event
+
+
 # Expose the agent via AG-UI Protocol
-adk_orchestrator_agent = ADKAgent(
+adk_orchestrator_agent = TracedADKAgent(
     adk_agent=orchestrator_agent,
     app_name="orchestrator_app",
     user_id="demo_user",
@@ -0,0 +1,134 @@
+"""
+Prompt Compaction
+
+Renders the weather forecast and activities payloads that are embedded in
+the activities and weekend planner prompts as dense tables instead of
+indented JSON, keeping only the fields those agents actually use.
+
+Example forecast table:
+    day|date|condition|high_f|low_f|precip_pct|wind_mph
+    1|Oct 20|Sunny|72|58|10|8
+
+Payloads that do not have the expected shape (the orchestrator builds them
+from model output) fall back to compact JSON instead of losing fields.
+
+Compaction is on by default; set PROMPT_COMPACTION=false to embed the
+original indented JSON.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from serialization import Payload, as_mapping
+
+
+FORECAST_COLUMNS = (
+    ("day", "day"),
+    ("date", "date"),
+    ("condition", "condition"),
+    ("highTemp", "high_f"),
+    ("lowTemp", "low_f"),
+    ("precipitation", "precip_pct"),
+    ("windSpeed", "wind_mph"),
+)
+
+ACTIVITY_COLUMNS = (
+    ("name", "name"),
+    ("category", "category"),
+    ("duration_minutes", "duration_min"),
+    ("estimated_cost", "cost_usd"),
+    ("indoor_outdoor", "setting"),
+    ("best_time", "best_time"),
+    ("weather_appropriate", "weather_ok"),
+    ("location", "location"),
+)
+
+# Fields the downstream agents do not use; everything else unknown is kept
+FORECAST_OMITTED = {"description", "humidity"}
+ACTIVITY_OMITTED = {"description"}
+
+
+def compaction_enabled() -> bool:
+    return os.getenv("PROMPT_COMPACTION", "true").lower() not in ("0", "false", "no")
+
+
+def format_forecast(weather_forecast: Payload, compact: Optional[bool] = None) -> str:
+    """Render a weather forecast payload (or StructuredWeather) for a prompt."""
+    if not _use_compaction(compact):
+        return json.dumps(weather_forecast, indent=2, default=as_mapping)
+
+    weather_forecast = as_mapping(weather_forecast)
+    forecast = _rows(weather_forecast.get("forecast"))
+    if not _is_list_of_dicts(forecast):
+        return _compact_json(weather_forecast)
+
+    lines = [_table(forecast, FORECAST_COLUMNS, FORECAST_OMITTED)]
+    best_days = weather_forecast.get("bestDays")
+    if best_days:
+        lines.append(f"best_days: {', '.join(str(day) for day in best_days)}")
+    return "\n".join(lines)
+
+
+def format_activities(activities_list: Payload, compact: Optional[bool] = None) -> str:
+    """Render an activities payload (or StructuredActivities) for a prompt."""
+    if not _use_compaction(compact):
+        return json.dumps(activities_list, indent=2, default=as_mapping)
+
+    activities_list = as_mapping(activities_list)
+    activities = _rows(activities_list.get("activities"))
+    if not _is_list_of_dicts(activities):
+        return _compact_json(activities_list)
+
+    lines = [_table(activities, ACTIVITY_COLUMNS, ACTIVITY_OMITTED)]
+    tips = activities_list.get("planning_tips")
+    if tips:
+        lines.append(f"planning_tips: {'; '.join(str(tip) for tip in tips)}")
+    return "\n".join(lines)
+
+
+def _use_compaction(compact: Optional[bool]) -> bool:
+    return compaction_enabled() if compact is None else compact
+
+
+def _rows(value: Any) -> Any:
+    return [as_mapping(row) for row in value] if isinstance(value, list) else value
+
+
+def _is_list_of_dicts(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(v, dict) for v in value)
+
+
+def _compact_json(payload: Any) -> str:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=as_mapping)
+
+
+def _table(rows: List[Dict[str, Any]], columns: Sequence[tuple], omitted: Set[str]) -> str:
+    """
+    Render rows as a pipe-separated table.
+
+    Only columns present in at least one row are emitted. Keys that are
+    neither columns nor omitted are appended per row as compact JSON so the
+    model still sees them.
+    """
+    present = [(key, label) for key, label in columns if any(key in row for row in rows)]
+    known = {key for key, _ in columns}
+
+    lines = ["|".join(label for _, label in present)]
+    for row in rows:
+        cells = [_cell(row.get(key)) for key, _ in present]
+        extra = {k: v for k, v in row.items() if k not in known and k not in omitted}
+        if extra:
+            cells.append(_compact_json(extra))
+        lines.append("|".join(cells))
+    return "\n".join(lines)
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, (dict, list)):
+        return _compact_json(value)
+    return str(value).replace("|", "/").replace("\n", " ")
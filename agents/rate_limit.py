@@ -0,0 +1,198 @@
+"""
+Model rate limiting
+
+The weather, activities and planner agents and the orchestrator all call
+Gemini against one project quota. `ModelRateLimiter` spaces their calls
+with two token buckets per model, so bursts are smoothed out here instead
+of coming back as 429s:
+
+- requests per minute (MODEL_RPM_LIMIT) and tokens per minute
+  (MODEL_TPM_LIMIT); unset or 0 disables a bucket
+- a call's token cost is estimated before it is sent: prompt characters / 4
+  plus the request's max_output_tokens (else MODEL_OUTPUT_TOKENS_ESTIMATE,
+  default 1024)
+- the buckets are shared by every agent in the process; with
+  MODEL_RATE_LIMIT_FILE they are kept in that file under an exclusive lock
+  (taken in a worker thread, off the event loop), so separate agent
+  processes on one host (and the orchestrator) share them
+- calls reserve capacity in arrival order and sleep until it is theirs; a
+  call that would wait past its request deadline fails at once with
+  RateLimitExceeded (a DeadlineExceeded the circuit breaker ignores)
+
+`throttle_model_call` is the ADK before_model_callback applying it.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from deadlines import DeadlineExceeded, remaining_seconds
+from metrics import Counter, Histogram
+
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "a2a_model_rate_limit_wait_seconds", "Time model calls waited for rate limit capacity.", ["agent"]
+)
+RATE_LIMITED = Counter(
+    "a2a_model_rate_limited_total",
+    "Model calls delayed by the rate limiter (result: delayed or rejected).",
+    ["agent", "result"],
+)
+
+CHARS_PER_TOKEN = 4
+
+
+class RateLimitExceeded(DeadlineExceeded):
+    """The call would have waited past its deadline for rate limit capacity."""
+
+
+class ModelRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets per model.
+
+    Buckets start full and refill continuously. Reservations may take a
+    bucket below zero; later callers then wait for the debt to refill,
+    which keeps calls in arrival order.
+
+    Attributes:
+        rpm: Requests per minute (0 for no limit)
+        tpm: Tokens per minute (0 for no limit)
+        state_file: File shared with other processes, or None for this process only
+    """
+
+    def __init__(self, rpm: float, tpm: float, state_file: Optional[str] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional["ModelRateLimiter"]:
+        rpm = float(os.getenv("MODEL_RPM_LIMIT", 0))
+        tpm = float(os.getenv("MODEL_TPM_LIMIT", 0))
+        if rpm <= 0 and tpm <= 0:
+            return None
+        return cls(rpm, tpm, os.getenv("MODEL_RATE_LIMIT_FILE") or None)
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[Dict[str, Dict[str, float]]]:
+        with self._lock:
+            if not self.state_file:
+                yield self._state
+                return
+
+            import fcntl
+
+            with open(self.state_file, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        state = json.loads(f.read() or "{}")
+                    except ValueError:
+                        state = {}
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def reserve(self, model: str, tokens: int, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Reserve one request and `tokens` tokens for `model`.
+
+        Returns:
+            Seconds to wait before sending the call, or None (and nothing
+            reserved) if that would be longer than `max_wait`
+        """
+        with self._locked_state() as state:
+            now = time.time()
+            bucket = state.get(model) or {"requests": self.rpm, "tokens": self.tpm, "updated": now}
+            elapsed = max(0.0, now - bucket["updated"])
+            requests = min(self.rpm, bucket["requests"] + elapsed * self.rpm / 60)
+            available = min(self.tpm, bucket["tokens"] + elapsed * self.tpm / 60)
+
+            wait = 0.0
+            if self.rpm > 0:
+                wait = max(wait, (1 - requests) * 60 / self.rpm)
+            if self.tpm > 0:
+                wait = max(wait, (tokens - available) * 60 / self.tpm)
+            if max_wait is not None and wait > max_wait:
+                return None
+
+            state[model] = {
+                "requests": requests - 1 if self.rpm > 0 else 0.0,
+                "tokens": available - tokens if self.tpm > 0 else 0.0,
+                "updated": now,
+            }
+            return wait
+
+    async def acquire(self, agent: str, model: str, tokens: int) -> float:
+        """
+        Wait until a call of `tokens` tokens may be sent.
+
+        Raises:
+            RateLimitExceeded: The wait would outlast the request deadline
+        """
+        remaining = remaining_seconds()
+        max_wait = None if remaining is None else max(0.0, remaining)
+        if self.state_file:
+            # The file lock may be held by another process; keep it off the event loop
+            wait = await asyncio.to_thread(self.reserve, model, tokens, max_wait)
+        else:
+            wait = self.reserve(model, tokens, max_wait)
+        if wait is None:
+            RATE_LIMITED.inc(agent, "rejected")
+            print(f"🪣 {agent} model call would wait past its deadline for rate limit capacity")
+            raise RateLimitExceeded(agent)
+        RATE_LIMIT_WAIT_SECONDS.observe(agent, value=wait)
+        if wait > 0:
+            RATE_LIMITED.inc(agent, "delayed")
+            await asyncio.sleep(wait)
+        return wait
+
+
+_limiter: Optional[ModelRateLimiter] = None
+_configured = False
+
+
+def model_rate_limiter() -> Optional[ModelRateLimiter]:
+    """The process-wide limiter (None when no limit is configured)."""
+    global _limiter, _configured
+    if not _configured:
+        _limiter = ModelRateLimiter.from_env()
+        _configured = True
+    return _limiter
+
+
+def estimate_tokens(llm_request: Any) -> int:
+    """Token cost of a call: prompt characters / 4 plus the output allowance."""
+    chars = 0
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            chars += len(part.text or "")
+    config = llm_request.config
+    instruction = getattr(config, "system_instruction", None)
+    if isinstance(instruction, str):
+        chars += len(instruction)
+    output = getattr(config, "max_output_tokens", None) or int(
+        os.getenv("MODEL_OUTPUT_TOKENS_ESTIMATE", 1024)
+    )
+    return chars // CHARS_PER_TOKEN + output
+
+
+async def throttle_model_call(callback_context: Any, llm_request: Any) -> None:
+    """ADK before_model_callback holding the call until the rate limiter admits it."""
+    limiter = model_rate_limiter()
+    if limiter is None:
+        return None
+    await limiter.acquire(
+        callback_context.agent_name, llm_request.model or "default", estimate_tokens(llm_request)
+    )
+    return None
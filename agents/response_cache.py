@@ -0,0 +1,96 @@
+"""
+Response Cache
+
+A small in-process cache shared by the A2A agents to avoid repeating
+Gemini round trips for requests that were answered moments ago.
+
+Features:
+- Bounded LRU: the least recently used entry is evicted when full
+- Per-entry TTL: stale entries are dropped on access
+- Hit/miss/eviction counters for sizing the cache
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache with a time-to-live on every entry.
+
+    Entries are kept in an OrderedDict ordered from least to most recently
+    used. Reads move an entry to the end; writes past ``max_entries`` evict
+    from the front. Expired entries are removed lazily when they are read.
+
+    Attributes:
+        max_entries: Maximum number of entries kept before evicting
+        ttl_seconds: Seconds an entry stays valid after being stored
+        hits: Number of lookups served from the cache
+        misses: Number of lookups that found nothing (or an expired entry)
+        evictions: Number of entries dropped to respect ``max_entries``
+        expirations: Number of entries dropped because their TTL elapsed
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for ``key``, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` under ``key``, evicting the LRU entry if full."""
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters describing cache effectiveness."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
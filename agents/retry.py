@@ -0,0 +1,206 @@
+"""
+Model call retries
+
+Retries transient Gemini failures (quota 429s, 5xx, dropped connections)
+instead of failing the A2A request, without letting retries multiply load
+when the backend is overloaded:
+
+- Errors are classified as retryable (HTTP 408, 429, 5xx and transport
+  errors) or fatal (other API errors); anything else is not a model error
+  and propagates unchanged
+- Up to MODEL_RETRY_ATTEMPTS attempts (default 3), sleeping a random delay
+  of up to MODEL_RETRY_BASE_SECONDS * 2^n (default 0.5) between them, capped
+  at MODEL_RETRY_MAX_SECONDS (default 8)
+- A process-wide retry budget: every call earns MODEL_RETRY_BUDGET_RATIO
+  (default 0.1) of a retry and every retry spends one, on top of a reserve
+  of MODEL_RETRY_BUDGET_MIN (default 10), so sustained retries stay below
+  that fraction of traffic
+- No retry once output was streamed to the client, or when the backoff
+  would pass the request deadline
+- A call that still fails raises ModelError, whose payload tells the A2A
+  client whether retrying later may help
+"""
+
+import asyncio
+import os
+import random
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+from deadlines import remaining_seconds
+from metrics import Counter, Gauge
+
+MODEL_ERRORS = Counter(
+    "a2a_model_errors_total",
+    "Failed model calls (kind: retryable or fatal).",
+    ["agent", "kind"],
+)
+RETRIES = Counter(
+    "a2a_model_retries_total",
+    "Retry decisions after retryable model errors (result: retried, attempts, "
+    "streamed, deadline or budget).",
+    ["agent", "result"],
+)
+RETRY_BUDGET = Gauge("a2a_model_retry_budget", "Retries the retry budget currently allows.")
+
+RETRYABLE_STATUS = {408, 429}
+
+
+class ModelError(Exception):
+    """The model call failed and was not (or no longer) retried."""
+
+    def __init__(self, agent: str, cause: Exception, retryable: bool):
+        self.agent = agent
+        self.status = getattr(cause, "code", None)
+        self.retryable = retryable
+        super().__init__(f"{agent} model call failed: {cause}")
+
+    def payload(self) -> dict:
+        """Error payload returned to the A2A client."""
+        return {
+            "error": "ModelUnavailable" if self.retryable else "ModelError",
+            "message": str(self),
+            "status": self.status,
+            "retryable": self.retryable,
+        }
+
+
+def classify(error: BaseException) -> Optional[bool]:
+    """True for a retryable model error, False for a fatal one, None for anything else."""
+    import httpx
+    from google.genai import errors
+
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS or (error.code or 0) >= 500
+    if isinstance(error, httpx.TransportError):
+        return True
+    return None
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of calls.
+
+    Attributes:
+        ratio: Retries earned per call
+        reserve: Most retries that can be saved up (and the starting balance)
+    """
+
+    def __init__(self, ratio: float, reserve: float):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = reserve
+        self._lock = threading.Lock()
+        RETRY_BUDGET.set(value=self.balance)
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.balance = min(self.reserve, self.balance + self.ratio)
+            RETRY_BUDGET.set(value=self.balance)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            RETRY_BUDGET.set(value=self.balance)
+            return True
+
+
+class RetryPolicy:
+    """
+    Retries model calls with capped, jittered exponential backoff.
+
+    Attributes:
+        attempts: Attempts per call, including the first
+        base_seconds: Backoff cap before the first retry, doubled per retry
+        max_seconds: Upper bound on any backoff
+        budget: Retry budget shared by every agent in the process
+    """
+
+    def __init__(self, attempts: int, base_seconds: float, max_seconds: float, budget: RetryBudget):
+        self.attempts = attempts
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.budget = budget
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            attempts=int(os.getenv("MODEL_RETRY_ATTEMPTS", 3)),
+            base_seconds=float(os.getenv("MODEL_RETRY_BASE_SECONDS", 0.5)),
+            max_seconds=float(os.getenv("MODEL_RETRY_MAX_SECONDS", 8)),
+            budget=RetryBudget(
+                ratio=float(os.getenv("MODEL_RETRY_BUDGET_RATIO", 0.1)),
+                reserve=float(os.getenv("MODEL_RETRY_BUDGET_MIN", 10)),
+            ),
+        )
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter delay before retry number `retry` (0-based)."""
+        return random.uniform(0, min(self.max_seconds, self.base_seconds * 2 ** retry))
+
+    async def run(
+        self,
+        agent: str,
+        call: Callable[[], Awaitable[Any]],
+        can_retry: Callable[[], bool] = lambda: True,
+    ) -> Any:
+        """
+        Return `await call()`, retrying retryable model errors.
+
+        Args:
+            agent: Agent name used in logs and metrics
+            call: Makes one attempt
+            can_retry: False once a failed attempt cannot be repeated
+                (e.g. it already streamed output)
+
+        Raises:
+            ModelError: A fatal model error, or a retryable one not retried
+        """
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await call()
+            except Exception as e:
+                retryable = classify(e)
+                if retryable is None:
+                    raise
+                MODEL_ERRORS.inc(agent, "retryable" if retryable else "fatal")
+                if not retryable:
+                    raise ModelError(agent, e, retryable=False) from e
+
+                delay = self.backoff(attempt - 1)
+                refused = self._refusal(attempt, delay, can_retry)
+                RETRIES.inc(agent, refused or "retried")
+                if refused:
+                    print(f"❌ {agent} model call failed, not retrying ({refused}): {e}")
+                    raise ModelError(agent, e, retryable=True) from e
+                print(f"🔁 {agent} model call failed ({e}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    def _refusal(self, attempt: int, delay: float, can_retry: Callable[[], bool]) -> Optional[str]:
+        """Why a retry after `attempt` attempts is not made, or None to retry."""
+        if attempt >= self.attempts:
+            return "attempts"
+        if not can_retry():
+            return "streamed"
+        remaining = remaining_seconds()
+        if remaining is not None and remaining <= delay:
+            return "deadline"
+        if not self.budget.try_spend():
+            return "budget"
+        return None
+
+
+_policy: Optional[RetryPolicy] = None
+
+
+def retry_policy() -> RetryPolicy:
+    """The process-wide retry policy (built from the environment on first use)."""
+    global _policy
+    if _policy is None:
+        _policy = RetryPolicy.from_env()
+    return _policy
@@ -0,0 +1,56 @@
+"""
+JSON serialization for agent responses
+
+One place for decoding model output into Pydantic models and encoding
+results for the wire, shared by the weather, activities, weekend planner
+and trip agents.
+
+- Decoding validates straight from the JSON text (`model_validate_json`),
+  one pass in pydantic-core instead of `json.loads` followed by
+  `Model(**data)`
+- Encoding uses pydantic-core (`model_dump_json` / `to_json`), without the
+  intermediate `model_dump()` dict and without indentation
+- Request fields typed `Payload` take either a JSON object from the wire or
+  a model already validated in process (the trip pipeline's stage
+  results), which is read through `as_mapping` instead of being dumped and
+  validated again
+
+Set PRETTY_JSON=true to indent responses for debugging.
+"""
+
+import os
+from typing import Annotated, Any, Dict, Type, TypeVar, Union
+
+from pydantic import BaseModel, Field, InstanceOf
+from pydantic_core import to_json
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# A JSON object, or a validated model passed in process (kept as is)
+Payload = Annotated[
+    Union[Dict[str, Any], InstanceOf[BaseModel]], Field(union_mode="left_to_right")
+]
+
+
+def pretty_json_enabled() -> bool:
+    return os.getenv("PRETTY_JSON", "false").lower() in ("1", "true", "yes")
+
+
+def decode_model(text: str, model: Type[ModelT]) -> ModelT:
+    """Validate JSON text against a model in one pass; raises ValidationError."""
+    return model.model_validate_json(text)
+
+
+def encode_model(model: BaseModel) -> str:
+    """Serialize a model to JSON, compact unless PRETTY_JSON is set."""
+    return model.model_dump_json(indent=2 if pretty_json_enabled() else None)
+
+
+def encode_json(value: Any) -> str:
+    """Serialize JSON-compatible data (models may be nested) like encode_model."""
+    return to_json(value, indent=2 if pretty_json_enabled() else None).decode()
+
+
+def as_mapping(value: Any) -> Any:
+    """A model's fields as a shallow dict (nested models are kept); other values unchanged."""
+    return dict(value) if isinstance(value, BaseModel) else value
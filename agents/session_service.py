@@ -0,0 +1,206 @@
+"""
+Bounded Session Service (ADK)
+
+An InMemorySessionService that forgets idle conversations. The A2A agents
+use the A2A context id as the ADK session id, so without a bound every
+conversation that ever reached an agent keeps its event history in RAM.
+
+Features:
+- TTL: sessions idle for longer than `ttl_seconds` are dropped
+- Max sessions: the least recently used session is evicted when full
+- Memory stats: session/event counts (cheap) and an approximate size in bytes
+- Rollback: a failed turn's events can be dropped before it is retried
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from typing_extensions import override
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig
+
+
+SessionKey = Tuple[str, str, str]
+
+
+class BoundedSessionService(InMemorySessionService):
+    """
+    In-memory ADK session service with TTL and LRU eviction.
+
+    Every create/get/append touches the session, moving it to the end of an
+    LRU list. Expired sessions are swept from the front of that list before
+    each lookup, and creating a session beyond `max_sessions` evicts the
+    least recently used one.
+
+    Attributes:
+        ttl_seconds: Idle time after which a session is dropped
+        max_sessions: Maximum number of sessions kept in memory
+        expired: Number of sessions dropped because their TTL elapsed
+        evicted: Number of sessions dropped to respect `max_sessions`
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600.0,
+        max_sessions: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._last_access: "OrderedDict[SessionKey, float]" = OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+
+    @classmethod
+    def from_env(cls) -> "BoundedSessionService":
+        """Build a service from SESSION_TTL_SECONDS and SESSION_MAX_COUNT."""
+        return cls(
+            ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", 3600)),
+            max_sessions=int(os.getenv("SESSION_MAX_COUNT", 1000)),
+        )
+
+    @override
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        self._sweep_expired()
+        session = await super().create_session(
+            app_name=app_name,
+            user_id=user_id,
+            state=state,
+            session_id=session_id,
+        )
+        self._touch((app_name, user_id, session.id))
+        while len(self._last_access) > self.max_sessions:
+            key, _ = self._last_access.popitem(last=False)
+            self._drop(key)
+            self.evicted += 1
+        return session
+
+    @override
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        self._sweep_expired()
+        session = await super().get_session(
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            config=config,
+        )
+        if session is not None:
+            self._touch((app_name, user_id, session_id))
+        return session
+
+    @override
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        await super().delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        self._last_access.pop((app_name, user_id, session_id), None)
+
+    @override
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        key = (session.app_name, session.user_id, session.id)
+        if key in self._last_access:
+            self._touch(key)
+        return event
+
+    def event_count(self, *, app_name: str, user_id: str, session_id: str) -> int:
+        """Number of events stored for a session (0 if it does not exist), without copying it."""
+        session = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        return len(session.events) if session is not None else 0
+
+    def truncate_events(
+        self, *, app_name: str, user_id: str, session_id: str, count: int
+    ) -> None:
+        """Keep only the session's first `count` events (e.g. to drop a failed turn)."""
+        session = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        if session is not None:
+            del session.events[count:]
+
+    def _touch(self, key: SessionKey) -> None:
+        self._last_access[key] = self._clock()
+        self._last_access.move_to_end(key)
+
+    def _sweep_expired(self) -> None:
+        deadline = self._clock() - self.ttl_seconds
+        while self._last_access:
+            key, last_access = next(iter(self._last_access.items()))
+            if last_access > deadline:
+                break
+            self._last_access.popitem(last=False)
+            self._drop(key)
+            self.expired += 1
+
+    def _drop(self, key: SessionKey) -> None:
+        app_name, user_id, session_id = key
+        user_sessions = self.sessions.get(app_name, {}).get(user_id)
+        if user_sessions is None:
+            return
+        user_sessions.pop(session_id, None)
+        if not user_sessions:
+            del self.sessions[app_name][user_id]
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of sessions and events held (cheap; for metrics scrapes)."""
+        self._sweep_expired()
+        session_count = 0
+        event_count = 0
+        for users in self.sessions.values():
+            for user_sessions in users.values():
+                session_count += len(user_sessions)
+                event_count += sum(len(session.events) for session in user_sessions.values())
+        return {"sessions": session_count, "events": event_count}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return session counts and an approximate memory footprint.
+
+        The byte estimate is the size of every stored event serialized to
+        JSON, which walks all sessions and every event; use counts() where
+        sizes are not needed.
+        """
+        self._sweep_expired()
+        session_count = 0
+        event_count = 0
+        approx_bytes = 0
+        for users in self.sessions.values():
+            for user_sessions in users.values():
+                for session in user_sessions.values():
+                    session_count += 1
+                    event_count += len(session.events)
+                    approx_bytes += sum(
+                        len(event.model_dump_json(exclude_none=True))
+                        for event in session.events
+                    )
+        return {
+            "sessions": session_count,
+            "events": event_count,
+            "approx_bytes": approx_bytes,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
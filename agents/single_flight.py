@@ -0,0 +1,163 @@
+"""
+Request coalescing (single-flight)
+
+During bursts many conversations ask the weather or activities agent the
+same question at the same moment. `SingleFlight` runs one generation per
+canonical request key; concurrent callers with the same key await that
+generation and share its result instead of each calling the model.
+
+- The generation runs in its own asyncio task, so one caller being
+  cancelled (tasks/cancel, a client disconnect) does not abort it for the
+  others; it is only cancelled when every caller has gone
+- Each caller waits at most its own remaining deadline
+- Streamed output is fanned out to every caller that passed `on_chunk`;
+  callers joining late first receive the chunks generated so far. The
+  generation streams only if the caller that started it does
+- Leader and coalesced calls are counted per agent in
+  a2a_agent_single_flight_total, so the coalesce rate can be graphed
+
+Disable with SINGLE_FLIGHT=false.
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from deadlines import DeadlineExceeded, remaining_seconds
+from metrics import Counter
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "a2a_agent_single_flight_total",
+    "Requests that ran a generation (result=leader) or shared one (result=coalesced).",
+    ["agent", "result"],
+)
+
+
+ChunkCallback = Callable[[str], Awaitable[None]]
+
+
+def single_flight_enabled() -> bool:
+    return os.getenv("SINGLE_FLIGHT", "true").lower() not in ("0", "false", "no")
+
+
+class _Flight:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.chunks: List[str] = []
+        self.subscribers: List[ChunkCallback] = []
+
+    async def broadcast(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        for callback in list(self.subscribers):
+            try:
+                await callback(chunk)
+            except Exception as e:
+                # One caller's stream failing must not fail the shared generation
+                print(f"⚠️ Dropping a coalesced stream subscriber: {e}")
+                self.unsubscribe(callback)
+
+    async def subscribe(self, callback: ChunkCallback) -> None:
+        sent = 0
+        while sent < len(self.chunks):
+            await callback(self.chunks[sent])
+            sent += 1
+        # No await since the last check, so no chunk can be missed
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: ChunkCallback) -> None:
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one.
+
+    Attributes:
+        agent: Agent name used in logs and metrics
+        leaders: Calls that started a generation
+        coalesced: Calls that awaited another caller's generation
+    """
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[Optional[ChunkCallback]], Awaitable[Any]],
+        on_chunk: Optional[ChunkCallback] = None,
+    ) -> Any:
+        """
+        Return `await fn(stream)`, sharing one call among concurrent callers with `key`.
+
+        Args:
+            key: Canonical request key
+            fn: Runs the generation, streaming partial output to its argument
+                (None when the generation should not stream)
+            on_chunk: Optional coroutine receiving this caller's copy of the
+                streamed output
+
+        Raises:
+            DeadlineExceeded: The caller's deadline passed while waiting
+        """
+        if not single_flight_enabled():
+            return await fn(on_chunk)
+
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            flight.task = asyncio.create_task(fn(flight.broadcast if on_chunk else None))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.leaders += 1
+            SINGLE_FLIGHT_CALLS.inc(self.agent, "leader")
+        else:
+            self.coalesced += 1
+            SINGLE_FLIGHT_CALLS.inc(self.agent, "coalesced")
+            print(f"🔗 Coalesced {self.agent} request with one in flight ({self.coalesced} so far)")
+
+        flight.waiters += 1
+        try:
+            if on_chunk is not None:
+                await flight.subscribe(on_chunk)
+            # The generation runs under the leader's deadline (its task copies
+            # the leader's context), so only followers need their own timeout
+            return await self._wait(flight, None if leader else remaining_seconds())
+        finally:
+            if on_chunk is not None:
+                flight.unsubscribe(on_chunk)
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is waiting for the result any more
+                flight.task.cancel()
+
+    async def _wait(self, flight: _Flight, timeout: Optional[float]) -> Any:
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), timeout)
+        except asyncio.TimeoutError:
+            if flight.task.done() and not flight.task.cancelled():
+                # Finished while wait_for was giving up: use its outcome
+                return flight.task.result()
+            raise DeadlineExceeded(self.agent) from None
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesce_rate": round(self.coalesced / calls, 4) if calls else 0.0,
+        }
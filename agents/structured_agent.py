@@ -0,0 +1,474 @@
+"""
+Structured Agent base (ADK)
+
+Shared plumbing for the ADK agents that answer with a single JSON document
+validated against a Pydantic model (weather, activities, weekend planner).
+
+Features:
+- Builds the ADK Runner with in-memory services
+- Creates sessions on demand, keyed by the A2A context id, in a session
+  store bounded by TTL and session count
+- Optionally streams partial model output while generating
+- Repairs almost-valid output locally and, if that is not enough, asks the
+  model in the same session for just the invalid fields
+- Strips markdown fences and validates the final JSON, or, with
+  GEMINI_RESPONSE_SCHEMA=true, has Gemini constrain the output to the
+  Pydantic model (response_schema + application/json) so no fence
+  stripping is needed
+- Records model time to first token and total, extraction and validation
+  latency, and output errors and repairs in the Prometheus metrics
+- Traces each Runner.run_async drive as a `structured_agent.run` span
+- Accounts the model's token usage per agent, context id and request
+- Bounds every model run by the request deadline (see deadlines.py)
+- Holds model calls for the shared model rate limiter (see rate_limit.py)
+- Retries transient model errors with backoff and a retry budget (see retry.py)
+- Fails fast while the model backend is failing (see circuit_breaker.py)
+
+google.adk and google.genai are imported when the first agent is built,
+not when this module is imported, so A2A apps can start (and serve their
+agent cards) without loading them.
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from circuit_breaker import CircuitBreaker, circuit_breaker, is_model_timeout
+from deadlines import TIMEOUTS, DeadlineExceeded, apply_deadline, remaining_seconds
+from json_repair import (
+    RepairResult,
+    RepairStats,
+    apply_patch,
+    decode_json,
+    format_error_list,
+    repair_and_validate,
+    validate_data,
+)
+from metrics import OUTPUT_ERRORS, OUTPUT_REPAIRS, OUTPUT_RESULTS, observe_stage, stage_timer
+from rate_limit import throttle_model_call
+from retry import retry_policy
+from serialization import encode_model
+from token_usage import UsageLedger
+from tracing import tracer
+
+if TYPE_CHECKING:
+    from google.adk.agents.llm_agent import LlmAgent
+
+
+ChunkCallback = Callable[[str], Awaitable[None]]
+
+
+class StructuredAgent:
+    """
+    Base class for ADK agents returning structured JSON.
+
+    Subclasses implement `_build_agent()` and set `output_model` to the
+    Pydantic model the response must validate against. `result_label` is
+    used in log lines and error payloads (e.g. "weather forecast").
+
+    `_build_agent()` should pass `output_schema=self.output_schema()` to its
+    LlmAgent, which enables Gemini's native structured output when
+    `response_schema` is on.
+
+    Attributes:
+        _agent: The underlying LlmAgent instance
+        _user_id: User ID for session management
+        _runner: ADK Runner for executing the agent
+        session_service: Bounded session store shared with the Runner
+        response_schema: Whether the model output is schema-constrained
+        repair: Counters of local repairs and follow-up re-asks
+        usage: Token usage in total and per context id
+    """
+
+    output_model: Type[BaseModel]
+    result_label: str = "response"
+
+    def __init__(self, response_schema: Optional[bool] = None):
+        """
+        Args:
+            response_schema: Use Gemini native structured output; defaults to
+                GEMINI_RESPONSE_SCHEMA
+        """
+        # Google ADK imports (deferred until an agent is built)
+        from google.adk.runners import Runner
+        from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
+        from google.adk.artifacts import InMemoryArtifactService
+        from session_service import BoundedSessionService
+
+        self.response_schema = (
+            response_schema_enabled() if response_schema is None else response_schema
+        )
+        self._agent = self._build_agent()
+        # Wait for rate limit capacity first, then send the remaining budget as the timeout
+        self._agent.before_model_callback = [throttle_model_call, apply_deadline]
+        self._user_id = 'remote_agent'
+        self.session_service = BoundedSessionService.from_env()
+        self._runner = Runner(
+            app_name=self._agent.name,
+            agent=self._agent,
+            artifact_service=InMemoryArtifactService(),
+            session_service=self.session_service,
+            memory_service=InMemoryMemoryService(),
+        )
+        self.repair = RepairStats()
+        self.usage = UsageLedger(self._agent.name)
+
+    def _build_agent(self) -> "LlmAgent":
+        raise NotImplementedError
+
+    def output_schema(self) -> Optional[Type[BaseModel]]:
+        """The LlmAgent output_schema: `output_model` in response_schema mode."""
+        return self.output_model if self.response_schema else None
+
+    def llm_agents(self) -> List["LlmAgent"]:
+        """LlmAgents driven by this agent (e.g. to share one model client)."""
+        return [self._agent]
+
+    def session_stats(self) -> dict:
+        """Return session counts and approximate memory usage."""
+        return self.session_service.stats()
+
+    def session_counts(self) -> dict:
+        """Return session and event counts without sizing every event."""
+        return self.session_service.counts()
+
+    def repair_stats(self) -> dict:
+        """Return how often output needed repair, success rate and re-ask latency."""
+        return self.repair.as_dict()
+
+    def usage_stats(self) -> dict:
+        """Return token totals and the heaviest contexts."""
+        return self.usage.as_dict()
+
+    async def invoke(
+        self,
+        query: str,
+        session_id: str,
+        on_chunk: Optional[ChunkCallback] = None,
+    ) -> str:
+        """
+        Run the agent on a query and return its validated JSON response.
+
+        Args:
+            query: Prompt sent to the model
+            session_id: Unique session identifier for conversation tracking
+            on_chunk: Optional coroutine called with each partial text chunk
+                while the model is generating
+
+        Returns:
+            str: JSON string of the validated output model, or an error payload
+        """
+        _, final_response = await self.generate(query, session_id, on_chunk)
+        return final_response
+
+    async def generate(
+        self,
+        query: str,
+        session_id: str,
+        on_chunk: Optional[ChunkCallback] = None,
+    ) -> Tuple[Optional[BaseModel], str]:
+        """
+        Run the model for a query and validate its output.
+
+        Returns:
+            Tuple of the validated model (None if generation failed) and the
+            JSON string to send back (the result, or an error payload).
+        """
+        metric_label = self._agent.name
+        response_text = await self._run(query, session_id, on_chunk)
+        with stage_timer(metric_label, 'extract_json'):
+            content_str = self._extract(response_text)
+
+        self.repair.responses += 1
+        with stage_timer(metric_label, 'validate'):
+            result = repair_and_validate(content_str, self.output_model)
+        if result.model is not None and not result.repairs:
+            self.repair.valid += 1
+            OUTPUT_RESULTS.inc(metric_label, 'valid')
+        elif result.model is not None:
+            self.repair.repaired_locally += 1
+            OUTPUT_REPAIRS.inc(metric_label, 'local')
+            OUTPUT_RESULTS.inc(metric_label, 'repaired')
+            print(f"🔧 Repaired {self.result_label} locally: {', '.join(result.repairs)}")
+        elif reask_enabled():
+            await self._reask(result, session_id)
+
+        if result.model is None:
+            self.repair.failed += 1
+            OUTPUT_RESULTS.inc(metric_label, 'failed')
+            if result.data is None:
+                OUTPUT_ERRORS.inc(metric_label, 'json')
+                print(f"❌ JSON parsing error: {result.error}")
+                print(f"Content: {content_str}")
+                return None, json.dumps({
+                    "error": f"Failed to generate structured {self.result_label}",
+                    "raw_content": content_str[:200]
+                })
+            OUTPUT_ERRORS.inc(metric_label, 'validation')
+            print(f"❌ Validation error: {result.error}")
+            return None, json.dumps({
+                "error": f"Validation failed: {result.error}"
+            })
+
+        validated = result.model
+        final_response = encode_model(validated)
+        print(f"✅ Successfully created structured {self.result_label}")
+        return validated, final_response
+
+    async def _reask(self, result: RepairResult, session_id: str) -> None:
+        """
+        Ask the model, in the same session, to fix what local repair could not.
+
+        If the output could be decoded and only some fields are invalid, only
+        those paths are requested and patched into `result.data`; otherwise
+        (undecodable output, or schema mode where the model can only return
+        the full object) the complete object is requested again. Updates
+        `result` in place.
+        """
+        self.repair.reasks += 1
+        started = time.perf_counter()
+        targeted = (
+            result.data is not None
+            and result.invalid_paths
+            and not self.response_schema
+        )
+        requested = ", ".join(result.invalid_paths) if targeted else "the full object"
+        with stage_timer(self._agent.name, 'reask'):
+            try:
+                if targeted:
+                    paths = ", ".join(f'"{path}": ...' for path in result.invalid_paths)
+                    prompt = (
+                        "Your previous JSON response failed validation:\n"
+                        f"{format_error_list(result.error)}\n\n"
+                        "Return ONLY a JSON object with corrected values for just these "
+                        f"paths, keyed by path: {{{paths}}}\n"
+                        "Return ONLY valid JSON, no markdown code blocks, no other text."
+                    )
+                    patch = decode_json(self._extract(await self._run(prompt, session_id)))
+                    if isinstance(patch, dict) and apply_patch(result.data, patch):
+                        validate_data(result, self.output_model)
+                else:
+                    first_line = (result.error or "").splitlines()[0] if result.error else ""
+                    prompt = (
+                        "Your previous response was not valid JSON for the requested "
+                        f"structure ({first_line}).\n"
+                        "Return the complete, corrected JSON object. "
+                        "Return ONLY valid JSON, no markdown code blocks, no other text."
+                    )
+                    retry = repair_and_validate(
+                        self._extract(await self._run(prompt, session_id)), self.output_model
+                    )
+                    if retry.model is not None or result.data is None:
+                        result.model, result.data = retry.model, retry.data
+                        result.error, result.invalid_paths = retry.error, retry.invalid_paths
+            finally:
+                self.repair.reask_seconds += time.perf_counter() - started
+
+        if result.model is not None:
+            self.repair.repaired_by_reask += 1
+            OUTPUT_REPAIRS.inc(self._agent.name, 'reask')
+            OUTPUT_RESULTS.inc(self._agent.name, 'repaired')
+            print(f"🔧 Repaired {self.result_label} with a follow-up for {requested}")
+
+    def _extract(self, response_text: str) -> str:
+        if self.response_schema:
+            return response_text.strip()
+        return extract_json_text(response_text)
+
+    async def _run(
+        self,
+        query: str,
+        session_id: str,
+        on_chunk: Optional[ChunkCallback] = None,
+    ) -> str:
+        """
+        Run the model within the remaining request deadline, through the
+        circuit breaker for this agent and model.
+
+        Raises:
+            CircuitOpen: The model backend has been failing; nothing was run
+            DeadlineExceeded: The deadline passed before the model answered
+        """
+        budget = remaining_seconds()
+        if budget is not None and budget <= 0:
+            # Spent before the model was called (client deadline, queueing):
+            # fail without involving the circuit breaker
+            TIMEOUTS.inc(self._agent.name)
+            print(f"⏱️ {self._agent.name} ran out of its deadline before calling the model")
+            raise DeadlineExceeded(self._agent.name)
+
+        async with self._circuit().guard():
+            if budget is None:
+                return await self._drive_with_retries(query, session_id, on_chunk)
+            try:
+                return await asyncio.wait_for(self._drive_with_retries(query, session_id, on_chunk), budget)
+            except asyncio.TimeoutError:
+                TIMEOUTS.inc(self._agent.name)
+                print(f"⏱️ {self._agent.name} ran out of its deadline ({budget:.1f}s left at start)")
+                raise DeadlineExceeded(
+                    self._agent.name, model_timeout=is_model_timeout(self._agent.name, budget)
+                ) from None
+
+    def _circuit(self) -> CircuitBreaker:
+        """The circuit breaker for this agent and the model it currently uses."""
+        model = self._agent.model
+        return circuit_breaker(self._agent.name, model if isinstance(model, str) else model.model)
+
+    async def _drive_with_retries(
+        self,
+        query: str,
+        session_id: str,
+        on_chunk: Optional[ChunkCallback] = None,
+    ) -> str:
+        """
+        `_drive` under the retry policy (see retry.py).
+
+        A failed attempt's events are dropped from the session so a retry
+        does not repeat the question; once output has been streamed to the
+        client the call is not retried.
+
+        Raises:
+            ModelError: The model call failed and was not retried
+        """
+        streamed = False
+
+        async def forward(chunk: str) -> None:
+            nonlocal streamed
+            streamed = True
+            await on_chunk(chunk)
+
+        async def attempt() -> str:
+            kept = self.session_service.event_count(
+                app_name=self._agent.name, user_id=self._user_id, session_id=session_id
+            )
+            try:
+                return await self._drive(query, session_id, forward if on_chunk else None)
+            except Exception:
+                self.session_service.truncate_events(
+                    app_name=self._agent.name,
+                    user_id=self._user_id,
+                    session_id=session_id,
+                    count=kept,
+                )
+                raise
+
+        return await retry_policy().run(self._agent.name, attempt, lambda: not streamed)
+
+    async def _drive(
+        self,
+        query: str,
+        session_id: str,
+        on_chunk: Optional[ChunkCallback] = None,
+    ) -> str:
+        """
+        Drive the ADK Runner and return the final response text.
+
+        With `on_chunk`, the model is run in SSE streaming mode and every
+        partial text delta is forwarded as it arrives. The final (non-partial)
+        event carries the complete text either way.
+        """
+        from google.adk.agents.run_config import RunConfig, StreamingMode
+        from google.genai import types
+
+        session = await self._runner.session_service.get_session(
+            app_name=self._agent.name,
+            user_id=self._user_id,
+            session_id=session_id,
+        )
+
+        content = types.Content(
+            role='user', parts=[types.Part.from_text(text=query)]
+        )
+
+        if session is None:
+            session = await self._runner.session_service.create_session(
+                app_name=self._agent.name,
+                user_id=self._user_id,
+                state={},
+                session_id=session_id,
+            )
+
+        run_config = RunConfig(
+            streaming_mode=StreamingMode.SSE if on_chunk else StreamingMode.NONE
+        )
+
+        response_text = ''
+        started = time.perf_counter()
+        first_token = True
+        with tracer.start_as_current_span(
+            'structured_agent.run',
+            attributes={
+                'agent.name': self._agent.name,
+                'session.id': session_id,
+                'streaming': bool(on_chunk),
+            },
+        ) as span:
+            events = self._runner.run_async(
+                user_id=self._user_id,
+                session_id=session.id,
+                new_message=content,
+                run_config=run_config,
+            )
+            try:
+                async for event in events:
+                    if first_token and event.content and event.content.parts:
+                        first_token = False
+                        observe_stage(self._agent.name, 'llm_first_token', time.perf_counter() - started)
+                        span.add_event('first_token')
+
+                    if not event.partial and event.usage_metadata:
+                        usage = self.usage.record(session_id, event.usage_metadata)
+                        span.set_attributes({
+                            'llm.usage.prompt_tokens': usage.prompt_tokens,
+                            'llm.usage.output_tokens': usage.output_tokens,
+                            'llm.usage.thinking_tokens': usage.thinking_tokens,
+                        })
+
+                    if event.partial:
+                        if on_chunk and event.content and event.content.parts:
+                            chunk = ''.join(p.text for p in event.content.parts if p.text)
+                            if chunk:
+                                await on_chunk(chunk)
+                        continue
+
+                    if event.is_final_response():
+                        if (
+                            event.content
+                            and event.content.parts
+                            and event.content.parts[0].text
+                        ):
+                            response_text = '\n'.join(
+                                [p.text for p in event.content.parts if p.text]
+                            )
+                        break
+            finally:
+                # Close ADK's generators in this task, not at garbage collection,
+                # so their spans end here and their contexts detach cleanly
+                await events.aclose()
+
+        observe_stage(self._agent.name, 'llm_total', time.perf_counter() - started)
+        return response_text
+
+
+def response_schema_enabled() -> bool:
+    return os.getenv("GEMINI_RESPONSE_SCHEMA", "false").lower() in ("1", "true", "yes")
+
+
+def reask_enabled() -> bool:
+    return os.getenv("STRUCTURED_REASK", "true").lower() not in ("0", "false", "no")
+
+
+def extract_json_text(response_text: str) -> str:
+    """Strip surrounding whitespace and markdown code fences from model output."""
+    content_str = response_text.strip()
+
+    if "```json" in content_str:
+        content_str = content_str.split("```json")[1].split("```")[0].strip()
+    elif "```" in content_str:
+        content_str = content_str.split("```")[1].split("```")[0].strip()
+
+    return content_str
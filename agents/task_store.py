@@ -0,0 +1,264 @@
+"""
+Persistent A2A Task Store (SQLite)
+
+A durable replacement for the a2a-sdk InMemoryTaskStore, so agents can be
+restarted or rolled without losing `tasks/get` lookups and without holding
+every task in memory.
+
+Features:
+- SQLite in WAL mode with synchronous=NORMAL (no fsync per commit)
+- Write-behind batching: `save()` only records the latest task state in
+  memory; a background flusher writes all pending tasks in one transaction,
+  so repeated saves of the same task between flushes are coalesced; the
+  flusher sleeps until a save or delete marks the store dirty
+- The stored task count is kept in memory, so `stats()` (read on every
+  /metrics scrape) never touches the database
+- Retention sweeper deleting tasks not updated within the retention window
+
+Select it per agent with TASK_STORE=sqlite (default: memory).
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import InMemoryTaskStore, TaskStore
+from a2a.types import Task
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    TaskStore persisting tasks to a local SQLite database.
+
+    Reads check the pending (not yet flushed) writes first, so a task is
+    visible to `get()` immediately after `save()` returns. All database work
+    runs in a worker thread via asyncio.to_thread, keeping the event loop
+    free while SQLite writes.
+
+    Attributes:
+        path: Database file path
+        flush_interval: Seconds a flush waits after the first pending write
+        retention_seconds: Tasks not updated for this long are deleted
+        sweep_interval: Seconds between retention sweeps
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.05,
+        retention_seconds: float = 86400.0,
+        sweep_interval: float = 300.0,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.retention_seconds = retention_seconds
+        self.sweep_interval = sweep_interval
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db_lock = threading.Lock()
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id TEXT PRIMARY KEY,
+                    context_id TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS tasks_updated_at ON tasks (updated_at)"
+            )
+            (self._stored,) = self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()
+
+        self._pending: Dict[str, Task] = {}
+        self._pending_deletes: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._dirty = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._last_sweep = time.time()
+        self.flushes = 0
+        self.coalesced_writes = 0
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        """Queue the task for the next flush, replacing any pending state."""
+        if task.id in self._pending:
+            self.coalesced_writes += 1
+        self._pending[task.id] = task.model_copy(deep=True)
+        self._pending_deletes.discard(task.id)
+        self._mark_dirty()
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        if task_id in self._pending_deletes:
+            return None
+        pending = self._pending.get(task_id)
+        if pending is not None:
+            return pending.model_copy(deep=True)
+
+        row = await asyncio.to_thread(self._select, task_id)
+        if row is None:
+            return None
+        return Task.model_validate_json(row)
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        self._pending.pop(task_id, None)
+        self._pending_deletes.add(task_id)
+        self._mark_dirty()
+
+    async def flush(self) -> None:
+        """
+        Write all pending saves and deletes in a single transaction.
+
+        Entries stay pending (and visible to `get()`) until the transaction
+        has committed; if it fails they are kept for the next flush. Entries
+        replaced while the write was running are left for the next flush.
+        """
+        async with self._flush_lock:
+            if not self._pending and not self._pending_deletes:
+                return
+            pending = dict(self._pending)
+            deletes = set(self._pending_deletes)
+            now = time.time()
+            rows = [
+                (task.id, task.context_id, task.status.state.value, now, task.model_dump_json())
+                for task in pending.values()
+            ]
+            await asyncio.to_thread(self._write, rows, list(deletes))
+            self.flushes += 1
+
+            for task_id, task in pending.items():
+                if self._pending.get(task_id) is task:
+                    del self._pending[task_id]
+            self._pending_deletes -= deletes
+
+    async def sweep(self) -> int:
+        """Delete tasks not updated within the retention window."""
+        cutoff = time.time() - self.retention_seconds
+        self._last_sweep = time.time()
+        return await asyncio.to_thread(self._delete_older_than, cutoff)
+
+    async def close(self) -> None:
+        """Stop the flusher, write outstanding changes and close the database."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stored": self._stored,
+            "pending": len(self._pending),
+            "pending_deletes": len(self._pending_deletes),
+            "flushes": self.flushes,
+            "coalesced_writes": self.coalesced_writes,
+        }
+
+    def _mark_dirty(self) -> None:
+        self._dirty.set()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            until_sweep = self._last_sweep + self.sweep_interval - time.time()
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=max(until_sweep, 0))
+                # Let more writes arrive so they share the transaction
+                await asyncio.sleep(self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._dirty.clear()
+            try:
+                await self.flush()
+                if time.time() - self._last_sweep >= self.sweep_interval:
+                    removed = await self.sweep()
+                    if removed:
+                        print(f"🧹 Removed {removed} expired tasks from {self.path}")
+            except sqlite3.Error as e:
+                print(f"❌ Task store flush failed: {e}")
+                # Pending entries were kept; retry after the next interval
+                self._dirty.set()
+
+    def _select(self, task_id: str) -> Optional[str]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT data FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _write(self, rows: List[tuple], deletes: List[str]) -> None:
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            try:
+                added = sum(
+                    self._conn.execute("SELECT 1 FROM tasks WHERE id = ?", (row[0],)).fetchone() is None
+                    for row in rows
+                )
+                removed = 0
+                if rows:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO tasks (id, context_id, state, updated_at, data) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                if deletes:
+                    removed = self._conn.executemany(
+                        "DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in deletes]
+                    ).rowcount
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._stored += added - removed
+
+    def _delete_older_than(self, cutoff: float) -> int:
+        with self._db_lock:
+            cursor = self._conn.execute("DELETE FROM tasks WHERE updated_at < ?", (cutoff,))
+            self._stored -= cursor.rowcount
+        return cursor.rowcount
+
+
+def build_task_store(name: str) -> TaskStore:
+    """
+    Build the task store selected by TASK_STORE for an agent.
+
+    TASK_STORE=memory (default) keeps the a2a-sdk InMemoryTaskStore.
+    TASK_STORE=sqlite stores tasks in TASK_STORE_DIR/<name>_tasks.sqlite3,
+    with retention from TASK_STORE_RETENTION_SECONDS.
+    """
+    kind = os.getenv("TASK_STORE", "memory").lower()
+    if kind == "memory":
+        return InMemoryTaskStore()
+    if kind == "sqlite":
+        directory = os.getenv("TASK_STORE_DIR", ".")
+        return SQLiteTaskStore(
+            path=os.path.join(directory, f"{name}_tasks.sqlite3"),
+            flush_interval=float(os.getenv("TASK_STORE_FLUSH_INTERVAL", 0.05)),
+            retention_seconds=float(os.getenv("TASK_STORE_RETENTION_SECONDS", 86400)),
+        )
+    raise ValueError(f"Unknown TASK_STORE '{kind}' (expected 'memory' or 'sqlite')")
+
+
+def shutdown_handlers(task_store: TaskStore) -> List[Callable]:
+    """Starlette on_shutdown handlers that flush and close the task store."""
+    if isinstance(task_store, SQLiteTaskStore):
+        return [task_store.close]
+    return []
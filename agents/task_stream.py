@@ -0,0 +1,167 @@
+"""
+A2A Task Streaming
+
+Publishes agent results to the A2A EventQueue, either as a single agent
+message (the default) or, in streaming mode, as a task whose status and
+artifacts are updated while the model is still generating.
+
+Streaming mode is enabled with A2A_STREAMING=true. Clients using
+`message/stream` then receive:
+- a `working` status update as soon as the input has been validated
+- artifact-update events with each partial chunk of model output
+- when an item parser is given, an `<name>_items` artifact with one
+  validated list item (a day, an activity, a day plan) per chunk, sent as
+  soon as that item's closing brace has been generated (or, for items
+  known before the model is called, at once through `on_items`)
+- a final artifact with the validated JSON and a `completed` status
+  carrying the same JSON as its message
+"""
+
+import os
+import uuid
+from typing import Awaitable, Callable, List, Optional
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import DataPart, Part, TextPart
+from a2a.utils import new_agent_text_message, new_task
+from pydantic import BaseModel
+
+from json_stream import IncrementalItemParser
+
+
+def streaming_enabled() -> bool:
+    return os.getenv("A2A_STREAMING", "false").lower() in ("1", "true", "yes")
+
+
+class TaskStreamPublisher:
+    """
+    Sends an executor's output to the EventQueue.
+
+    Executors call `start()` once the request is valid, pass `on_chunk` to
+    the agent, and finish with `publish()`. Without streaming, `start()` and
+    `on_chunk` are no-ops and `publish()` enqueues a plain agent message,
+    exactly as before.
+
+    Attributes:
+        streaming: Whether task/artifact events are emitted
+        artifact_name: Name used for the result artifact (e.g. 'weather_forecast')
+        item_parser: Optional parser whose completed items are streamed individually
+    """
+
+    def __init__(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+        artifact_name: str,
+        streaming: Optional[bool] = None,
+        item_parser: Optional[IncrementalItemParser] = None,
+    ):
+        self.context = context
+        self.event_queue = event_queue
+        self.artifact_name = artifact_name
+        self.streaming = streaming_enabled() if streaming is None else streaming
+        self._updater: Optional[TaskUpdater] = None
+        self._draft_artifact_id = str(uuid.uuid4())
+        self._draft_started = False
+        self.item_parser = item_parser
+        self._items_artifact_id = str(uuid.uuid4())
+        self._items_started = False
+
+    @property
+    def on_chunk(self):
+        """Chunk callback for StructuredAgent.invoke, or None when not streaming."""
+        return self._send_chunk if self.streaming else None
+
+    @property
+    def on_items(self) -> Optional[Callable[[List[BaseModel]], Awaitable[None]]]:
+        """Callback streaming already validated items, or None when not streaming."""
+        return self._send_items if self.streaming else None
+
+    async def start(self) -> None:
+        """Create the task (if needed) and mark it as working."""
+        if not self.streaming or self._updater is not None:
+            return
+
+        task = self.context.current_task
+        if task is None:
+            task = new_task(self.context.message)
+            await self.event_queue.enqueue_event(task)
+            # Lets cancellation know there is a task to mark as canceled
+            self.context.current_task = task
+
+        self._updater = TaskUpdater(self.event_queue, task.id, task.context_id)
+        await self._updater.start_work()
+
+    async def _send_chunk(self, text: str) -> None:
+        if self._updater is None:
+            await self.start()
+        await self._updater.add_artifact(
+            [Part(root=TextPart(text=text))],
+            artifact_id=self._draft_artifact_id,
+            name=f"{self.artifact_name}_draft",
+            append=self._draft_started,
+            last_chunk=False,
+        )
+        self._draft_started = True
+
+        if self.item_parser is not None:
+            await self._send_items(self.item_parser.feed(text))
+
+    async def _send_items(self, items: List[BaseModel]) -> None:
+        if self._updater is None:
+            await self.start()
+        for item in items:
+            await self._updater.add_artifact(
+                [Part(root=DataPart(data=item.model_dump()))],
+                artifact_id=self._items_artifact_id,
+                name=f"{self.artifact_name}_items",
+                append=self._items_started,
+                last_chunk=False,
+            )
+            self._items_started = True
+
+    async def publish(self, final_content: str, metadata: Optional[dict] = None) -> None:
+        """
+        Send the final result (or error payload) and close the task.
+
+        `metadata` (e.g. token usage) is attached to the final message and
+        the result artifact.
+        """
+        if self._updater is None and self.streaming and self.context.current_task is not None:
+            # The task exists (e.g. created while queued), so close it
+            await self.start()
+        if self._updater is None:
+            message = new_agent_text_message(final_content)
+            message.metadata = metadata
+            await self.event_queue.enqueue_event(message)
+            return
+
+        if self._draft_started:
+            await self._updater.add_artifact(
+                [Part(root=TextPart(text=""))],
+                artifact_id=self._draft_artifact_id,
+                name=f"{self.artifact_name}_draft",
+                append=True,
+                last_chunk=True,
+            )
+        if self._items_started:
+            await self._updater.add_artifact(
+                [],
+                artifact_id=self._items_artifact_id,
+                name=f"{self.artifact_name}_items",
+                append=True,
+                last_chunk=True,
+            )
+        await self._updater.add_artifact(
+            [Part(root=TextPart(text=final_content))],
+            name=self.artifact_name,
+            last_chunk=True,
+            metadata=metadata,
+        )
+        await self._updater.complete(
+            message=self._updater.new_agent_message(
+                [Part(root=TextPart(text=final_content))], metadata=metadata
+            )
+        )
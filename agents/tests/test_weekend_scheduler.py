@@ -0,0 +1,167 @@
+"""
+Behaviour checks for weekend_scheduler
+
+Runs offline with the standard library (from the repo root):
+    .venv/bin/python -m unittest discover agents/tests
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from weekend_scheduler import (
+    DAY_END,
+    DAY_START,
+    DINNER,
+    LUNCH,
+    SAME_LOCATION_BUFFER,
+    TRAVEL_BUFFER,
+    DayForecast,
+    SchedulableActivity,
+    WeekendSchedule,
+    parse_activities,
+    parse_forecast,
+    schedule_weekend,
+)
+
+LOCATIONS = ["", "Old Town", "Harbour", "Museum Quarter"]
+
+
+def random_activities(rng: random.Random, count: int):
+    return [
+        SchedulableActivity(
+            name=f"Activity {index}",
+            duration_minutes=rng.choice([30, 45, 60, 90, 120, 150, 180, 240]),
+            estimated_cost=rng.randint(0, 80),
+            indoor_outdoor=rng.choice(["indoor", "outdoor", "both"]),
+            best_time=rng.choice(["", "morning", "afternoon", "evening", "anytime"]),
+            weather_appropriate=rng.random() > 0.2,
+            location=rng.choice(LOCATIONS),
+        )
+        for index in range(count)
+    ]
+
+
+def random_forecast(rng: random.Random, days: int):
+    return [
+        DayForecast(
+            label=f"Day {index + 1}",
+            condition=rng.choice(["Sunny", "Cloudy", "Rain showers", "Thunderstorms"]),
+            high=rng.randint(40, 95),
+            low=rng.randint(30, 60),
+            precipitation=rng.randint(0, 100),
+        )
+        for index in range(days)
+    ]
+
+
+class ScheduleInvariantsTest(unittest.TestCase):
+    """Properties every schedule must have, over many random inputs."""
+
+    def schedules(self):
+        rng = random.Random(20251020)
+        for _ in range(300):
+            activities = random_activities(rng, rng.randint(1, 16))
+            forecast = random_forecast(rng, rng.randint(1, 3))
+            yield activities, schedule_weekend(activities, forecast)
+
+    def test_slots_do_not_overlap_and_keep_buffers(self):
+        for _, schedule in self.schedules():
+            for day in schedule.days:
+                for previous, slot in zip(day.slots, day.slots[1:]):
+                    same_place = (
+                        previous.activity.location
+                        and previous.activity.location == slot.activity.location
+                    )
+                    buffer = SAME_LOCATION_BUFFER if same_place else TRAVEL_BUFFER
+                    self.assertGreaterEqual(slot.start - previous.end, buffer, day.slots)
+
+    def test_slots_stay_within_the_day_and_outside_meals(self):
+        for _, schedule in self.schedules():
+            for day in schedule.days:
+                for slot in day.slots:
+                    self.assertEqual(slot.end - slot.start, slot.activity.duration_minutes)
+                    self.assertGreaterEqual(slot.start, DAY_START)
+                    self.assertLessEqual(slot.end, DAY_END)
+                    for meal_start, meal_end in (LUNCH, DINNER):
+                        self.assertTrue(slot.end <= meal_start or slot.start >= meal_end, slot)
+
+    def test_every_activity_is_scheduled_or_unscheduled_once(self):
+        for activities, schedule in self.schedules():
+            placed = [slot.activity.name for day in schedule.days for slot in day.slots]
+            skipped = [activity.name for activity in schedule.unscheduled]
+            self.assertCountEqual(placed + skipped, [a.name for a in activities])
+
+    def test_total_cost_is_exact(self):
+        for _, schedule in self.schedules():
+            expected = sum(
+                slot.activity.estimated_cost for day in schedule.days for slot in day.slots
+            )
+            self.assertEqual(schedule.total_cost, expected)
+            self.assertEqual(schedule.total_cost, sum(day.cost() for day in schedule.days))
+
+
+class ScheduleBehaviourTest(unittest.TestCase):
+    def test_activity_longer_than_any_window_is_unscheduled(self):
+        marathon = SchedulableActivity(name="Marathon", duration_minutes=360, estimated_cost=50)
+        schedule = schedule_weekend([marathon], [DayForecast(label="Saturday")])
+        self.assertEqual(schedule.unscheduled, [marathon])
+        self.assertEqual(schedule.total_cost, 0)
+
+    def test_activities_beyond_capacity_are_unscheduled(self):
+        activities = [
+            SchedulableActivity(name=f"Tour {index}", duration_minutes=120, estimated_cost=10)
+            for index in range(10)
+        ]
+        schedule = schedule_weekend(activities, [DayForecast(label="Saturday")])
+        # Two hours fit once in the morning, twice in the afternoon, not in the evening
+        self.assertEqual(len(schedule.days[0].slots), 3)
+        self.assertEqual(len(schedule.unscheduled), 7)
+        self.assertEqual(schedule.total_cost, 30)
+
+    def test_same_location_uses_the_shorter_buffer(self):
+        activities = [
+            SchedulableActivity(name="Gallery", duration_minutes=60, location="Museum Quarter", best_time="morning"),
+            SchedulableActivity(name="Sculptures", duration_minutes=60, location="Museum Quarter", best_time="morning"),
+        ]
+        day = schedule_weekend(activities, [DayForecast(label="Saturday")]).days[0]
+        self.assertEqual(day.slots[1].start - day.slots[0].end, SAME_LOCATION_BUFFER)
+
+    def test_outdoor_activity_goes_to_the_dry_day(self):
+        hike = SchedulableActivity(name="Hike", duration_minutes=120, indoor_outdoor="outdoor")
+        schedule = schedule_weekend(
+            [hike],
+            [
+                DayForecast(label="Saturday", condition="Heavy rain", precipitation=90),
+                DayForecast(label="Sunday", condition="Sunny", precipitation=5),
+            ],
+        )
+        self.assertEqual([len(day.slots) for day in schedule.days], [0, 1])
+
+    def test_empty_schedule(self):
+        schedule = schedule_weekend([], [DayForecast(label="Saturday")])
+        self.assertIsInstance(schedule, WeekendSchedule)
+        self.assertEqual(schedule.unscheduled, [])
+        self.assertEqual(schedule.total_cost, 0)
+
+
+class ParsingTest(unittest.TestCase):
+    def test_parse_activities_requires_a_list(self):
+        with self.assertRaises(ValueError):
+            parse_activities({"activities": []})
+
+    def test_parse_forecast_pads_missing_days(self):
+        days = parse_forecast(
+            {"forecast": [{"condition": "Sunny", "highTemp": 72.4, "precipitation": "10"}]},
+            ["2025-10-18", "2025-10-19"],
+        )
+        self.assertEqual([day.label for day in days], ["Saturday, Oct 18", "Sunday, Oct 19"])
+        self.assertEqual((days[0].high, days[0].precipitation), (72, 10))
+        self.assertEqual(days[1].condition, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
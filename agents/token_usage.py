@@ -0,0 +1,153 @@
+"""
+Token usage accounting
+
+Collects the `usage_metadata` Gemini reports on every model response and
+aggregates it three ways:
+- per A2A request: executors wrap their work in `collect_usage()`, and the
+  totals are attached to the task result metadata as `token_usage`
+- per context id: `UsageLedger` keeps recent contexts (bounded, LRU) and
+  warns once when a context exceeds CONTEXT_TOKEN_WARNING total tokens
+- per agent: `UsageLedger.totals`, and the a2a_agent_tokens_total and
+  a2a_agent_model_calls_total Prometheus counters
+"""
+
+import contextvars
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from metrics import Counter
+
+TOKENS = Counter(
+    "a2a_agent_tokens_total",
+    "Model tokens used (kind: prompt, output, thinking, cached).",
+    ["agent", "kind"],
+)
+MODEL_CALLS = Counter(
+    "a2a_agent_model_calls_total", "Model responses with usage metadata.", ["agent"]
+)
+
+
+@dataclass
+class TokenUsage:
+    """Token counts summed over one or more model calls."""
+
+    calls: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+    cached_tokens: int = 0
+    total_tokens: int = 0
+
+    def add(self, other: "TokenUsage") -> None:
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    @classmethod
+    def from_metadata(cls, usage_metadata: Any) -> "TokenUsage":
+        """Build from a genai GenerateContentResponseUsageMetadata."""
+        prompt = usage_metadata.prompt_token_count or 0
+        output = usage_metadata.candidates_token_count or 0
+        thinking = usage_metadata.thoughts_token_count or 0
+        return cls(
+            calls=1,
+            prompt_tokens=prompt,
+            output_tokens=output,
+            thinking_tokens=thinking,
+            cached_tokens=usage_metadata.cached_content_token_count or 0,
+            total_tokens=usage_metadata.total_token_count or prompt + output + thinking,
+        )
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+# Usage of the A2A request being executed (see collect_usage)
+_request_usage: contextvars.ContextVar[Optional[TokenUsage]] = contextvars.ContextVar(
+    "request_token_usage", default=None
+)
+
+
+@contextmanager
+def collect_usage() -> Iterator[TokenUsage]:
+    """Sum the usage of every model call made inside the block."""
+    usage = TokenUsage()
+    token = _request_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _request_usage.reset(token)
+
+
+class UsageLedger:
+    """
+    Token usage of one agent, in total and per context id.
+
+    Attributes:
+        agent: Agent name used as the metrics label
+        totals: Usage summed over every call of the agent
+        max_contexts: Contexts kept before the least recently used is dropped
+        warning_tokens: Total tokens after which a context is reported once
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        max_contexts: int = 10000,
+        warning_tokens: Optional[int] = None,
+    ):
+        self.agent = agent
+        self.totals = TokenUsage()
+        self.max_contexts = max_contexts
+        self.warning_tokens = (
+            int(os.getenv("CONTEXT_TOKEN_WARNING", 200000))
+            if warning_tokens is None else warning_tokens
+        )
+        self._contexts: "OrderedDict[str, TokenUsage]" = OrderedDict()
+        self._warned: set = set()
+
+    def record(self, context_id: str, usage_metadata: Any) -> TokenUsage:
+        """Account one model response to the agent, its context and the current request."""
+        usage = TokenUsage.from_metadata(usage_metadata)
+        self.totals.add(usage)
+
+        context_usage = self._contexts.pop(context_id, None) or TokenUsage()
+        context_usage.add(usage)
+        self._contexts[context_id] = context_usage
+        while len(self._contexts) > self.max_contexts:
+            dropped, _ = self._contexts.popitem(last=False)
+            self._warned.discard(dropped)
+        if context_usage.total_tokens > self.warning_tokens and context_id not in self._warned:
+            self._warned.add(context_id)
+            print(
+                f"⚠️ Context {context_id} used {context_usage.total_tokens} tokens "
+                f"on {self.agent} over {context_usage.calls} calls"
+            )
+
+        request_usage = _request_usage.get()
+        if request_usage is not None:
+            request_usage.add(usage)
+
+        MODEL_CALLS.inc(self.agent)
+        TOKENS.inc(self.agent, "prompt", amount=usage.prompt_tokens)
+        TOKENS.inc(self.agent, "output", amount=usage.output_tokens)
+        TOKENS.inc(self.agent, "thinking", amount=usage.thinking_tokens)
+        TOKENS.inc(self.agent, "cached", amount=usage.cached_tokens)
+        return usage
+
+    def context_usage(self, context_id: str) -> Optional[TokenUsage]:
+        return self._contexts.get(context_id)
+
+    def top_contexts(self, limit: int = 10) -> Dict[str, Dict[str, int]]:
+        """The contexts with the most total tokens, largest first."""
+        ranked = sorted(self._contexts.items(), key=lambda kv: -kv[1].total_tokens)
+        return {context_id: usage.as_dict() for context_id, usage in ranked[:limit]}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "totals": self.totals.as_dict(),
+            "contexts": len(self._contexts),
+            "top_contexts": self.top_contexts(),
+        }
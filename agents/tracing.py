@@ -0,0 +1,125 @@
+"""
+OpenTelemetry tracing
+
+Sets up an OpenTelemetry tracer provider for the orchestrator and the A2A
+agents, and provides their spans:
+
+- `ag_ui.run`: an ADKAgent run in the orchestrator
+- `a2a.execute`: an A2A AgentExecutor.execute, continuing the caller's trace
+  when the A2A message metadata (or the HTTP request) carries W3C
+  `traceparent`/`tracestate` (the Next.js A2A middleware sends neither, so
+  orchestrator-to-agent calls start a new trace; `a2a.context_id` links them)
+- `structured_agent.run`: one Runner.run_async drive, with a `first_token`
+  event
+
+Google ADK already emits `invocation`, `agent_run [...]` and `call_llm` (the
+model call) spans, and a2a-sdk emits its request handler spans; once a
+provider is configured they are exported alongside ours.
+
+TRACE_EXPORTER selects where spans go:
+- none (default): tracing is off
+- otlp: OTLP over HTTP (OTEL_EXPORTER_OTLP_ENDPOINT, default
+  http://localhost:4318), e.g. a local collector or Jaeger
+- file: one JSON span per line appended to TRACE_FILE (default traces.jsonl)
+- console: spans printed to stdout
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Iterator, Mapping, Optional
+
+from opentelemetry import propagate, trace
+
+tracer = trace.get_tracer("a2a_demo.agents")
+
+TRACE_CONTEXT_KEYS = ("traceparent", "tracestate")
+
+_configured = False
+
+
+def trace_exporter() -> str:
+    return os.getenv("TRACE_EXPORTER", "none").lower()
+
+
+def setup_tracing(service_name: str) -> bool:
+    """
+    Install the global tracer provider selected by TRACE_EXPORTER.
+
+    Only the first call in a process takes effect, so modules that import
+    other agents (the trip agent, the agent host) keep the first service
+    name; OTEL_SERVICE_NAME overrides it.
+
+    Returns:
+        bool: Whether spans are being exported
+    """
+    global _configured
+    exporter_name = trace_exporter()
+    if _configured or exporter_name in ("", "none"):
+        return _configured
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+    )
+
+    if exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        processor = BatchSpanProcessor(OTLPSpanExporter())
+    elif exporter_name == "file":
+        path = os.getenv("TRACE_FILE", "traces.jsonl")
+        processor = BatchSpanProcessor(ConsoleSpanExporter(
+            out=open(path, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        ))
+    elif exporter_name == "console":
+        processor = SimpleSpanProcessor(ConsoleSpanExporter())
+    else:
+        raise ValueError(
+            f"Unknown TRACE_EXPORTER '{exporter_name}' (expected 'none', 'otlp', 'file' or 'console')"
+        )
+
+    resource = Resource.create({
+        "service.name": os.getenv("OTEL_SERVICE_NAME", service_name),
+    })
+    provider = TracerProvider(resource=resource)
+    provider.add_span_processor(processor)
+    trace.set_tracer_provider(provider)
+    _configured = True
+    print(f"🔭 Tracing {os.getenv('OTEL_SERVICE_NAME', service_name)} to {exporter_name}")
+    return True
+
+
+def _incoming_carrier(context) -> Optional[Mapping[str, str]]:
+    """Trace context from the A2A message metadata, else the HTTP headers."""
+    message = getattr(context, "message", None)
+    metadata = getattr(message, "metadata", None) or {}
+    if "traceparent" in metadata:
+        return {key: str(metadata[key]) for key in TRACE_CONTEXT_KEYS if key in metadata}
+    call_context = getattr(context, "call_context", None)
+    headers = call_context.state.get("headers") if call_context else None
+    if headers and "traceparent" in headers:
+        return headers
+    return None
+
+
+@contextmanager
+def execute_span(agent: str, context) -> Iterator[trace.Span]:
+    """Span for an A2A execute, parented to the caller's propagated context."""
+    carrier = _incoming_carrier(context)
+    # Without a propagated context, nest under the current (a2a-sdk) span
+    parent = propagate.extract(carrier) if carrier else None
+    attributes = {
+        "a2a.agent": agent,
+        "a2a.task_id": getattr(context, "task_id", None) or "",
+        "a2a.context_id": getattr(context, "context_id", None) or "",
+    }
+    with tracer.start_as_current_span(
+        "a2a.execute",
+        context=parent,
+        kind=trace.SpanKind.SERVER,
+        attributes=attributes,
+    ) as span:
+        yield span
@@ -0,0 +1,302 @@
+"""
+Trip Agent (ADK + A2A Protocol)
+
+This agent produces a complete weekend trip plan in one A2A call by running
+the weather, activities and weekend planner agents in process.
+
+Features:
+- Runs weather → activities → planner without HTTP hops or orchestrator turns
+- Passes validated Pydantic objects directly between stages
+- Reports per-stage timings with the result
+- Shares agent instances (and their caches and sessions) with the
+  weather, activities and weekend planner apps in the same process
+"""
+
+import uvicorn
+import os
+import json
+import time
+from typing import Dict, List
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+load_dotenv()
+
+# A2A Protocol imports
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.types import (
+    AgentCapabilities,
+    AgentCard,
+    AgentSkill,
+)
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+
+from tracing import execute_span, setup_tracing
+
+# Before importing the stage agents, so spans carry this service name
+setup_tracing('trip_agent')
+
+import activities_agent
+import weather_agent
+import weekend_planner_agent
+from activities_agent import ActivitiesAgent, ActivitiesRequest
+from weather_agent import WeatherAgent, WeatherRequest
+from weekend_planner_agent import WeekendPlannerAgent, WeekendPlannerRequest
+from agent_startup import LazyAgent, warmup_route
+from admission import AdmissionController, Overloaded
+from cancellation import RunningExecutions
+from circuit_breaker import CircuitOpen, collect_stale
+from deadlines import DeadlineExceeded, deadline_scope, request_timeout_seconds
+from metrics import metrics_route, stage_timer, track_execution, track_stores
+from retry import ModelError
+from serialization import encode_json
+from task_stream import TaskStreamPublisher
+from task_store import build_task_store, shutdown_handlers
+from token_usage import collect_usage
+
+
+class TripRequest(BaseModel):
+    """Input format for trip agent requests"""
+    destination: str = Field(description="Destination city/location")
+    dates: List[str] = Field(description="List of dates (e.g., ['2025-10-20', '2025-10-21'])")
+    interests: List[str] = Field(default_factory=list, description="User interests (e.g., ['outdoor', 'culture', 'food'])")
+    budget: str = Field(default="medium", description="Budget level: 'low', 'medium', 'high'")
+    group_size: int = Field(default=2, description="Number of people in the group")
+
+
+class TripPipeline:
+    """
+    In-process weather → activities → weekend planner pipeline.
+
+    Each stage receives the previous stage's validated model rather than
+    its serialized JSON, and the pipeline stops at the first stage whose
+    output fails validation.
+
+    Attributes:
+        weather: WeatherAgent used for the forecast stage
+        activities: ActivitiesAgent used for the activities stage
+        planner: WeekendPlannerAgent used for the planning stage
+    """
+
+    def __init__(
+        self,
+        weather: WeatherAgent,
+        activities: ActivitiesAgent,
+        planner: WeekendPlannerAgent,
+    ):
+        self.weather = weather
+        self.activities = activities
+        self.planner = planner
+
+    async def run(self, request: TripRequest, session_id: str) -> str:
+        """
+        Run all three stages and return the combined JSON result.
+
+        Returns:
+            str: JSON with `weather`, `activities`, `weekend_plan` and
+                `timings_ms`, or an error payload naming the failed stage
+        """
+        timings: Dict[str, float] = {}
+
+        started = time.perf_counter()
+        forecast, response = await self.weather.forecast_structured(
+            WeatherRequest(city=request.destination, dates=request.dates),
+            session_id,
+        )
+        timings["weather"] = _elapsed_ms(started)
+        if forecast is None:
+            return _stage_error("weather", response, timings)
+
+        started = time.perf_counter()
+        activities_request = ActivitiesRequest(
+            destination=request.destination,
+            dates=request.dates,
+            weather_forecast=forecast,
+            interests=request.interests,
+            budget=request.budget,
+            group_size=request.group_size,
+        )
+        activities, response = await self.activities.recommend(activities_request, session_id)
+        timings["activities"] = _elapsed_ms(started)
+        if activities is None:
+            return _stage_error("activities", response, timings)
+
+        started = time.perf_counter()
+        planner_request = WeekendPlannerRequest(
+            destination=request.destination,
+            dates=request.dates,
+            weather_forecast=forecast,
+            activities_list=activities,
+        )
+        plan, response = await self.planner.plan(planner_request, session_id)
+        timings["weekend_planner"] = _elapsed_ms(started)
+        if plan is None:
+            return _stage_error("weekend_planner", response, timings)
+
+        timings["total"] = round(sum(timings.values()), 1)
+        print(f"🧳 Trip plan for {request.destination} in {timings['total']} ms {timings}")
+        return encode_json({
+            "weather": forecast,
+            "activities": activities,
+            "weekend_plan": plan,
+            "timings_ms": timings,
+        })
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _stage_error(stage: str, response: str, timings: Dict[str, float]) -> str:
+    return json.dumps({
+        "error": f"Trip pipeline failed at the {stage} stage",
+        "stage": stage,
+        "details": json.loads(response),
+        "timings_ms": timings,
+    })
+
+
+# Build the A2A Starlette app
+base_url = os.getenv("TRIP_PUBLIC_URL")
+
+skill = AgentSkill(
+    id='trip_agent',
+    name='Trip Planner Agent',
+    description='Creates a full weekend trip plan (weather forecast, activity recommendations and day-by-day itinerary) in a single call. Expects JSON input with destination and dates, plus optional interests, budget and group_size fields.',
+    tags=['travel', 'weather', 'activities', 'planning', 'itinerary', 'adk'],
+    examples=[
+        '{"destination": "Tokyo", "dates": ["2025-10-20", "2025-10-21"], "interests": ["culture", "food"], "budget": "medium", "group_size": 2}',
+        '{"destination": "Seattle", "dates": ["2025-12-01", "2025-12-02"], "interests": ["outdoor"], "budget": "low", "group_size": 1}'
+    ],
+)
+
+public_agent_card = AgentCard(
+    name='Trip Planner Agent',
+    description='ADK-powered agent that runs the weather, activities and weekend planner agents in process to build a complete trip plan',
+    url=base_url or "",
+    version="1.0.0",
+    defaultInputModes=["text"],
+    defaultOutputModes=["text"],
+    capabilities=AgentCapabilities(streaming=True),
+    skills=[skill],
+    supportsAuthenticatedExtendedCard=False,
+)
+
+class TripAgentExecutor(AgentExecutor):
+    def __init__(self):
+        # Reuse the agents behind the individual apps so the trip skill
+        # shares their caches and sessions instead of building new Runners.
+        self.lazy_agent = LazyAgent('trip_pipeline', lambda: TripPipeline(
+            weather=weather_agent.request_handler.agent_executor.agent,
+            activities=activities_agent.request_handler.agent_executor.agent,
+            planner=weekend_planner_agent.request_handler.agent_executor.agent,
+        ))
+        self.running = RunningExecutions('trip_agent')
+        self.admission = AdmissionController('trip_agent')
+
+    @property
+    def pipeline(self) -> TripPipeline:
+        return self.lazy_agent.get()
+
+    async def execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        with execute_span('trip_agent', context):
+            with deadline_scope(request_timeout_seconds('trip_agent', context)):
+                try:
+                    async with self.running.track(context, event_queue):
+                        async with self.admission.admit():
+                            with track_execution('trip_agent'):
+                                await self._execute(context, event_queue)
+                except Overloaded as e:
+                    await self.admission.reject(e, context, event_queue)
+
+    async def _execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        publisher = TaskStreamPublisher(context, event_queue, artifact_name='trip_plan')
+        try:
+            # Parse and validate JSON input
+            with stage_timer('trip_agent', 'parse_input'):
+                raw_input = context.get_user_input()
+                input_data = json.loads(raw_input)
+                trip_request = TripRequest(**input_data)
+            await publisher.start()
+
+            session_id = getattr(context, 'context_id', 'default_session')
+            with collect_usage() as usage, collect_stale() as stale:
+                final_content = await self.pipeline.run(trip_request, session_id)
+            with stage_timer('trip_agent', 'enqueue'):
+                await publisher.publish(
+                    final_content,
+                    metadata={'token_usage': usage.as_dict(), **stale.metadata()},
+                )
+
+        except json.JSONDecodeError as e:
+            error_msg = json.dumps({
+                "error": "Invalid JSON input",
+                "message": f"Failed to parse input as JSON: {str(e)}",
+                "expected_format": {
+                    "destination": "string",
+                    "dates": ["YYYY-MM-DD"],
+                    "interests": ["string"],
+                    "budget": "low|medium|high",
+                    "group_size": "number"
+                }
+            })
+            await publisher.publish(error_msg)
+
+        except (CircuitOpen, DeadlineExceeded, ModelError) as e:
+            await publisher.publish(json.dumps(e.payload()))
+
+        except Exception as e:
+            error_msg = json.dumps({
+                "error": "Invalid input format",
+                "message": str(e),
+                "expected_format": {
+                    "destination": "string",
+                    "dates": ["YYYY-MM-DD"],
+                    "interests": ["string"],
+                    "budget": "low|medium|high",
+                    "group_size": "number"
+                }
+            })
+            await publisher.publish(error_msg)
+
+    async def cancel(
+        self, context: RequestContext, event_queue: EventQueue
+    ) -> None:
+        await self.running.cancel(context, event_queue)
+
+task_store = build_task_store('trip')
+
+request_handler = DefaultRequestHandler(
+    agent_executor=TripAgentExecutor(),
+    task_store=task_store,
+)
+
+server = A2AStarletteApplication(
+    agent_card=public_agent_card,
+    http_handler=request_handler,
+    extended_agent_card=public_agent_card,
+)
+
+track_stores('trip_agent', request_handler.agent_executor.lazy_agent, task_store)
+
+# This is the ASGI app entry that Vercel invokes
+app = server.build(
+    routes=[warmup_route(request_handler.agent_executor.lazy_agent), metrics_route()],
+    on_shutdown=shutdown_handlers(task_store),
+)
+
+
+if __name__ == "__main__":
+    port = int(os.getenv("TRIP_PORT", 9008))
+    print(f"🧳 Starting Trip Agent on http://localhost:{port}")
+    uvicorn.run(app, host="0.0.0.0", port=port)
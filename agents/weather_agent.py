@@ -13,7 +13,7 @@ Features:
 import uvicorn
 import os
 import json
-from typing import List
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
@@ -22,7 +22,6 @@ load_dotenv()
 # A2A Protocol imports
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
@@ -30,15 +29,26 @@ from a2a.types import (
 )
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
 
-# Google ADK imports
-from google.adk.agents.llm_agent import LlmAgent
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
-from google.adk.artifacts import InMemoryArtifactService
-from google.genai import types
+if TYPE_CHECKING:
+    from google.adk.agents.llm_agent import LlmAgent
+
+from response_cache import ResponseCache
+from serialization import encode_model
+from single_flight import SingleFlight
+from json_stream import IncrementalItemParser
+from agent_startup import LazyAgent, warmup_route
+from admission import AdmissionController, Overloaded
+from cancellation import RunningExecutions
+from circuit_breaker import CircuitOpen, StaleFallback, collect_stale
+from deadlines import DeadlineExceeded, deadline_scope, request_timeout_seconds
+from metrics import metrics_route, stage_timer, track_execution, track_stores
+from retry import ModelError
+from structured_agent import ChunkCallback, StructuredAgent
+from task_stream import TaskStreamPublisher
+from task_store import build_task_store, shutdown_handlers
+from token_usage import collect_usage
+from tracing import execute_span, setup_tracing
 
 
 class DailyWeather(BaseModel):
@@ -65,8 +75,14 @@ class WeatherRequest(BaseModel):
     city: str = Field(description="Destination city/location")
     dates: List[str] = Field(description="List of dates for forecast (e.g., ['2025-10-20', '2025-10-21'])")
 
+    def cache_key(self) -> Tuple[str, Tuple[str, ...]]:
+        """Canonical key: city trimmed and case-folded, dates trimmed and sorted."""
+        city = " ".join(self.city.split()).casefold()
+        dates = tuple(sorted(date.strip() for date in self.dates))
+        return city, dates
 
-class WeatherAgent:
+
+class WeatherAgent(StructuredAgent):
     """
     Weather forecasting agent powered by Google ADK and Gemini.
 
@@ -81,26 +97,51 @@ class WeatherAgent:
         _agent: The underlying LlmAgent instance
         _user_id: User ID for session management
         _runner: ADK Runner for executing the agent
+        _cache: TTL + LRU cache of (validated forecast, JSON) keyed on WeatherRequest.cache_key()
+        _day_cache: TTL + LRU cache of DailyWeather keyed on (city, date)
+        _flights: Coalesces concurrent forecasts for the same cache key
+        _fallback: Last good forecast per cache key, served while the model is failing
     """
 
-    def __init__(self):
-        self._agent = self._build_agent()
-        self._user_id = 'remote_agent'
-        self._runner = Runner(
-            app_name=self._agent.name,
-            agent=self._agent,
-            artifact_service=InMemoryArtifactService(),
-            session_service=InMemorySessionService(),
-            memory_service=InMemoryMemoryService(),
+    output_model = StructuredWeather
+    result_label = "weather forecast"
+
+    def __init__(self, response_schema: Optional[bool] = None):
+        super().__init__(response_schema)
+        self._cache = ResponseCache(
+            max_entries=int(os.getenv('WEATHER_CACHE_MAX_ENTRIES', 512)),
+            ttl_seconds=float(os.getenv('WEATHER_CACHE_TTL_SECONDS', 1800)),
         )
+        self._day_cache = ResponseCache(
+            max_entries=int(os.getenv('WEATHER_DAY_CACHE_MAX_ENTRIES', 4096)),
+            ttl_seconds=float(os.getenv('WEATHER_CACHE_TTL_SECONDS', 1800)),
+        )
+        self._flights = SingleFlight(self._agent.name)
+        self._fallback = StaleFallback(self._agent.name)
+
+    def cache_stats(self) -> dict:
+        """
+        Return hit/miss/eviction counters of the response, day and stale
+        result caches (exported by metrics.track_stores) and single-flight
+        counts.
+        """
+        return {
+            "responses": self._cache.stats(),
+            "days": self._day_cache.stats(),
+            "single_flight": self._flights.stats(),
+            "stale": self._fallback.stats(),
+        }
 
-    def _build_agent(self) -> LlmAgent:
+    def _build_agent(self) -> "LlmAgent":
         """
         Build and configure the LlmAgent for weather forecasting.
 
         Returns:
             LlmAgent: Configured agent with weather forecasting instructions
         """
+        # Google ADK imports (deferred until the agent is built)
+        from google.adk.agents.llm_agent import LlmAgent
+
         model_name = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
 
         return LlmAgent(
@@ -148,86 +189,255 @@ Include helpful travel advice based on the weather conditions.
 Return ONLY valid JSON, no markdown code blocks, no other text.
             """,
             tools=[],
+            output_schema=self.output_schema(),
+            disallow_transfer_to_parent=True,
+            disallow_transfer_to_peers=True,
         )
 
-    async def invoke(self, query: str, session_id: str) -> str:
+    async def forecast(
+        self,
+        request: WeatherRequest,
+        session_id: str,
+        on_chunk: ChunkCallback | None = None,
+    ) -> str:
+        """
+        Answer a WeatherRequest with a JSON forecast (see forecast_structured).
         """
-        Process a weather forecast request and return structured JSON.
+        _, final_response = await self.forecast_structured(request, session_id, on_chunk)
+        return final_response
+
+    async def forecast_structured(
+        self,
+        request: WeatherRequest,
+        session_id: str,
+        on_chunk: ChunkCallback | None = None,
+    ) -> Tuple[StructuredWeather | None, str]:
+        """
+        Answer a WeatherRequest, reusing cached days wherever possible.
+
+        Every validated DailyWeather is stored under (city, date). Only dates
+        missing from that cache are sent to the model; the response is then
+        assembled from cached and freshly generated days, with bestDays and
+        travelAdvice recomputed over the merged forecast. If the model does not
+        answer exactly one day per missing date, every requested date is
+        forecast again instead; a full forecast with the wrong number of days
+        is an error (never cached). While streaming, a partial fill is
+        streamed as the merged forecast (see MergedForecastStream). Concurrent requests with the same cache key
+        share one generation (see single_flight), and while the model is
+        failing the last good forecast for the key is served instead (see circuit_breaker.StaleFallback).
 
         Args:
-            query: Natural language query with destination and dates
+            request: Validated weather request
             session_id: Unique session identifier for conversation tracking
+            on_chunk: Optional coroutine receiving partial output while generating
 
         Returns:
-            str: JSON string with structured weather forecast including:
-                - destination: City/location
-                - forecast: Array of daily weather predictions
-                - travelAdvice: Packing and planning recommendations
-                - bestDays: List of best days for outdoor activities
-
-        Raises:
-            Exception: If weather forecast generation fails
+            Tuple of the validated forecast (None if generation failed) and
+            the JSON string in the same format as StructuredAgent.invoke()
         """
-        session = await self._runner.session_service.get_session(
-            app_name=self._agent.name,
-            user_id=self._user_id,
-            session_id=session_id,
+        cache_key = request.cache_key()
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            print(f"⚡ Weather cache hit for {cache_key[0]} ({self._cache.hits} hits, {self._cache.misses} misses)")
+            return cached
+
+        return await self._fallback.serve(
+            cache_key,
+            lambda: self._flights.do(
+                cache_key,
+                lambda stream: self._forecast_uncached(request, cache_key, session_id, stream),
+                on_chunk,
+            ),
+            is_good=lambda result: result[0] is not None,
         )
 
-        content = types.Content(
-            role='user', parts=[types.Part.from_text(text=query)]
+    async def _forecast_uncached(
+        self,
+        request: WeatherRequest,
+        cache_key: Tuple[str, Tuple[str, ...]],
+        session_id: str,
+        on_chunk: ChunkCallback | None,
+    ) -> Tuple[StructuredWeather | None, str]:
+        city = cache_key[0]
+        dates = list(dict.fromkeys(date.strip() for date in request.dates))
+
+        cached_days = {date: self._day_cache.get((city, date)) for date in dates}
+        missing = [date for date in dates if cached_days[date] is None]
+
+        if missing and len(missing) < len(dates):
+            with stage_timer(self._agent.name, 'build_prompt'):
+                query = build_forecast_query(request.city.strip(), missing)
+            stream = None
+            if on_chunk is not None:
+                # Stream the merged forecast rather than the model's partial one
+                stream = MergedForecastStream(request.city.strip(), dates, dict(cached_days), on_chunk)
+                await stream.start()
+            validated_weather, final_response = await self.generate(
+                query, session_id, stream.feed if stream else None
+            )
+            if validated_weather is None:
+                return None, final_response
+            if self._store_days(city, missing, validated_weather.forecast):
+                for date, day in zip(missing, validated_weather.forecast):
+                    cached_days[date] = day
+                return self._merge_days(cache_key, validated_weather.destination, dates, cached_days, len(missing))
+            # The generated days cannot be matched up with the cached ones, and
+            # answering with the missing dates alone would drop the cached days
+            print(
+                f"⚠️ Weather model returned {len(validated_weather.forecast)} days for "
+                f"{len(missing)} missing dates, forecasting all {len(dates)} dates for {city}"
+            )
+            # The partial answer has already been streamed
+            on_chunk = None
+
+        if missing:
+            with stage_timer(self._agent.name, 'build_prompt'):
+                query = build_forecast_query(request.city.strip(), dates)
+            validated_weather, final_response = await self.generate(query, session_id, on_chunk)
+            if validated_weather is None:
+                return None, final_response
+            if not self._store_days(city, dates, validated_weather.forecast):
+                print(
+                    f"❌ Weather model returned {len(validated_weather.forecast)} days "
+                    f"for {len(dates)} requested dates"
+                )
+                return None, json.dumps({
+                    "error": "Incomplete weather forecast",
+                    "message": (
+                        f"Expected one day per requested date ({len(dates)}), "
+                        f"got {len(validated_weather.forecast)}"
+                    ),
+                })
+            self._cache.set(cache_key, (validated_weather, final_response))
+            return validated_weather, final_response
+
+        return self._merge_days(cache_key, request.city.strip(), dates, cached_days, 0)
+
+    def _merge_days(
+        self,
+        cache_key: Tuple[str, Tuple[str, ...]],
+        destination: str,
+        dates: List[str],
+        days: dict,
+        generated: int,
+    ) -> Tuple[StructuredWeather, str]:
+        """Assemble (and cache) a forecast for `dates` from one DailyWeather per date."""
+        print(f"⚡ Weather day cache served {len(dates) - generated}/{len(dates)} days for {cache_key[0]}")
+        merged = [
+            days[date].model_copy(update={"day": index})
+            for index, date in enumerate(dates, start=1)
+        ]
+        best_days, travel_advice = summarize_forecast(merged)
+        merged_weather = StructuredWeather(
+            destination=destination,
+            forecast=merged,
+            travelAdvice=travel_advice,
+            bestDays=best_days,
         )
+        final_response = encode_model(merged_weather)
+        self._cache.set(cache_key, (merged_weather, final_response))
+        return merged_weather, final_response
 
-        if session is None:
-            session = await self._runner.session_service.create_session(
-                app_name=self._agent.name,
-                user_id=self._user_id,
-                state={},
-                session_id=session_id,
-            )
+    def _store_days(self, city: str, dates: List[str], forecast: List[DailyWeather]) -> bool:
+        """Cache each generated day under (city, date) when they line up one-to-one."""
+        if len(forecast) != len(dates):
+            return False
+        for date, day in zip(dates, forecast):
+            self._day_cache.set((city, date), day)
+        return True
 
-        response_text = ''
-        async for event in self._runner.run_async(
-            user_id=self._user_id,
-            session_id=session.id,
-            new_message=content
-        ):
-            if event.is_final_response():
-                if (
-                    event.content
-                    and event.content.parts
-                    and event.content.parts[0].text
-                ):
-                    response_text = '\n'.join(
-                        [p.text for p in event.content.parts if p.text]
-                    )
-                break
-
-        content_str = response_text.strip()
-
-        if "```json" in content_str:
-            content_str = content_str.split("```json")[1].split("```")[0].strip()
-        elif "```" in content_str:
-            content_str = content_str.split("```")[1].split("```")[0].strip()
 
-        try:
-            structured_data = json.loads(content_str)
-            validated_weather = StructuredWeather(**structured_data)
-            final_response = json.dumps(validated_weather.model_dump(), indent=2)
-            print("✅ Successfully created structured weather forecast")
-            return final_response
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing error: {e}")
-            print(f"Content: {content_str}")
-            return json.dumps({
-                "error": "Failed to generate structured weather forecast",
-                "raw_content": content_str[:200]
-            })
-        except Exception as e:
-            print(f"❌ Validation error: {e}")
-            return json.dumps({
-                "error": f"Validation failed: {str(e)}"
-            })
+class MergedForecastStream:
+    """
+    Streams a partial day-cache fill as the forecast it will be merged into.
+
+    The model only generates the missing dates. This rewrites its streamed
+    output as the text of the merged forecast: cached days are sent at once,
+    generated days as soon as they complete, all in date order and numbered
+    against the full date list, so streaming clients see the same days as
+    the final result.
+    """
+
+    def __init__(
+        self,
+        destination: str,
+        dates: List[str],
+        cached_days: dict,
+        on_chunk: ChunkCallback,
+    ):
+        self.destination = destination
+        self.dates = dates
+        self.days = cached_days
+        self.on_chunk = on_chunk
+        self._parser = IncrementalItemParser('forecast', DailyWeather)
+        self._missing = [date for date in dates if cached_days[date] is None]
+        self._sent = 0
+
+    async def start(self) -> None:
+        await self.on_chunk(f'{{"destination":{json.dumps(self.destination)},"forecast":[')
+        await self._send_ready()
+
+    async def feed(self, chunk: str) -> None:
+        for day in self._parser.feed(chunk):
+            if self._missing:
+                self.days[self._missing.pop(0)] = day
+        await self._send_ready()
+
+    async def _send_ready(self) -> None:
+        while self._sent < len(self.dates) and self.days[self.dates[self._sent]] is not None:
+            day = self.days[self.dates[self._sent]]
+            self._sent += 1
+            text = encode_model(day.model_copy(update={"day": self._sent}))
+            await self.on_chunk(text if self._sent == 1 else "," + text)
+
+
+def build_forecast_query(city: str, dates: List[str]) -> str:
+    """Format a forecast request into a prompt for the ADK agent."""
+    dates_str = ", ".join(dates)
+    return f"Provide a weather forecast for {city} for the following dates: {dates_str}"
+
+
+def summarize_forecast(forecast: List[DailyWeather]) -> Tuple[List[int], str]:
+    """
+    Derive bestDays and travelAdvice from a list of daily forecasts.
+
+    Used when a forecast is assembled from cached days, so the advice covers
+    the merged range rather than whichever request first generated each day.
+
+    Returns:
+        Tuple of (best day numbers, travel advice text)
+    """
+    wet_words = ("rain", "storm", "shower", "snow", "sleet", "thunder")
+
+    def is_wet(day: DailyWeather) -> bool:
+        return day.precipitation >= 50 or any(w in day.condition.lower() for w in wet_words)
+
+    best_days = [
+        day.day for day in forecast
+        if not is_wet(day) and day.precipitation <= 30 and 55 <= day.highTemp <= 88 and day.windSpeed < 20
+    ]
+    if not best_days and forecast:
+        driest = min(day.precipitation for day in forecast)
+        best_days = [day.day for day in forecast if day.precipitation == driest]
+
+    high = max(day.highTemp for day in forecast)
+    low = min(day.lowTemp for day in forecast)
+    advice = [f"Expect highs up to {high}°F and lows down to {low}°F."]
+
+    wet_dates = [day.date for day in forecast if is_wet(day)]
+    if wet_dates:
+        advice.append(f"Pack an umbrella or rain jacket for {', '.join(wet_dates)}.")
+    if low < 50:
+        advice.append("Bring warm layers and a jacket for cold mornings and evenings.")
+    elif high - low >= 15:
+        advice.append("Dress in layers for the swing between daytime and evening temperatures.")
+    if high >= 80:
+        advice.append("Bring sunscreen, a hat and a refillable water bottle for the warmer days.")
+    if any(day.windSpeed >= 20 for day in forecast):
+        advice.append("Expect strong winds on some days; a windproof layer will help.")
+    advice.append("Wear comfortable walking shoes.")
+
+    return best_days, " ".join(advice)
 
 
 # Build the A2A Starlette app.
@@ -274,26 +484,59 @@ class WeatherAgentExecutor(AgentExecutor):
     """
 
     def __init__(self):
-        self.agent = WeatherAgent()
+        # Built on first use (see agent_startup) to keep imports light
+        self.lazy_agent = LazyAgent('weather_agent', WeatherAgent)
+        self.running = RunningExecutions('weather_agent')
+        self.admission = AdmissionController('weather_agent')
+
+    @property
+    def agent(self) -> WeatherAgent:
+        return self.lazy_agent.get()
 
     async def execute(
         self,
         context: RequestContext,
         event_queue: EventQueue,
     ) -> None:
+        with execute_span('weather_agent', context):
+            with deadline_scope(request_timeout_seconds('weather_agent', context)):
+                try:
+                    async with self.running.track(context, event_queue):
+                        async with self.admission.admit():
+                            with track_execution('weather_agent'):
+                                await self._execute(context, event_queue)
+                except Overloaded as e:
+                    await self.admission.reject(e, context, event_queue)
+
+    async def _execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        publisher = TaskStreamPublisher(
+            context,
+            event_queue,
+            artifact_name='weather_forecast',
+            item_parser=IncrementalItemParser('forecast', DailyWeather),
+        )
         try:
             # Parse and validate JSON input
-            raw_input = context.get_user_input()
-            input_data = json.loads(raw_input)
-            weather_request = WeatherRequest(**input_data)
-
-            # Format structured request into prompt for ADK agent
-            dates_str = ", ".join(weather_request.dates)
-            query = f"Provide a weather forecast for {weather_request.city} for the following dates: {dates_str}"
+            with stage_timer('weather_agent', 'parse_input'):
+                raw_input = context.get_user_input()
+                input_data = json.loads(raw_input)
+                weather_request = WeatherRequest(**input_data)
+            await publisher.start()
 
             session_id = getattr(context, 'context_id', 'default_session')
-            final_content = await self.agent.invoke(query, session_id)
-            await event_queue.enqueue_event(new_agent_text_message(final_content))
+            with collect_usage() as usage, collect_stale() as stale:
+                final_content = await self.agent.forecast(
+                    weather_request, session_id, on_chunk=publisher.on_chunk
+                )
+            with stage_timer('weather_agent', 'enqueue'):
+                await publisher.publish(
+                    final_content,
+                    metadata={'token_usage': usage.as_dict(), **stale.metadata()},
+                )
 
         except json.JSONDecodeError as e:
             error_msg = json.dumps({
@@ -304,7 +547,10 @@ class WeatherAgentExecutor(AgentExecutor):
                     "dates": ["YYYY-MM-DD", "..."]
                 }
             })
-            await event_queue.enqueue_event(new_agent_text_message(error_msg))
+            await publisher.publish(error_msg)
+
+        except (CircuitOpen, DeadlineExceeded, ModelError) as e:
+            await publisher.publish(json.dumps(e.payload()))
 
         except Exception as e:
             error_msg = json.dumps({
@@ -315,16 +561,20 @@ class WeatherAgentExecutor(AgentExecutor):
                     "dates": ["YYYY-MM-DD", "..."]
                 }
             })
-            await event_queue.enqueue_event(new_agent_text_message(error_msg))
+            await publisher.publish(error_msg)
 
     async def cancel(
         self, context: RequestContext, event_queue: EventQueue
     ) -> None:
-        raise Exception('cancel not supported')
+        await self.running.cancel(context, event_queue)
+
+setup_tracing('weather_agent')
+
+task_store = build_task_store('weather')
 
 request_handler = DefaultRequestHandler(
     agent_executor=WeatherAgentExecutor(),
-    task_store=InMemoryTaskStore(),
+    task_store=task_store,
 )
 
 server = A2AStarletteApplication(
@@ -333,8 +583,13 @@ server = A2AStarletteApplication(
     extended_agent_card=public_agent_card,
 )
 
+track_stores('weather_agent', request_handler.agent_executor.lazy_agent, task_store)
+
 # This is the ASGI app entry that Vercel invokes
-app = server.build()
+app = server.build(
+    routes=[warmup_route(request_handler.agent_executor.lazy_agent), metrics_route()],
+    on_shutdown=shutdown_handlers(task_store),
+)
 
 
 if __name__ == "__main__":
@@ -14,16 +14,15 @@ Features:
 import uvicorn
 import os
 import json
-from typing import List
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Optional, Tuple
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 
 load_dotenv()
 
 # A2A Protocol imports
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
@@ -31,15 +30,26 @@ from a2a.types import (
 )
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
 
-# Google ADK imports
-from google.adk.agents.llm_agent import LlmAgent
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
-from google.adk.artifacts import InMemoryArtifactService
-from google.genai import types
+if TYPE_CHECKING:
+    from google.adk.agents.llm_agent import LlmAgent
+
+from json_stream import IncrementalItemParser
+from prompt_compaction import format_activities, format_forecast
+from serialization import Payload, encode_model
+from agent_startup import LazyAgent, warmup_route
+from admission import AdmissionController, Overloaded
+from cancellation import RunningExecutions
+from circuit_breaker import CircuitOpen
+from deadlines import DeadlineExceeded, deadline_scope, request_timeout_seconds
+from metrics import metrics_route, stage_timer, track_execution, track_stores
+from retry import ModelError
+from structured_agent import ChunkCallback, StructuredAgent
+from task_stream import TaskStreamPublisher
+from task_store import build_task_store, shutdown_handlers
+from token_usage import collect_usage
+from tracing import execute_span, setup_tracing
+from weekend_scheduler import WeekendSchedule, parse_activities, parse_forecast, schedule_weekend
 
 
 class ScheduledActivity(BaseModel):
@@ -72,11 +82,24 @@ class WeekendPlannerRequest(BaseModel):
     """Input format for weekend planner agent requests"""
     destination: str = Field(description="Destination city/location")
     dates: List[str] = Field(description="List of dates (e.g., ['2025-10-20', '2025-10-21'])")
-    weather_forecast: dict = Field(description="Weather forecast data from weather agent")
-    activities_list: dict = Field(description="Activities recommendations from activities agent")
+    weather_forecast: Payload = Field(description="Weather forecast data from weather agent")
+    activities_list: Payload = Field(description="Activities recommendations from activities agent")
 
 
-class WeekendPlannerAgent:
+class DayNotes(BaseModel):
+    date: str = Field(description="Date label of the day, as given in the schedule")
+    activity_notes: List[str] = Field(description="One note per scheduled activity, in schedule order")
+    backup_plan: str = Field(description="Alternative plan if weather changes")
+
+
+class WeekendPlanNotes(BaseModel):
+    days: List[DayNotes] = Field(description="Notes for each scheduled day, in order")
+    packing_essentials: List[str] = Field(description="Essential items to pack")
+    general_tips: List[str] = Field(description="General tips for the weekend")
+    emergency_contacts: str = Field(description="Useful emergency contact information")
+
+
+class WeekendPlannerAgent(StructuredAgent):
     """
     Weekend planning agent powered by Google ADK and Gemini.
 
@@ -91,20 +114,80 @@ class WeekendPlannerAgent:
         _agent: The underlying LlmAgent instance
         _user_id: User ID for session management
         _runner: ADK Runner for executing the agent
+        _writer: Smaller agent that writes notes for a locally built schedule
     """
 
-    def __init__(self):
-        self._agent = self._build_agent()
-        self._user_id = 'remote_agent'
-        self._runner = Runner(
-            app_name=self._agent.name,
-            agent=self._agent,
-            artifact_service=InMemoryArtifactService(),
-            session_service=InMemorySessionService(),
-            memory_service=InMemoryMemoryService(),
-        )
+    output_model = StructuredWeekendPlan
+    result_label = "weekend plan"
+
+    def __init__(self, response_schema: Optional[bool] = None):
+        super().__init__(response_schema)
+        self._writer = WeekendPlanWriter(response_schema)
+
+    def llm_agents(self) -> List["LlmAgent"]:
+        return super().llm_agents() + self._writer.llm_agents()
+
+    async def plan(
+        self,
+        request: WeekendPlannerRequest,
+        session_id: str,
+        on_chunk: Optional[ChunkCallback] = None,
+        on_days: Optional[Callable[[List[DayPlan]], Awaitable[None]]] = None,
+    ) -> Tuple[Optional[StructuredWeekendPlan], str]:
+        """
+        Build a weekend plan for a request.
+
+        By default the schedule (days, times, buffers, meals, total cost) is
+        computed locally by weekend_scheduler and the model only writes the
+        notes, backup plans and tips; if that call fails or its output is
+        invalid, the schedule is returned with default notes. If the
+        activities list cannot be parsed, or PLANNER_LOCAL_SCHEDULING=false,
+        the model plans everything.
+
+        Args:
+            request: Validated planner request
+            session_id: Unique session identifier for conversation tracking
+            on_chunk: Optional coroutine receiving the model's plan JSON while
+                it plans everything (the notes for a local schedule are not
+                streamed; they are a different document)
+            on_days: Optional coroutine receiving the locally scheduled days,
+                without notes, before the model is called
+
+        Returns:
+            Tuple of the validated plan (None if generation failed) and the
+            JSON string to send back (the plan, or an error payload).
+        """
+        if local_scheduling_enabled():
+            try:
+                activities = parse_activities(request.activities_list)
+            except (ValueError, ValidationError) as e:
+                print(f"⚠️ Activities not schedulable locally, asking the model to plan: {e}")
+            else:
+                schedule = schedule_weekend(
+                    activities, parse_forecast(request.weather_forecast, request.dates)
+                )
+                if on_days is not None:
+                    await on_days(build_scheduled_plan(request, schedule, None).day_by_day)
+                with stage_timer(self._writer._agent.name, 'build_prompt'):
+                    query = build_notes_query(request.destination, schedule)
+                try:
+                    notes, _ = await self._writer.generate(query, session_id)
+                except (CircuitOpen, DeadlineExceeded, ModelError) as e:
+                    # The schedule is already built; fall back to default notes
+                    print(f"⚠️ Plan notes unavailable, using defaults: {e}")
+                    notes = None
+                plan = build_scheduled_plan(request, schedule, notes)
+                print(f"✅ Successfully created structured weekend plan (local schedule, notes {'ok' if notes else 'missing'})")
+                return plan, encode_model(plan)
+
+        with stage_timer(self._agent.name, 'build_prompt'):
+            query = build_planner_query(request)
+        return await self.generate(query, session_id, on_chunk)
+
+    def _build_agent(self) -> "LlmAgent":
+        # Google ADK imports (deferred until the agent is built)
+        from google.adk.agents.llm_agent import LlmAgent
 
-    def _build_agent(self) -> LlmAgent:
         model_name = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
 
         return LlmAgent(
@@ -162,69 +245,160 @@ Guidelines:
 Return ONLY valid JSON, no markdown code blocks, no other text.
             """,
             tools=[],
+            output_schema=self.output_schema(),
+            disallow_transfer_to_parent=True,
+            disallow_transfer_to_peers=True,
         )
 
-    async def invoke(self, query: str, session_id: str) -> str:
-        session = await self._runner.session_service.get_session(
-            app_name=self._agent.name,
-            user_id=self._user_id,
-            session_id=session_id,
+
+class WeekendPlanWriter(StructuredAgent):
+    """
+    Writes the prose for a weekend schedule that was built locally.
+
+    The schedule itself (times, order, costs) is fixed; this agent only
+    returns per-activity notes, backup plans, packing essentials, tips and
+    emergency contacts, which keeps the model call small.
+    """
+
+    output_model = WeekendPlanNotes
+    result_label = "weekend plan notes"
+
+    def _build_agent(self) -> "LlmAgent":
+        # Google ADK imports (deferred until the agent is built)
+        from google.adk.agents.llm_agent import LlmAgent
+
+        model_name = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
+
+        return LlmAgent(
+            model=model_name,
+            name='weekend_plan_writer',
+            description='An agent that writes notes and tips for a fixed weekend schedule',
+            instruction="""
+You write short, practical notes for a weekend itinerary whose schedule is already fixed.
+Do not change times, order, activities or costs.
+
+Return ONLY a valid JSON object with this exact structure:
+{
+  "days": [
+    {
+      "date": "Saturday, Dec 15",
+      "activity_notes": ["One short tip per scheduled activity, in order"],
+      "backup_plan": "What to do instead if the weather turns"
+    }
+  ],
+  "packing_essentials": ["Item 1", "Item 2"],
+  "general_tips": ["Tip 1", "Tip 2"],
+  "emergency_contacts": "Local emergency: 911, Tourist info: ..."
+}
+
+Return one entry in "days" per scheduled day and exactly one note per scheduled activity.
+Return ONLY valid JSON, no markdown code blocks, no other text.
+            """,
+            tools=[],
+            output_schema=self.output_schema(),
+            disallow_transfer_to_parent=True,
+            disallow_transfer_to_peers=True,
         )
 
-        content = types.Content(
-            role='user', parts=[types.Part.from_text(text=query)]
+
+def local_scheduling_enabled() -> bool:
+    return os.getenv("PLANNER_LOCAL_SCHEDULING", "true").lower() not in ("0", "false", "no")
+
+
+def build_notes_query(destination: str, schedule: WeekendSchedule) -> str:
+    """Describe a fixed schedule compactly for WeekendPlanWriter."""
+    lines = [f"Write notes for this weekend schedule in {destination}."]
+    for day in schedule.days:
+        lines.append("")
+        lines.append(f"{day.forecast.label} ({day.forecast.summary()}):")
+        if not day.slots:
+            lines.append("- free day, nothing scheduled")
+        for slot in day.slots:
+            activity = slot.activity
+            where = f" @ {activity.location}" if activity.location else ""
+            lines.append(f"- {slot.time_range} {activity.name}{where} ({activity.indoor_outdoor})")
+    if schedule.unscheduled:
+        lines.append("")
+        lines.append("Not scheduled: " + ", ".join(a.name for a in schedule.unscheduled))
+    return "\n".join(lines)
+
+
+def build_scheduled_plan(
+    request: WeekendPlannerRequest,
+    schedule: WeekendSchedule,
+    notes: Optional[WeekendPlanNotes],
+) -> StructuredWeekendPlan:
+    """
+    Combine a locally computed schedule with the model's notes.
+
+    Notes are matched by position; if the model returned a different number
+    of days or activities, neutral defaults are used for the mismatched part
+    so the plan is always complete.
+    """
+    day_plans = []
+    for index, day in enumerate(schedule.days):
+        day_notes = notes.days[index] if notes and index < len(notes.days) else None
+        activity_notes = day_notes.activity_notes if day_notes else []
+        if len(activity_notes) != len(day.slots):
+            activity_notes = [""] * len(day.slots)
+
+        has_outdoor = any(s.activity.indoor_outdoor == "outdoor" for s in day.slots)
+        default_backup = (
+            "If the weather turns, swap outdoor activities for indoor ones nearby."
+            if has_outdoor else "No outdoor activities planned, so the weather should not affect this day."
         )
 
-        if session is None:
-            session = await self._runner.session_service.create_session(
-                app_name=self._agent.name,
-                user_id=self._user_id,
-                state={},
-                session_id=session_id,
-            )
-
-        response_text = ''
-        async for event in self._runner.run_async(
-            user_id=self._user_id,
-            session_id=session.id,
-            new_message=content
-        ):
-            if event.is_final_response():
-                if (
-                    event.content
-                    and event.content.parts
-                    and event.content.parts[0].text
-                ):
-                    response_text = '\n'.join(
-                        [p.text for p in event.content.parts if p.text]
-                    )
-                break
-
-        content_str = response_text.strip()
-
-        if "```json" in content_str:
-            content_str = content_str.split("```json")[1].split("```")[0].strip()
-        elif "```" in content_str:
-            content_str = content_str.split("```")[1].split("```")[0].strip()
+        day_plans.append(DayPlan(
+            date=day.forecast.label,
+            weather_summary=day.forecast.summary(),
+            schedule=[
+                ScheduledActivity(
+                    time=slot.time_range,
+                    activity_name=slot.activity.name,
+                    location=slot.activity.location,
+                    duration_minutes=slot.activity.duration_minutes,
+                    notes=note,
+                )
+                for slot, note in zip(day.slots, activity_notes)
+            ],
+            meal_suggestions=day.meal_suggestions(),
+            backup_plan=day_notes.backup_plan if day_notes else default_backup,
+        ))
+
+    general_tips = list(notes.general_tips) if notes else []
+    if schedule.unscheduled:
+        general_tips.append(
+            "Did not fit in the schedule: "
+            + ", ".join(a.name for a in schedule.unscheduled)
+            + ". Swap them in if plans change."
+        )
 
-        try:
-            structured_data = json.loads(content_str)
-            validated_plan = StructuredWeekendPlan(**structured_data)
-            final_response = json.dumps(validated_plan.model_dump(), indent=2)
-            print("✅ Successfully created structured weekend plan")
-            return final_response
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing error: {e}")
-            print(f"Content: {content_str}")
-            return json.dumps({
-                "error": "Failed to generate structured weekend plan",
-                "raw_content": content_str[:200]
-            })
-        except Exception as e:
-            print(f"❌ Validation error: {e}")
-            return json.dumps({
-                "error": f"Validation failed: {str(e)}"
-            })
+    return StructuredWeekendPlan(
+        destination=request.destination,
+        dates=[day.forecast.label for day in schedule.days],
+        day_by_day=day_plans,
+        total_estimated_cost=schedule.total_cost,
+        packing_essentials=notes.packing_essentials if notes else [],
+        general_tips=general_tips,
+        emergency_contacts=notes.emergency_contacts if notes else "",
+    )
+
+
+def build_planner_query(request: WeekendPlannerRequest) -> str:
+    """Format a weekend planner request into a prompt for the ADK agent."""
+    dates_str = ", ".join(request.dates)
+    weather_str = format_forecast(request.weather_forecast)
+    activities_str = format_activities(request.activities_list)
+
+    return f"""Create a comprehensive weekend plan for {request.destination} for: {dates_str}
+
+Weather Forecast:
+{weather_str}
+
+Recommended Activities:
+{activities_str}
+
+Please organize these into a well-structured day-by-day itinerary with timing, meals, and practical tips."""
 
 
 # Build the A2A Starlette app
@@ -256,37 +430,59 @@ public_agent_card = AgentCard(
 
 class WeekendPlannerAgentExecutor(AgentExecutor):
     def __init__(self):
-        self.agent = WeekendPlannerAgent()
+        # Built on first use (see agent_startup) to keep imports light
+        self.lazy_agent = LazyAgent('weekend_planner_agent', WeekendPlannerAgent)
+        self.running = RunningExecutions('weekend_planner_agent')
+        self.admission = AdmissionController('weekend_planner_agent')
+
+    @property
+    def agent(self) -> WeekendPlannerAgent:
+        return self.lazy_agent.get()
 
     async def execute(
         self,
         context: RequestContext,
         event_queue: EventQueue,
     ) -> None:
+        with execute_span('weekend_planner_agent', context):
+            with deadline_scope(request_timeout_seconds('weekend_planner_agent', context)):
+                try:
+                    async with self.running.track(context, event_queue):
+                        async with self.admission.admit():
+                            with track_execution('weekend_planner_agent'):
+                                await self._execute(context, event_queue)
+                except Overloaded as e:
+                    await self.admission.reject(e, context, event_queue)
+
+    async def _execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        publisher = TaskStreamPublisher(
+            context,
+            event_queue,
+            artifact_name='weekend_plan',
+            item_parser=IncrementalItemParser('day_by_day', DayPlan),
+        )
         try:
             # Parse and validate JSON input
-            raw_input = context.get_user_input()
-            input_data = json.loads(raw_input)
-            planner_request = WeekendPlannerRequest(**input_data)
-
-            # Format structured request into prompt for ADK agent
-            dates_str = ", ".join(planner_request.dates)
-            weather_str = json.dumps(planner_request.weather_forecast, indent=2)
-            activities_str = json.dumps(planner_request.activities_list, indent=2)
-
-            query = f"""Create a comprehensive weekend plan for {planner_request.destination} for: {dates_str}
-
-Weather Forecast:
-{weather_str}
-
-Recommended Activities:
-{activities_str}
-
-Please organize these into a well-structured day-by-day itinerary with timing, meals, and practical tips."""
+            with stage_timer('weekend_planner_agent', 'parse_input'):
+                raw_input = context.get_user_input()
+                input_data = json.loads(raw_input)
+                planner_request = WeekendPlannerRequest(**input_data)
 
             session_id = getattr(context, 'context_id', 'default_session')
-            final_content = await self.agent.invoke(query, session_id)
-            await event_queue.enqueue_event(new_agent_text_message(final_content))
+            await publisher.start()
+            with collect_usage() as usage:
+                _, final_content = await self.agent.plan(
+                    planner_request,
+                    session_id,
+                    on_chunk=publisher.on_chunk,
+                    on_days=publisher.on_items,
+                )
+            with stage_timer('weekend_planner_agent', 'enqueue'):
+                await publisher.publish(final_content, metadata={'token_usage': usage.as_dict()})
 
         except json.JSONDecodeError as e:
             error_msg = json.dumps({
@@ -299,7 +495,10 @@ Please organize these into a well-structured day-by-day itinerary with timing, m
                     "activities_list": "object"
                 }
             })
-            await event_queue.enqueue_event(new_agent_text_message(error_msg))
+            await publisher.publish(error_msg)
+
+        except (CircuitOpen, DeadlineExceeded, ModelError) as e:
+            await publisher.publish(json.dumps(e.payload()))
 
         except Exception as e:
             error_msg = json.dumps({
@@ -312,16 +511,20 @@ Please organize these into a well-structured day-by-day itinerary with timing, m
                     "activities_list": "object"
                 }
             })
-            await event_queue.enqueue_event(new_agent_text_message(error_msg))
+            await publisher.publish(error_msg)
 
     async def cancel(
         self, context: RequestContext, event_queue: EventQueue
     ) -> None:
-        raise Exception('cancel not supported')
+        await self.running.cancel(context, event_queue)
+
+setup_tracing('weekend_planner_agent')
+
+task_store = build_task_store('weekend_planner')
 
 request_handler = DefaultRequestHandler(
     agent_executor=WeekendPlannerAgentExecutor(),
-    task_store=InMemoryTaskStore(),
+    task_store=task_store,
 )
 
 server = A2AStarletteApplication(
@@ -330,8 +533,13 @@ server = A2AStarletteApplication(
     extended_agent_card=public_agent_card,
 )
 
+track_stores('weekend_planner_agent', request_handler.agent_executor.lazy_agent, task_store)
+
 # This is the ASGI app entry that Vercel invokes
-app = server.build()
+app = server.build(
+    routes=[warmup_route(request_handler.agent_executor.lazy_agent), metrics_route()],
+    on_shutdown=shutdown_handlers(task_store),
+)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,266 @@
+"""
+Weekend Scheduler
+
+Deterministic interval scheduling for the weekend planner. Given the
+recommended activities and the per-day forecast, it assigns activities to
+days and time slots, inserts buffers and meal breaks, and sums the cost
+exactly, so the model only has to write the prose around the schedule.
+
+Rules:
+- Each day runs 9:00 AM to 9:30 PM with lunch (12:30) and dinner (6:30)
+- 15 min buffer between activities at the same location, 30 min otherwise
+- Outdoor activities go to dry days and mornings; indoor ones fill rainy
+  days and afternoons; an explicit best_time wins
+- Activities not appropriate for the weather are scheduled last
+- Activities that do not fit anywhere are reported as unscheduled
+"""
+
+from dataclasses import dataclass, field
+from datetime import date as date_type
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from serialization import Payload, as_mapping
+
+
+DAY_START = 9 * 60
+LUNCH = (12 * 60 + 30, 13 * 60 + 30)
+DINNER = (18 * 60 + 30, 19 * 60 + 45)
+DAY_END = 21 * 60 + 30
+
+# Windows between meals, in the order "morning", "afternoon", "evening"
+WINDOWS = {
+    "morning": (DAY_START, LUNCH[0]),
+    "afternoon": (LUNCH[1], DINNER[0]),
+    "evening": (DINNER[1], DAY_END),
+}
+
+SAME_LOCATION_BUFFER = 15
+TRAVEL_BUFFER = 30
+HOT_DAY_F = 85
+WET_WORDS = ("rain", "storm", "shower", "snow", "sleet", "thunder")
+
+
+class SchedulableActivity(BaseModel):
+    """The Activity fields the scheduler needs; lenient about missing ones."""
+    model_config = ConfigDict(extra="ignore")
+
+    name: str
+    duration_minutes: int = Field(default=90, gt=0)
+    estimated_cost: int = 0
+    indoor_outdoor: str = "both"
+    best_time: str = ""
+    weather_appropriate: bool = True
+    location: str = ""
+
+
+@dataclass
+class DayForecast:
+    label: str
+    condition: str = ""
+    high: Optional[int] = None
+    low: Optional[int] = None
+    precipitation: int = 0
+
+    @property
+    def wet(self) -> bool:
+        condition = self.condition.lower()
+        return self.precipitation >= 50 or any(word in condition for word in WET_WORDS)
+
+    @property
+    def hot(self) -> bool:
+        return self.high is not None and self.high >= HOT_DAY_F
+
+    def summary(self) -> str:
+        parts = [self.condition or "Forecast unavailable"]
+        if self.high is not None:
+            parts.append(f"{self.high}°F high")
+        if self.low is not None:
+            parts.append(f"{self.low}°F low")
+        parts.append(f"{self.precipitation}% chance of precipitation")
+        return ", ".join(parts)
+
+
+@dataclass
+class ScheduledSlot:
+    start: int
+    end: int
+    activity: SchedulableActivity
+
+    @property
+    def time_range(self) -> str:
+        return f"{format_minutes(self.start)} - {format_minutes(self.end)}"
+
+
+@dataclass
+class DaySchedule:
+    forecast: DayForecast
+    slots: List[ScheduledSlot] = field(default_factory=list)
+
+    def meal_suggestions(self) -> List[str]:
+        morning = [s for s in self.slots if s.end <= LUNCH[0]]
+        afternoon = [s for s in self.slots if LUNCH[1] <= s.start and s.end <= DINNER[0]]
+        lunch = f"Lunch at {format_minutes(LUNCH[0])}"
+        if morning and morning[-1].activity.location:
+            lunch += f" near {morning[-1].activity.location}"
+        dinner = f"Dinner at {format_minutes(DINNER[0])}"
+        if afternoon and afternoon[-1].activity.location:
+            dinner += f" near {afternoon[-1].activity.location}"
+        return ["Breakfast at 8:00 AM near your hotel", lunch, dinner]
+
+    def cost(self) -> int:
+        return sum(slot.activity.estimated_cost for slot in self.slots)
+
+
+@dataclass
+class WeekendSchedule:
+    days: List[DaySchedule]
+    unscheduled: List[SchedulableActivity]
+
+    @property
+    def total_cost(self) -> int:
+        return sum(day.cost() for day in self.days)
+
+
+def format_minutes(minutes: int) -> str:
+    hours, mins = divmod(minutes, 60)
+    suffix = "AM" if hours < 12 else "PM"
+    return f"{(hours - 1) % 12 + 1}:{mins:02d} {suffix}"
+
+
+def parse_activities(activities_list: Payload) -> List[SchedulableActivity]:
+    """Validate the activities payload; raises if it has no usable activities."""
+    raw = as_mapping(activities_list).get("activities")
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("activities_list has no 'activities' list")
+    return [SchedulableActivity.model_validate(item, from_attributes=True) for item in raw]
+
+
+def parse_forecast(weather_forecast: Payload, dates: List[str]) -> List[DayForecast]:
+    """Pair each requested date with its forecast entry (matched by position)."""
+    raw = as_mapping(weather_forecast).get("forecast")
+    entries = [as_mapping(entry) for entry in raw] if isinstance(raw, list) else []
+    days = []
+    for index, requested in enumerate(dates):
+        entry = entries[index] if index < len(entries) and isinstance(entries[index], dict) else {}
+        days.append(DayForecast(
+            label=_date_label(requested, entry.get("date")),
+            condition=str(entry.get("condition", "")),
+            high=_int_or_none(entry.get("highTemp")),
+            low=_int_or_none(entry.get("lowTemp")),
+            precipitation=_int_or_none(entry.get("precipitation")) or 0,
+        ))
+    return days
+
+
+def schedule_weekend(
+    activities: List[SchedulableActivity],
+    forecast: List[DayForecast],
+) -> WeekendSchedule:
+    """
+    Assign activities to days and time slots.
+
+    Activities are placed one at a time (weather-appropriate, longest first)
+    into the day and window with the best score, at the earliest free time
+    in that window after the required buffer.
+    """
+    days = [DaySchedule(forecast=day) for day in forecast]
+    cursors: List[Dict[str, int]] = [
+        {name: start for name, (start, _) in WINDOWS.items()} for _ in days
+    ]
+    unscheduled: List[SchedulableActivity] = []
+
+    ordered = sorted(
+        activities,
+        key=lambda a: (not a.weather_appropriate, -a.duration_minutes),
+    )
+    for activity in ordered:
+        placement = _best_placement(activity, days, cursors)
+        if placement is None:
+            unscheduled.append(activity)
+            continue
+        day_index, window, start = placement
+        end = start + activity.duration_minutes
+        days[day_index].slots.append(ScheduledSlot(start=start, end=end, activity=activity))
+        cursors[day_index][window] = end
+
+    for day in days:
+        day.slots.sort(key=lambda slot: slot.start)
+    return WeekendSchedule(days=days, unscheduled=unscheduled)
+
+
+def _best_placement(
+    activity: SchedulableActivity,
+    days: List[DaySchedule],
+    cursors: List[Dict[str, int]],
+) -> Optional[Tuple[int, str, int]]:
+    best: Optional[Tuple[float, int, str, int]] = None
+    for day_index, day in enumerate(days):
+        for window_rank, window in enumerate(_preferred_windows(activity, day.forecast)):
+            window_start, window_end = WINDOWS[window]
+            start = cursors[day_index][window]
+            previous = _last_slot_in_window(day, window)
+            if previous is not None:
+                same_place = (
+                    previous.activity.location
+                    and previous.activity.location == activity.location
+                )
+                start += SAME_LOCATION_BUFFER if same_place else TRAVEL_BUFFER
+            if start + activity.duration_minutes > window_end:
+                continue
+
+            score = (
+                window_rank * 10
+                + _weather_penalty(activity, day.forecast)
+                + sum(slot.activity.duration_minutes for slot in day.slots) / 60
+            )
+            if best is None or score < best[0]:
+                best = (score, day_index, window, start)
+    if best is None:
+        return None
+    return best[1], best[2], best[3]
+
+
+def _preferred_windows(activity: SchedulableActivity, forecast: DayForecast) -> List[str]:
+    best_time = activity.best_time.lower()
+    if "morning" in best_time:
+        return ["morning", "afternoon", "evening"]
+    if "evening" in best_time or "night" in best_time:
+        return ["evening", "afternoon", "morning"]
+    if "afternoon" in best_time:
+        return ["afternoon", "morning", "evening"]
+    if activity.indoor_outdoor == "outdoor":
+        return ["morning", "afternoon", "evening"]
+    if activity.indoor_outdoor == "indoor" and forecast.hot:
+        return ["afternoon", "evening", "morning"]
+    return ["afternoon", "morning", "evening"]
+
+
+def _weather_penalty(activity: SchedulableActivity, forecast: DayForecast) -> float:
+    if activity.indoor_outdoor == "outdoor":
+        return 30 if forecast.wet else forecast.precipitation / 10
+    if activity.indoor_outdoor == "indoor":
+        return 0 if forecast.wet else 2
+    return 0
+
+
+def _last_slot_in_window(day: DaySchedule, window: str) -> Optional[ScheduledSlot]:
+    window_start, window_end = WINDOWS[window]
+    inside = [s for s in day.slots if window_start <= s.start and s.end <= window_end]
+    return max(inside, key=lambda s: s.end) if inside else None
+
+
+def _date_label(requested: str, forecast_date: Optional[str]) -> str:
+    try:
+        day = date_type.fromisoformat(requested.strip())
+        return f"{day:%A, %b} {day.day}"
+    except ValueError:
+        return forecast_date or requested
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return None